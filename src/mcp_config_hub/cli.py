@@ -1,11 +1,45 @@
+import glob
+import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
 
 import click
 
 from mcp_config_hub.config import ConfigManager
+from mcp_config_hub.diff_utils import (
+    Change,
+    has_changes,
+    render_unified,
+    three_way_merge,
+)
+from mcp_config_hub.fingerprints import Fingerprinter, changed_paths
 from mcp_config_hub.formatters import get_formatter
-from mcp_config_hub.integrations import get_integration
+from mcp_config_hub.integrations import get_all_integrations, get_integration
+from mcp_config_hub.prompt_files import DigestCache
+from mcp_config_hub.server_selection import (
+    ROUTING_KEY,
+    ServerSelector,
+    restore_tags,
+    routing_selector,
+    select_hub_config,
+    select_servers,
+    strip_tags,
+)
 from mcp_config_hub.storage import StorageManager
+from mcp_config_hub.sync_plan import (
+    SyncPlan,
+    ToolPlan,
+    from_portable_path,
+    is_project_path,
+    plan_tool,
+    to_portable_path,
+)
+from mcp_config_hub.sync_state import SyncBaseStore, SyncLedger, file_state
+from mcp_config_hub.tree_utils import MISSING, lookup, split_key
+from mcp_config_hub.watch import create_watcher, watch_changes
 
 
 @click.group()
@@ -59,10 +93,15 @@ def get(key, output_format, scope):
     type=click.Choice(["global", "user", "project"]),
     help="Configuration scope",
 )
-def set(key, value, scope):
+@click.option(
+    "--coalesce",
+    is_flag=True,
+    help="Let a concurrent writer commit this change together with its own",
+)
+def set(key, value, scope, coalesce):
     """Set configuration value by key (supports dot notation)."""
     try:
-        storage = StorageManager()
+        storage = StorageManager(coalesce_writes=coalesce)
         config_manager = ConfigManager(storage)
 
         config_manager.set(key, value, scope)
@@ -95,6 +134,43 @@ def set_prompt(prompt_content, scope):
         sys.exit(1)
 
 
+@cli.command()
+@click.argument("pattern")
+@click.option(
+    "--format",
+    "output_format",
+    default="json",
+    type=click.Choice(["json", "yaml", "toml"]),
+    help="Output format",
+)
+@click.option(
+    "--scope",
+    default="merged",
+    type=click.Choice(["global", "user", "project", "merged"]),
+    help="Configuration scope",
+)
+def query(pattern, output_format, scope):
+    """Get all values matching a key pattern (supports * wildcards)."""
+    try:
+        storage = StorageManager()
+        config_manager = ConfigManager(storage)
+
+        matches = config_manager.query(pattern, scope)
+
+        if not matches:
+            click.echo(
+                f"No keys matching '{pattern}' in {scope} configuration", err=True
+            )
+            sys.exit(1)
+
+        formatter = get_formatter(output_format)
+        click.echo(formatter.format(matches))
+
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
 @cli.command()
 @click.option(
     "--format",
@@ -141,29 +217,15 @@ def delete(key, scope, force):
         config_manager = ConfigManager(storage)
 
         current_config = config_manager.list_all(scope)
-        # 仮想的に削除後の設定を作成
-        import copy
-
-        new_config = copy.deepcopy(current_config)
-        keys = key.split(".")
-        current = new_config
-        for k in keys[:-1]:
-            if k not in current or not isinstance(current[k], dict):
-                current = None
-                break
-            current = current[k]
-        if current is not None and keys[-1] in current:
-            del current[keys[-1]]
-        else:
+        keys = split_key(key)
+        value = lookup(current_config, keys)
+        if not keys or value is MISSING:
             click.echo(f"Key '{key}' not found in {scope} configuration", err=True)
             sys.exit(1)
-        from mcp_config_hub.diff_utils import generate_config_diff
 
-        diff = generate_config_diff(current_config, new_config, f"{scope} config")
-        if diff:
-            click.echo(diff)
-        else:
-            click.echo("No difference found.")
+        # 削除による変更だけを構造的な差分として表示
+        change = Change("remove", tuple(keys), value, None)
+        click.echo(render_unified([change], f"{scope} config"))
         if not force:
             c = click.confirm(
                 f"Delete '{key}' from {scope} configuration?", default=False
@@ -182,244 +244,893 @@ def delete(key, scope, force):
         sys.exit(1)
 
 
-@cli.group()
-def sync():
-    """Sync configurations with external tools."""
-    pass
-
-
-@sync.command()
+@cli.command()
+@click.argument("layout", type=click.Choice(["file", "sharded", "sqlite"]))
 @click.option(
-    "--direction",
-    default="from-hub",
-    type=click.Choice(["from-hub", "to-hub"]),
-    help="Sync direction",
+    "--scope",
+    default="user",
+    type=click.Choice(["global", "user", "project"]),
+    help="Configuration scope",
 )
-@click.option("--force", is_flag=True, help="Skip confirmation prompt")
-def vscode(direction, force):
-    """Sync with VSCode settings."""
+def migrate(layout, scope):
+    """Convert a scope to the file, sharded or sqlite storage layout."""
     try:
-        storage = StorageManager()
-        config_manager = ConfigManager(storage)
-        integration = get_integration("vscode")
-
-        if direction == "from-hub":
-            hub_config = config_manager.list_all("merged")
-            if force:
-                integration.sync_from_hub(hub_config)
-                click.echo("Synced MCP Config Hub settings to VSCode")
-            else:
-                success = integration.sync_from_hub_with_confirmation(
-                    hub_config, "VSCode"
-                )
-                if success:
-                    click.echo("Synced MCP Config Hub settings to VSCode")
-                else:
-                    click.echo("Sync cancelled by user")
-        else:
-            hub_config = integration.sync_to_hub()
-            for key, value in hub_config.get("mcpServers", {}).items():
-                config_manager.set(f"mcpServers.{key}", value, "user")
-            click.echo("Synced VSCode settings to MCP Config Hub")
+        storage = StorageManager(layout=layout)
+        storage.migrate(scope)
+        click.echo(f"Migrated {scope} configuration to the {layout} layout")
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
 
 
-@sync.command()
-@click.option(
-    "--direction",
-    default="from-hub",
-    type=click.Choice(["from-hub", "to-hub"]),
-    help="Sync direction",
-)
-@click.option("--force", is_flag=True, help="Skip confirmation prompt")
-def claude(direction, force):
-    """Sync with Claude Desktop configuration."""
+TOOL_LABELS = {
+    "vscode": "VSCode",
+    "claude": "Claude Desktop",
+    "cursor": "Cursor",
+    "windsurf": "Windsurf",
+    "gemini": "Gemini CLI",
+    "claude_code": "Claude Code CLI",
+}
+
+
+def _merge_with_base(tool, base, hub_servers, tool_servers, on_conflict):
+    """Three-way merge hub and tool servers against the last synced servers."""
+    merged, conflicts = three_way_merge(base, hub_servers, tool_servers)
+    if conflicts and on_conflict == "fail":
+        raise ValueError(
+            f"Servers changed in both MCP Config Hub and {TOOL_LABELS[tool]} "
+            f"since the last sync: {', '.join(conflicts)} "
+            "(use --on-conflict hub or --on-conflict tool)"
+        )
+    winner = hub_servers if on_conflict == "hub" else tool_servers
+    for name in conflicts:
+        if name in winner:
+            merged[name] = winner[name]
+    return merged
+
+
+def _import_to_hub(
+    config_manager,
+    integration,
+    tool,
+    on_conflict,
+    base_store,
+    ledger,
+    include_prompt=False,
+):
+    """Import an integration's servers into the user scope with a single write.
+
+    Only servers that differ from the hub are written. After a first sync,
+    only servers changed on the tool's side since the last sync are
+    imported, including removals. Nothing is read if the tool's files are
+    unchanged since the last sync to the hub. Only the hub servers the
+    tool's routing rule selects are merged with the tool's, so servers not
+    routed to the tool are never deleted. Returns the number of hub changes
+    written.
+    """
+    config_path = integration.get_config_path()
+    sync_paths = integration.get_sync_paths()
+    if ledger.is_current(tool, "to-hub", config_path, sync_paths):
+        return 0
+
+    hub_config = integration.sync_to_hub()
+    tool_servers = hub_config.get("mcpServers", {})
+    base = base_store.load(tool, config_path)
+    all_hub_servers = config_manager.get("mcpServers") or {}
+    selector = routing_selector(config_manager.get(ROUTING_KEY), tool)
+    hub_servers = select_servers(all_hub_servers, [selector])
+    if base is None:
+        servers = {**hub_servers, **tool_servers}
+    else:
+        servers = _merge_with_base(tool, base, hub_servers, tool_servers, on_conflict)
+
+    with config_manager.transaction("user") as tx:
+        for key, value in servers.items():
+            hub_server = all_hub_servers.get(key)
+            if key not in all_hub_servers or has_changes(strip_tags(hub_server), value):
+                tx.set(f"mcpServers.{key}", restore_tags(value, hub_server))
+        for key in hub_servers:
+            if key not in servers:
+                tx.delete(f"mcpServers.{key}")
+        prompt = hub_config.get("default_prompt")
+        if include_prompt and prompt is not None:
+            if prompt != config_manager.get("default_prompt"):
+                tx.set("default_prompt", prompt)
+        count = len(tx.operations)
+
+    # The tool side is now what the hub was merged with; hub-side changes
+    # it does not have yet are picked up by the next sync from the hub.
+    base_store.save(tool, config_path, tool_servers)
+    ledger.record(tool, "to-hub", config_path, sync_paths)
+    return count
+
+
+def _merge_hub_config(integration, tool, hub_config, on_conflict, base_store):
+    """Get the hub configuration to sync to a tool.
+
+    Once the tool has a sync base, its servers are three-way merged with the
+    hub's; otherwise the hub configuration is used as is.
+    """
+    base = base_store.load(tool, integration.get_config_path())
+    if base is None:
+        return hub_config
+    hub_servers = hub_config.get("mcpServers", {})
+    tool_servers = integration.sync_to_hub().get("mcpServers", {})
+    servers = _merge_with_base(tool, base, hub_servers, tool_servers, on_conflict)
+    return dict(hub_config, mcpServers=servers)
+
+
+def _sync_from_hub(
+    config_manager,
+    integration,
+    tool,
+    force,
+    plan_format,
+    on_conflict,
+    base_store,
+    ledger,
+    selector=None,
+):
+    """Sync the merged hub configuration to an integration.
+
+    Only the servers the tool's routing rule and selector match are synced.
+    After a first sync, servers changed on the tool's side since the last
+    sync are kept instead of being overwritten. If neither side changed
+    since then, nothing is parsed or diffed.
+    """
+    if selector is None:
+        selector = ServerSelector()
+    tool_label = TOOL_LABELS[tool]
+    config_path = integration.get_config_path()
+    sync_paths = integration.get_sync_paths()
+    hub_version = _hub_version(config_manager.storage, selector)
+    if plan_format is None and ledger.is_current(
+        tool, "from-hub", config_path, sync_paths, hub_version
+    ):
+        click.echo(f"No changes needed for {tool_label} configuration.")
+        return
+
+    hub_config = select_hub_config(config_manager.list_all("merged"), tool, selector)
+    hub_servers = hub_config.get("mcpServers", {})
+    hub_config = _merge_hub_config(
+        integration, tool, hub_config, on_conflict, base_store
+    )
+
+    if plan_format == "json":
+        patch = integration.plan_from_hub(hub_config)
+        click.echo(json.dumps(patch, indent=2, ensure_ascii=False))
+        return
+
+    if force:
+        integration.sync_from_hub(hub_config)
+        synced = True
+    else:
+        synced = integration.sync_from_hub_with_confirmation(hub_config, tool_label)
+
+    if synced:
+        # The hub side is now what the tool was merged with; tool-side changes
+        # the hub does not have yet are picked up by the next sync to the hub.
+        base_store.save(tool, config_path, hub_servers)
+        ledger.record(tool, "from-hub", config_path, sync_paths, hub_version)
+        click.echo(f"Synced MCP Config Hub settings to {tool_label}")
+    else:
+        click.echo("Sync cancelled by user")
+
+
+def _hub_version(storage, selector):
+    """Get the version of the hub as synced to a tool with selector.
+
+    Syncs with different selectors write different servers, so the
+    selector is part of the version recorded in the sync ledger.
+    """
+    return (*storage.scope_fingerprints(), selector)
+
+
+def _run_sync(tool, direction, force, plan_format, on_conflict, selector):
+    """Run a sync command for one tool."""
     try:
         storage = StorageManager()
         config_manager = ConfigManager(storage)
-        integration = get_integration("claude")
+        integration = get_integration(tool)
+        base_store = SyncBaseStore(storage.get_state_dir())
+        ledger = SyncLedger(storage.get_state_dir())
 
         if direction == "from-hub":
-            hub_config = config_manager.list_all("merged")
-            if force:
-                integration.sync_from_hub(hub_config)
-                click.echo("Synced MCP Config Hub settings to Claude Desktop")
-            else:
-                success = integration.sync_from_hub_with_confirmation(
-                    hub_config, "Claude Desktop"
-                )
-                if success:
-                    click.echo("Synced MCP Config Hub settings to Claude Desktop")
-                else:
-                    click.echo("Sync cancelled by user")
+            _sync_from_hub(
+                config_manager,
+                integration,
+                tool,
+                force,
+                plan_format,
+                on_conflict,
+                base_store,
+                ledger,
+                selector,
+            )
         else:
-            hub_config = integration.sync_to_hub()
-            for key, value in hub_config.get("mcpServers", {}).items():
-                config_manager.set(f"mcpServers.{key}", value, "user")
-            click.echo("Synced Claude Desktop settings to MCP Config Hub")
+            _import_to_hub(
+                config_manager,
+                integration,
+                tool,
+                on_conflict,
+                base_store,
+                ledger,
+                include_prompt=tool == "claude_code",
+            )
+            click.echo(f"Synced {TOOL_LABELS[tool]} settings to MCP Config Hub")
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
 
 
+_SYNC_OPTIONS = [
+    click.option(
+        "--direction",
+        default="from-hub",
+        type=click.Choice(["from-hub", "to-hub"]),
+        help="Sync direction",
+    ),
+    click.option("--force", is_flag=True, help="Skip confirmation prompt"),
+    click.option(
+        "--plan",
+        "plan_format",
+        type=click.Choice(["json"]),
+        help="Print the changes as a JSON Patch instead of applying them",
+    ),
+    click.option(
+        "--on-conflict",
+        default="fail",
+        type=click.Choice(["fail", "hub", "tool"]),
+        help="Which side wins for servers changed on both sides since the last sync",
+    ),
+]
+
+_SELECTOR_OPTIONS = [
+    click.option(
+        "--include",
+        multiple=True,
+        help="Only sync servers whose name matches this glob (repeatable)",
+    ),
+    click.option(
+        "--exclude",
+        multiple=True,
+        help="Do not sync servers whose name matches this glob (repeatable)",
+    ),
+    click.option(
+        "--tag",
+        "tags",
+        multiple=True,
+        help="Only sync servers with this tag (repeatable)",
+    ),
+]
+
+
+def _sync_options(command):
+    """Add the options shared by all sync commands."""
+    for option in reversed(_SYNC_OPTIONS + _SELECTOR_OPTIONS):
+        command = option(command)
+    return command
+
+
+def _selector_options(command):
+    """Add the server selection options of commands syncing from the hub."""
+    for option in reversed(_SELECTOR_OPTIONS):
+        command = option(command)
+    return command
+
+
+@cli.group()
+def sync():
+    """Sync configurations with external tools."""
+    pass
+
+
 @sync.command()
-@click.option(
-    "--direction",
-    default="from-hub",
-    type=click.Choice(["from-hub", "to-hub"]),
-    help="Sync direction",
-)
-@click.option("--force", is_flag=True, help="Skip confirmation prompt")
-def cursor(direction, force):
+@_sync_options
+def vscode(direction, force, plan_format, on_conflict, include, exclude, tags):
+    """Sync with VSCode settings."""
+    selector = ServerSelector(include, exclude, tags)
+    _run_sync("vscode", direction, force, plan_format, on_conflict, selector)
+
+
+@sync.command()
+@_sync_options
+def claude(direction, force, plan_format, on_conflict, include, exclude, tags):
+    """Sync with Claude Desktop configuration."""
+    selector = ServerSelector(include, exclude, tags)
+    _run_sync("claude", direction, force, plan_format, on_conflict, selector)
+
+
+@sync.command()
+@_sync_options
+def cursor(direction, force, plan_format, on_conflict, include, exclude, tags):
     """Sync with Cursor MCP server settings."""
-    try:
-        storage = StorageManager()
-        config_manager = ConfigManager(storage)
-        integration = get_integration("cursor")
+    selector = ServerSelector(include, exclude, tags)
+    _run_sync("cursor", direction, force, plan_format, on_conflict, selector)
 
-        if direction == "from-hub":
-            hub_config = config_manager.list_all("merged")
-            if force:
-                integration.sync_from_hub(hub_config)
-                click.echo("Synced MCP Config Hub settings to Cursor")
-            else:
-                success = integration.sync_from_hub_with_confirmation(
-                    hub_config, "Cursor"
-                )
-                if success:
-                    click.echo("Synced MCP Config Hub settings to Cursor")
-                else:
-                    click.echo("Sync cancelled by user")
+
+@sync.command()
+@_sync_options
+def windsurf(direction, force, plan_format, on_conflict, include, exclude, tags):
+    """Sync with Windsurf MCP server settings."""
+    selector = ServerSelector(include, exclude, tags)
+    _run_sync("windsurf", direction, force, plan_format, on_conflict, selector)
+
+
+@sync.command()
+@_sync_options
+def gemini(direction, force, plan_format, on_conflict, include, exclude, tags):
+    """Sync with Gemini CLI MCP server settings."""
+    selector = ServerSelector(include, exclude, tags)
+    _run_sync("gemini", direction, force, plan_format, on_conflict, selector)
+
+
+@sync.command()
+@_sync_options
+def claude_code(direction, force, plan_format, on_conflict, include, exclude, tags):
+    """Sync with Claude Code CLI settings."""
+    selector = ServerSelector(include, exclude, tags)
+    _run_sync("claude_code", direction, force, plan_format, on_conflict, selector)
+
+
+def _parse_tools(tools):
+    """Parse a comma-separated --tools value, defaulting to every tool."""
+    if not tools:
+        return [*TOOL_LABELS]
+    names = [name.strip() for name in tools.split(",") if name.strip()]
+    for name in names:
+        if name not in TOOL_LABELS:
+            raise ValueError(f"Unsupported tool: {name}")
+    return names
+
+
+def _map_tools(tools, func):
+    """Run func for each tool on a thread pool.
+
+    Returns a dict from tool to (True, result) or (False, exception).
+    """
+    results = {}
+    if not tools:
+        return results
+    with ThreadPoolExecutor(max_workers=len(tools)) as executor:
+        futures = {tool: executor.submit(func, tool) for tool in tools}
+        for tool, future in futures.items():
+            try:
+                results[tool] = (True, future.result())
+            except Exception as e:
+                results[tool] = (False, e)
+    return results
+
+
+_ON_CONFLICT_OPTION = click.option(
+    "--on-conflict",
+    default="fail",
+    type=click.Choice(["fail", "hub", "tool"]),
+    help="Which side wins for servers changed on both sides since the last sync",
+)
+
+
+def _plan_sync(storage, names, on_conflict, selector=None):
+    """Plan the sync from the hub to several tools concurrently.
+
+    Each tool gets the servers its routing rule and selector match. Tools
+    the sync ledger shows as unchanged on both sides are planned as
+    up to date without reading anything. Returns the plan of the tools that
+    could be planned, a dict from each other tool to its error, and the hub
+    version the plan was computed from.
+    """
+    if selector is None:
+        selector = ServerSelector()
+    config_manager = ConfigManager(storage)
+    base_store = SyncBaseStore(storage.get_state_dir(), storage.project_root)
+    ledger = SyncLedger(storage.get_state_dir(), storage.project_root)
+    hub_version = _hub_version(storage, selector)
+    integrations = get_all_integrations(storage.project_root)
+
+    plan = SyncPlan(project_root=storage.project_root)
+    pending = []
+    for tool in names:
+        integration = integrations[tool]
+        if ledger.is_current(
+            tool,
+            "from-hub",
+            integration.get_config_path(),
+            integration.get_sync_paths(),
+            hub_version,
+        ):
+            plan.add(tool, [], ToolPlan(None, 0, []))
         else:
-            hub_config = integration.sync_to_hub()
-            for key, value in hub_config.get("mcpServers", {}).items():
-                config_manager.set(f"mcpServers.{key}", value, "user")
-            click.echo("Synced Cursor settings to MCP Config Hub")
+            pending.append(tool)
+    if not pending:
+        return plan, {}, hub_version
 
-    except Exception as e:
-        click.echo(f"Error: {e}", err=True)
+    hub_config = config_manager.list_all("merged")
+    digests = DigestCache(storage.get_state_dir())
+
+    def prepare(tool):
+        integration = integrations[tool]
+        tool_hub_config = select_hub_config(hub_config, tool, selector)
+        hub_servers = tool_hub_config.get("mcpServers", {})
+        tool_hub_config = _merge_hub_config(
+            integration, tool, tool_hub_config, on_conflict, base_store
+        )
+        return plan_tool(tool, integration, tool_hub_config, hub_servers, digests)
+
+    failures = {}
+    for tool, (ok, result) in _map_tools(pending, prepare).items():
+        if ok:
+            plan.add(tool, *result)
+        else:
+            failures[tool] = result
+    digests.save()
+    return plan, failures, hub_version
+
+
+def _echo_plan(plan):
+    """Print the summary of every tool a plan changes."""
+    for tool, tool_plan in plan.tools.items():
+        if tool_plan.changes:
+            click.echo(f"\nProposed changes to {TOOL_LABELS[tool]}:")
+            for line in tool_plan.summary:
+                click.echo(f"  {line}")
+
+
+def _commit_plan(storage, plan, hub_version=None):
+    """Apply a plan and record the sync bases of its tools.
+
+    With the hub version the plan was computed from, the tools are also
+    recorded in the sync ledger. Returns the result of each write.
+    """
+    state_dir = storage.get_state_dir()
+    backup_dir = state_dir / "backups" / datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    if plan.project_root is not None:
+        backup_dir = backup_dir.with_name(f"{backup_dir.name}-{os.getpid()}")
+    results = plan.apply(backup_dir)
+
+    digests = DigestCache(state_dir)
+    for change in plan.changes:
+        if change.op == "write":
+            path = from_portable_path(change.path, plan.project_root)
+            digests.record(path, change.value)
+    digests.save()
+
+    base_store = SyncBaseStore(state_dir, plan.project_root)
+    ledger = SyncLedger(state_dir, plan.project_root)
+    for tool, tool_plan in plan.tools.items():
+        if tool_plan.servers is None:
+            continue
+        integration = get_integration(tool, plan.project_root)
+        config_path = integration.get_config_path()
+        base_store.save(tool, config_path, tool_plan.servers)
+        if hub_version is not None:
+            ledger.record(
+                tool,
+                "from-hub",
+                config_path,
+                integration.get_sync_paths(),
+                hub_version,
+            )
+    return results
+
+
+def _echo_written(results, suffix=""):
+    """Print how many files and bytes a sync wrote, if any."""
+    written = [result for result in results if result.written]
+    if written:
+        size = sum(result.size for result in written)
+        skipped = len(results) - len(written)
+        click.echo(
+            f"Wrote {len(written)} files ({size} bytes)"
+            + (f", skipped {skipped} unchanged" if skipped else "")
+            + suffix
+        )
+
+
+def _apply_plan(storage, plan, force, hub_version=None):
+    """Confirm and apply a plan, then record the sync bases of its tools.
+
+    Returns False if the user cancelled.
+    """
+    if not plan.is_empty() and not force:
+        _echo_plan(plan)
+        if not click.confirm("\nApply these changes?"):
+            click.echo("Sync cancelled by user")
+            return False
+
+    _echo_written(_commit_plan(storage, plan, hub_version))
+    return True
+
+
+def _result_line(tool, plan, failures, skipped=()):
+    """Format the result of syncing one tool for a results table.
+
+    Tools in skipped had changes that were not applied; they are reported
+    as partially synced, or as skipped if nothing else changed.
+    """
+    if tool in failures:
+        status = f"failed: {failures[tool]}"
+    elif tool in skipped:
+        changes = plan.tools[tool].changes
+        status = f"partial ({changes} changes)" if changes else "skipped"
+    elif plan.tools[tool].changes:
+        status = f"synced ({plan.tools[tool].changes} changes)"
+    else:
+        status = "up to date"
+    return f"{TOOL_LABELS[tool]:<16} {status}"
+
+
+def _echo_results(names, plan, failures):
+    """Print one result line per tool and exit with 1 if any failed."""
+    for tool in names:
+        click.echo(_result_line(tool, plan, failures))
+    if failures:
         sys.exit(1)
 
 
-@sync.command()
+def _find_projects(spec):
+    """Get the project directories matching a glob or listed in a file.
+
+    A file lists one project per line, relative to the file's directory;
+    blank lines and lines starting with # are skipped.
+    """
+    path = Path(spec)
+    if path.is_file():
+        lines = [line.strip() for line in path.read_text("utf-8").splitlines()]
+        roots = [path.parent / line for line in lines if line and line[0] != "#"]
+    else:
+        roots = [Path(match) for match in sorted(glob.glob(spec, recursive=True))]
+    roots = [*dict.fromkeys(root.absolute() for root in roots if root.is_dir())]
+    if not roots:
+        raise ValueError(f"No project directories found for {spec}")
+    return roots
+
+
+def _plan_project(root, names, on_conflict, selector, preloaded):
+    """Plan the sync of one project, in a worker process.
+
+    Only files inside the project are planned. Returns the plan, the error
+    message of each tool that failed, the hub version and the tools with
+    changes to files outside the project, which are skipped.
+    """
+    storage = StorageManager(snapshot=False, project_root=root, preloaded=preloaded)
+    plan, failures, hub_version = _plan_sync(storage, names, on_conflict, selector)
+    failures = {tool: str(error) for tool, error in failures.items()}
+    outside = {
+        change.tool for change in plan.changes if not is_project_path(change.path)
+    }
+    return plan.project_only(), failures, hub_version, outside
+
+
+def _commit_project(root, plan, hub_version):
+    """Apply the plan of one project, in a worker process."""
+    return _commit_plan(StorageManager(project_root=root), plan, hub_version)
+
+
+def _map_projects(func, calls, jobs):
+    """Run func(root, *args) for each root and args of calls on a process pool.
+
+    Returns a dict from root to (True, result) or (False, error message).
+    """
+    results = {}
+    if not calls:
+        return results
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            root: executor.submit(func, root, *args) for root, args in calls.items()
+        }
+        for root, future in futures.items():
+            try:
+                results[root] = (True, future.result())
+            except Exception as e:
+                results[root] = (False, str(e))
+    return results
+
+
+def _sync_projects(roots, names, force, on_conflict, selector, jobs):
+    """Sync the hub to the tools of many projects and print one report.
+
+    The global and user scopes are loaded once and shared with the worker
+    processes, which plan every project in parallel. After one confirmation
+    for all projects, the plans are applied in parallel too.
+    """
+    preloaded = StorageManager().preload_scopes(["global", "user"])
+    calls = {root: (names, on_conflict, selector, preloaded) for root in roots}
+    plans, errors = {}, {}
+    for root, (ok, result) in _map_projects(_plan_project, calls, jobs).items():
+        if ok:
+            plans[root] = result
+        else:
+            errors[root] = result
+
+    if not force and any(not plan.is_empty() for plan, *_ in plans.values()):
+        for root, (plan, *_) in plans.items():
+            if not plan.is_empty():
+                click.echo(f"\n{to_portable_path(root) or '.'}:")
+                _echo_plan(plan)
+        if not click.confirm("\nApply these changes?"):
+            click.echo("Sync cancelled by user")
+            return
+
+    calls = {root: (plan, version) for root, (plan, _, version, _) in plans.items()}
+    results = []
+    changed = failed = 0
+    skipped = []
+    for root, (ok, result) in _map_projects(_commit_project, calls, jobs).items():
+        plan, failures, _, outside = plans[root]
+        if not ok:
+            errors[root] = result
+            continue
+        results.extend(result)
+        skipped.extend(outside)
+        has_changes = any(tool_plan.changes for tool_plan in plan.tools.values())
+        if failures:
+            failed += 1
+        elif has_changes:
+            changed += 1
+        if failures or has_changes:
+            click.echo(f"{to_portable_path(root) or '.'}:")
+            for tool in names:
+                click.echo(f"  {_result_line(tool, plan, failures, outside)}")
+    for root, error in errors.items():
+        click.echo(f"{to_portable_path(root) or '.'}: failed: {error}")
+
+    failed += len(errors)
+    _echo_written(results)
+    for tool in names:
+        if tool in skipped:
+            click.echo(
+                f"Skipped {TOOL_LABELS[tool]} files outside the projects "
+                "(sync it without --projects)"
+            )
+    click.echo(
+        f"Synced {len(roots)} projects: {changed} changed, "
+        f"{len(roots) - changed - failed} up to date, {failed} failed"
+    )
+    if failed:
+        sys.exit(1)
+
+
+@sync.command("all")
+@click.option("--tools", help="Comma-separated tools to sync (default: all)")
+@click.option("--force", is_flag=True, help="Skip confirmation prompt")
+@_ON_CONFLICT_OPTION
+@_selector_options
 @click.option(
-    "--direction",
-    default="from-hub",
-    type=click.Choice(["from-hub", "to-hub"]),
-    help="Sync direction",
+    "--projects",
+    help="Sync every project matching this glob, or listed in this file",
 )
-@click.option("--force", is_flag=True, help="Skip confirmation prompt")
-def windsurf(direction, force):
-    """Sync with Windsurf MCP server settings."""
+@click.option(
+    "--jobs",
+    type=int,
+    help="Worker processes for --projects (default: one per CPU)",
+)
+def sync_all(tools, force, on_conflict, include, exclude, tags, projects, jobs):
+    """Sync MCP Config Hub settings to several tools.
+
+    All tools are planned in parallel and applied together; if any write
+    fails, every file is restored. With --projects, each project's own
+    tool files are synced, from its own project scope.
+    """
     try:
+        names = _parse_tools(tools)
+        if projects:
+            selector = ServerSelector(include, exclude, tags)
+            roots = _find_projects(projects)
+            _sync_projects(roots, names, force, on_conflict, selector, jobs)
+            return
         storage = StorageManager()
-        config_manager = ConfigManager(storage)
-        integration = get_integration("windsurf")
-
-        if direction == "from-hub":
-            hub_config = config_manager.list_all("merged")
-            if force:
-                integration.sync_from_hub(hub_config)
-                click.echo("Synced MCP Config Hub settings to Windsurf")
-            else:
-                success = integration.sync_from_hub_with_confirmation(
-                    hub_config, "Windsurf"
-                )
-                if success:
-                    click.echo("Synced MCP Config Hub settings to Windsurf")
-                else:
-                    click.echo("Sync cancelled by user")
-        else:
-            hub_config = integration.sync_to_hub()
-            for key, value in hub_config.get("mcpServers", {}).items():
-                config_manager.set(f"mcpServers.{key}", value, "user")
-            click.echo("Synced Windsurf settings to MCP Config Hub")
+        selector = ServerSelector(include, exclude, tags)
+        plan, failures, hub_version = _plan_sync(storage, names, on_conflict, selector)
+        if _apply_plan(storage, plan, force, hub_version):
+            _echo_results(names, plan, failures)
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
 
 
-@sync.command()
+@sync.command("plan")
+@click.option("--tools", help="Comma-separated tools to plan (default: all)")
+@_ON_CONFLICT_OPTION
 @click.option(
-    "--direction",
-    default="from-hub",
-    type=click.Choice(["from-hub", "to-hub"]),
-    help="Sync direction",
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    help="Save the plan to a file for sync apply",
 )
+@_selector_options
+def sync_plan(tools, on_conflict, output, include, exclude, tags):
+    """Show the changes syncing MCP Config Hub settings would make."""
+    try:
+        names = _parse_tools(tools)
+        selector = ServerSelector(include, exclude, tags)
+        plan, failures, _ = _plan_sync(StorageManager(), names, on_conflict, selector)
+        if plan.is_empty():
+            click.echo("No changes needed.")
+        _echo_plan(plan)
+        for tool, error in failures.items():
+            click.echo(f"{TOOL_LABELS[tool]}: failed: {error}", err=True)
+        if output:
+            plan.save(Path(output))
+            click.echo(f"\nSaved plan to {output}")
+        if failures:
+            sys.exit(1)
+
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+@sync.command("apply")
+@click.argument("plan_file", required=False, type=click.Path(exists=True))
+@click.option("--tools", help="Comma-separated tools to sync (default: all)")
 @click.option("--force", is_flag=True, help="Skip confirmation prompt")
-def gemini(direction, force):
-    """Sync with Gemini CLI MCP server settings."""
+@_ON_CONFLICT_OPTION
+@_selector_options
+def sync_apply(plan_file, tools, force, on_conflict, include, exclude, tags):
+    """Apply a saved sync plan, or plan and apply in one go.
+
+    A saved plan is applied as is, without recomputing it from the hub.
+    """
     try:
         storage = StorageManager()
-        config_manager = ConfigManager(storage)
-        integration = get_integration("gemini")
-
-        if direction == "from-hub":
-            hub_config = config_manager.list_all("merged")
-            if force:
-                integration.sync_from_hub(hub_config)
-                click.echo("Synced MCP Config Hub settings to Gemini CLI")
-            else:
-                success = integration.sync_from_hub_with_confirmation(
-                    hub_config, "Gemini CLI"
-                )
-                if success:
-                    click.echo("Synced MCP Config Hub settings to Gemini CLI")
-                else:
-                    click.echo("Sync cancelled by user")
+        if plan_file:
+            plan, failures, hub_version = SyncPlan.load(Path(plan_file)), {}, None
+            names = [*plan.tools]
         else:
-            hub_config = integration.sync_to_hub()
-            for key, value in hub_config.get("mcpServers", {}).items():
-                config_manager.set(f"mcpServers.{key}", value, "user")
-            click.echo("Synced Gemini CLI settings to MCP Config Hub")
+            names = _parse_tools(tools)
+            selector = ServerSelector(include, exclude, tags)
+            plan, failures, hub_version = _plan_sync(
+                storage, names, on_conflict, selector
+            )
+        if _apply_plan(storage, plan, force, hub_version):
+            _echo_results(names, plan, failures)
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
 
 
-@sync.command()
+def _import_tools(storage, names, on_conflict):
+    """Import the tool-side changes of several tools into the hub.
+
+    Each tool is imported with one write, and a line is printed for each
+    tool that changed the hub or failed.
+    """
+    config_manager = ConfigManager(storage)
+    base_store = SyncBaseStore(storage.get_state_dir())
+    ledger = SyncLedger(storage.get_state_dir())
+    for tool in names:
+        try:
+            count = _import_to_hub(
+                config_manager,
+                get_integration(tool),
+                tool,
+                on_conflict,
+                base_store,
+                ledger,
+                include_prompt=tool == "claude_code",
+            )
+        except Exception as e:
+            click.echo(f"{TOOL_LABELS[tool]:<16} failed: {e}")
+            continue
+        if count:
+            click.echo(f"{TOOL_LABELS[tool]:<16} imported ({count} changes)")
+
+
+def _sync_tools(storage, names, on_conflict):
+    """Sync the hub to several tools without confirmation, printing the results."""
+    plan, failures, hub_version = _plan_sync(storage, names, on_conflict)
+    _apply_plan(storage, plan, True, hub_version)
+    for tool in names:
+        click.echo(_result_line(tool, plan, failures))
+
+
+def _watch(storage, names, direction, on_conflict, watcher, debounce, stop=None):
+    """Keep the hub and tools in sync as either side changes, until stop returns True.
+
+    Each settled burst of changes is handled once. Tool-side edits are
+    imported first, except those made by a sync from the hub, so the two
+    directions do not feed each other. Hub changes are then synced only to
+    the tools whose hub keys changed.
+    """
+    config_manager = ConfigManager(storage)
+    ledger = SyncLedger(storage.get_state_dir())
+    integrations = get_all_integrations()
+    sync_paths = {tool: integrations[tool].get_sync_paths() for tool in names}
+    from_hub = direction in ("from-hub", "both")
+    to_hub = direction in ("to-hub", "both")
+
+    def get_version():
+        hub_version = storage.scope_fingerprints() if from_hub else None
+        tool_versions = {
+            tool: [file_state(path) for path in sync_paths[tool]]
+            for tool in (names if to_hub else [])
+        }
+        return hub_version, tool_versions
+
+    last = get_version()
+    fingerprints = Fingerprinter().fingerprints(config_manager.list_all("merged"))
+    for version in watch_changes(watcher, get_version, debounce=debounce, stop=stop):
+        try:
+            edited = []
+            for tool in names if to_hub else []:
+                if version[1][tool] == last[1][tool]:
+                    continue
+                config_path = integrations[tool].get_config_path()
+                # Files as a sync from the hub left them are that sync's echo.
+                if not ledger.files_unchanged(
+                    tool, "from-hub", config_path, sync_paths[tool]
+                ):
+                    edited.append(tool)
+            last = version
+            _import_tools(storage, edited, on_conflict)
+            if not from_hub:
+                continue
+
+            new_fingerprints = Fingerprinter().fingerprints(
+                config_manager.list_all("merged")
+            )
+            changed = {*changed_paths(fingerprints, new_fingerprints)}
+            fingerprints = new_fingerprints
+            affected = [
+                tool for tool in names if changed & {*integrations[tool].hub_keys}
+            ]
+            if affected:
+                _sync_tools(storage, affected, on_conflict)
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+
+
+@cli.command()
+@click.option("--tools", help="Comma-separated tools to keep in sync (default: all)")
 @click.option(
     "--direction",
     default="from-hub",
-    type=click.Choice(["from-hub", "to-hub"]),
-    help="Sync direction",
+    type=click.Choice(["from-hub", "to-hub", "both"]),
+    help="Which side's changes to sync",
 )
-@click.option("--force", is_flag=True, help="Skip confirmation prompt")
-def claude_code(direction, force):
-    """Sync with Claude Code CLI settings."""
+@click.option(
+    "--debounce",
+    default=0.5,
+    type=float,
+    show_default=True,
+    help="Seconds without further changes before syncing",
+)
+@click.option("--poll", is_flag=True, help="Poll for changes instead of inotify")
+@click.option(
+    "--poll-interval",
+    default=1.0,
+    type=float,
+    show_default=True,
+    help="Seconds between polls",
+)
+@_ON_CONFLICT_OPTION
+def watch(tools, direction, debounce, poll, poll_interval, on_conflict):
+    """Watch the hub and tool configurations and sync changes."""
     try:
+        names = _parse_tools(tools)
         storage = StorageManager()
-        config_manager = ConfigManager(storage)
-        integration = get_integration("claude_code")
+        paths = []
+        if direction != "from-hub":
+            _import_tools(storage, names, on_conflict)
+            integrations = get_all_integrations()
+            for tool in names:
+                paths.extend(integrations[tool].get_sync_paths())
+        if direction != "to-hub":
+            _sync_tools(storage, names, on_conflict)
+            paths.extend(storage.get_watch_paths())
 
-        if direction == "from-hub":
-            hub_config = config_manager.list_all("merged")
-            if force:
-                integration.sync_from_hub(hub_config)
-                click.echo("Synced MCP Config Hub settings to Claude Code CLI")
-            else:
-                success = integration.sync_from_hub_with_confirmation(
-                    hub_config, "Claude Code CLI"
-                )
-                if success:
-                    click.echo("Synced MCP Config Hub settings to Claude Code CLI")
-                else:
-                    click.echo("Sync cancelled by user")
-        else:
-            hub_config = integration.sync_to_hub()
-            for key, value in hub_config.get("mcpServers", {}).items():
-                config_manager.set(f"mcpServers.{key}", value, "user")
-            if "default_prompt" in hub_config:
-                config_manager.set(
-                    "default_prompt", hub_config["default_prompt"], "user"
-                )
-            click.echo("Synced Claude Code CLI settings to MCP Config Hub")
+        watcher = create_watcher(paths, poll_interval, poll)
+        click.echo("Watching for changes (Ctrl+C to stop)")
+        try:
+            _watch(storage, names, direction, on_conflict, watcher, debounce)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
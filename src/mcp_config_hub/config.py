@@ -1,5 +1,115 @@
 import json
-from typing import Any, Dict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .flat_index import FlatIndex
+from .overlay import OverlayView
+from .tree_utils import (
+    MISSING,
+    Operation,
+    apply_operation,
+    deep_merge,
+    delete_nested,
+    get_nested,
+    merge_nested,
+    set_nested,
+)
+
+
+def _check_key(key: str) -> None:
+    """Raise ValueError for the empty key, which names no value."""
+    if not key:
+        raise ValueError("Key must not be empty")
+
+
+def _parse_value(value: Any) -> Any:
+    """Parse JSON strings given on the command line, leaving other values as is."""
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return value
+
+
+class ConfigTransaction:
+    """Collects set/delete/merge operations on one scope.
+
+    The scope is read at most once and saved once on commit, however many
+    operations were applied in between. With a storage that commits
+    operations itself, the scope is only loaded if the transaction needs its
+    contents. If the scope file changed since the transaction began, the
+    operations are replayed onto the new contents (on_conflict="retry") or
+    ConcurrentModificationError is raised (on_conflict="fail").
+    """
+
+    def __init__(self, storage_manager, scope: str, on_conflict: str = "retry"):
+        self.storage = storage_manager
+        self.scope = scope
+        self.on_conflict = on_conflict
+        self.operations: List[Operation] = []
+        self._config = None
+        if hasattr(self.storage, "commit_operations"):
+            self.etag = self.storage.get_etag(scope)
+        else:
+            self._config = self.storage.load_config(scope)
+            self.etag = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The scope with this transaction's operations applied."""
+        if self._config is None:
+            self._config = self.storage.load_config(self.scope)
+            for operation in self.operations:
+                apply_operation(self._config, operation)
+        return self._config
+
+    def set(self, key: str, value: Any) -> None:
+        """Set configuration value by key with dot notation."""
+        _check_key(key)
+        parsed_value = _parse_value(value)
+        if self._config is not None:
+            set_nested(self._config, key, parsed_value)
+        self.operations.append(("set", key, parsed_value))
+
+    def delete(self, key: str) -> bool:
+        """Delete configuration value by key. Returns True if deleted."""
+        _check_key(key)
+        if self._config is None and not self.operations:
+            if self.storage.get_value(self.scope, key, MISSING) is MISSING:
+                return False
+        elif not delete_nested(self.config, key):
+            return False
+        self.operations.append(("delete", key, None))
+        return True
+
+    def merge(self, key: str, value: Any) -> None:
+        """Deep merge a dict into the value at key (the root when key is empty)."""
+        parsed_value = _parse_value(value)
+        if not isinstance(parsed_value, dict):
+            raise ValueError(f"Cannot merge non-object value into '{key}'")
+        if self._config is not None:
+            merge_nested(self._config, key, parsed_value)
+        self.operations.append(("merge", key, parsed_value))
+
+    def commit(self) -> bool:
+        """Save the scope if any operation changed it.
+
+        Returns True if exactly the recorded operations were applied to the
+        scope version the transaction started from.
+        """
+        if not self.operations:
+            return False
+        clean = False
+        if hasattr(self.storage, "commit_operations"):
+            clean = self.storage.commit_operations(
+                self.scope,
+                self.operations,
+                self.etag,
+                on_conflict=self.on_conflict,
+            )
+        else:
+            self.storage.save_config(self.config, self.scope)
+        self.operations = []
+        return clean
 
 
 class ConfigManager:
@@ -7,11 +117,28 @@ class ConfigManager:
 
     def __init__(self, storage_manager):
         self.storage = storage_manager
+        self._indexes: Dict[str, Tuple[Any, FlatIndex]] = {}
 
     def get(self, key: str, scope: str = "merged") -> Any:
-        """Get configuration value by key with dot notation."""
+        """Get configuration value by key with dot notation.
+
+        Merged gets are served from the merged snapshot if it is current.
+        Otherwise only the values needed to resolve the key are read, and
+        the snapshot is saved only if that took loading every scope anyway.
+        """
+        _check_key(key)
         if scope == "merged":
-            config = self._get_merged_config()
+            snapshot, fingerprints = self._load_merged_snapshot()
+            if snapshot is not None:
+                return self._get_nested_value(snapshot, key)
+
+            view = self.merged_view()
+            value = view.lookup(key)
+            if view.all_loaded():
+                self._save_merged_snapshot(view.to_dict(), fingerprints)
+            return None if value is MISSING else value
+        elif hasattr(self.storage, "get_value"):
+            return self.storage.get_value(scope, key)
         else:
             config = self.storage.load_config(scope)
 
@@ -19,24 +146,31 @@ class ConfigManager:
 
     def set(self, key: str, value: Any, scope: str = "user") -> None:
         """Set configuration value by key with dot notation."""
-        config = self.storage.load_config(scope)
-        self._set_nested_value(config, key, value)
-        self.storage.save_config(config, scope)
+        with self.transaction(scope) as tx:
+            tx.set(key, value)
 
     def delete(self, key: str, scope: str = "user") -> bool:
         """Delete configuration value by key with dot notation. Returns True if deleted, False if not found."""
-        config = self.storage.load_config(scope)
-        keys = key.split(".")
-        current = config
-        for k in keys[:-1]:
-            if k not in current or not isinstance(current[k], dict):
-                return False
-            current = current[k]
-        if keys[-1] in current:
-            del current[keys[-1]]
-            self.storage.save_config(config, scope)
-            return True
-        return False
+        with self.transaction(scope) as tx:
+            return tx.delete(key)
+
+    @contextmanager
+    def transaction(
+        self, scope: str = "user", on_conflict: str = "retry"
+    ) -> Iterator[ConfigTransaction]:
+        """Batch several operations on a scope into one load and one save.
+
+        The changes are committed when the block exits normally and discarded
+        if it raises.
+        """
+        tx = ConfigTransaction(self.storage, scope, on_conflict)
+        yield tx
+        operations = tx.operations
+        if tx.commit():
+            self._update_index(scope, tx.etag, operations)
+        elif operations:
+            self._indexes.pop(scope, None)
+            self._indexes.pop("merged", None)
 
     def list_all(self, scope: str = "merged") -> Dict[str, Any]:
         """List all configuration values."""
@@ -45,58 +179,108 @@ class ConfigManager:
         else:
             return self.storage.load_config(scope)
 
+    def index(self, scope: str = "merged") -> FlatIndex:
+        """Get a flattened index of a scope, rebuilt only when the scope changes."""
+        version = self._scope_version(scope)
+        cached = self._indexes.get(scope)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
+        index = FlatIndex(self.list_all(scope))
+        self._indexes[scope] = (version, index)
+        return index
+
+    def query(self, pattern: str, scope: str = "merged") -> Dict[str, Any]:
+        """Get all values matching a dot notation pattern with wildcards."""
+        return self.index(scope).query(pattern)
+
+    def _scope_version(self, scope: str) -> Any:
+        """Get the storage's version of a scope, or None if it has none."""
+        if scope == "merged":
+            if hasattr(self.storage, "scope_fingerprints"):
+                return self.storage.scope_fingerprints()
+        elif hasattr(self.storage, "get_etag"):
+            return self.storage.get_etag(scope)
+        return None
+
+    def _update_index(self, scope: str, etag: Any, operations: List[Operation]) -> None:
+        """Apply cleanly committed operations to the cached index of a scope.
+
+        The index is dropped instead if it was built from another version.
+        """
+        self._indexes.pop("merged", None)
+        cached = self._indexes.pop(scope, None)
+        if cached is None or cached[0] != etag:
+            return
+        for operation in operations:
+            cached[1].apply(operation)
+        self._indexes[scope] = (self._scope_version(scope), cached[1])
+
+    def merged_view(self) -> OverlayView:
+        """Get a lazy merged view of all scopes (project > user > global).
+
+        Scope files are only read when a lookup reaches them, and lookups
+        read single values through the storage's find_value if it has one.
+        """
+        scopes = ("project", "user", "global")
+        getters = None
+        if hasattr(self.storage, "find_value"):
+            getters = [self._scope_getter(scope) for scope in scopes]
+        return OverlayView([self._scope_loader(scope) for scope in scopes], getters)
+
+    def _scope_loader(self, scope: str) -> Callable[[], Dict[str, Any]]:
+        """Get a function that loads a whole scope."""
+
+        def load() -> Dict[str, Any]:
+            return self.storage.load_config(scope)
+
+        return load
+
+    def _scope_getter(self, scope: str) -> Callable[[List[str]], Any]:
+        """Get a function that reads the value at a key path of a scope."""
+
+        def get(keys: List[str]) -> Any:
+            return self.storage.find_value(scope, ".".join(keys))
+
+        return get
+
     def _get_merged_config(self) -> Dict[str, Any]:
-        """Get merged configuration with proper precedence."""
-        global_config = self.storage.load_config("global")
-        user_config = self.storage.load_config("user")
-        project_config = self.storage.load_config("project")
+        """Get merged configuration with proper precedence.
 
-        merged: dict[str, Any] = {}
-        self._deep_merge(merged, global_config)
-        self._deep_merge(merged, user_config)
-        self._deep_merge(merged, project_config)
+        When the storage supports it, the merged tree is served from an on-disk
+        snapshot keyed on the fingerprints of all scope files.
+        """
+        snapshot, fingerprints = self._load_merged_snapshot()
+        if snapshot is not None:
+            return snapshot
 
+        merged = self.merged_view().to_dict()
+        self._save_merged_snapshot(merged, fingerprints)
         return merged
 
+    def _load_merged_snapshot(self) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """Load the merged snapshot if the storage keeps one and it is current.
+
+        Also returns the scope fingerprints it was checked against.
+        """
+        if not hasattr(self.storage, "load_merged_snapshot"):
+            return None, None
+        fingerprints = self.storage.scope_fingerprints()
+        return self.storage.load_merged_snapshot(fingerprints), fingerprints
+
+    def _save_merged_snapshot(self, merged: Dict[str, Any], fingerprints: Any) -> None:
+        """Save the merged snapshot for the given scope fingerprints."""
+        if fingerprints is not None:
+            self.storage.save_merged_snapshot(merged, fingerprints)
+
     def _deep_merge(self, target: Dict[str, Any], source: Dict[str, Any]) -> None:
         """Deep merge source into target dictionary."""
-        for key, value in source.items():
-            if (
-                key in target
-                and isinstance(target[key], dict)
-                and isinstance(value, dict)
-            ):
-                self._deep_merge(target[key], value)
-            else:
-                target[key] = value
+        deep_merge(target, source)
 
     def _get_nested_value(self, config: Dict[str, Any], key: str) -> Any:
         """Get nested value using dot notation."""
-        keys = key.split(".")
-        current = config
-
-        for k in keys:
-            if not isinstance(current, dict) or k not in current:
-                return None
-            current = current[k]
-
-        return current
+        return get_nested(config, key)
 
     def _set_nested_value(self, config: Dict[str, Any], key: str, value: Any) -> None:
         """Set nested value using dot notation."""
-        keys = key.split(".")
-        current = config
-
-        for k in keys[:-1]:
-            if k not in current:
-                current[k] = {}
-            elif not isinstance(current[k], dict):
-                current[k] = {}
-            current = current[k]
-
-        try:
-            parsed_value = json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            parsed_value = value
-
-        current[keys[-1]] = parsed_value
+        set_nested(config, key, _parse_value(value))
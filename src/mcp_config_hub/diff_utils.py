@@ -1,34 +1,340 @@
-import difflib
+import copy
 import json
-from typing import Any, Optional
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .fingerprints import Fingerprinter
+from .tree_utils import MISSING
+
+
+class Change(NamedTuple):
+    """A single difference between two config trees.
+
+    op is "add", "remove" or "replace"; old is None for additions and new is
+    None for removals.
+    """
+
+    op: str
+    path: Tuple[str, ...]
+    old: Any = None
+    new: Any = None
+
+
+def diff_trees(
+    old: Any,
+    new: Any,
+    path: Tuple[str, ...] = (),
+    fingerprinter: Optional[Fingerprinter] = None,
+) -> Iterator[Change]:
+    """Yield the changes turning old into new, in one pass over both trees.
+
+    Dicts are compared key by key; any other values, lists included, are
+    compared as a whole and reported as a single replacement. With a
+    fingerprinter, subtrees with equal digests are skipped without descending.
+    """
+    if fingerprinter is not None and isinstance(old, (dict, list)):
+        if fingerprinter.digest(old) == fingerprinter.digest(new):
+            return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, old_value in old.items():
+            if key not in new:
+                yield Change("remove", path + (key,), old_value, None)
+            else:
+                yield from diff_trees(old_value, new[key], path + (key,), fingerprinter)
+        for key, new_value in new.items():
+            if key not in old:
+                yield Change("add", path + (key,), None, new_value)
+    elif old != new or type(old) is not type(new):
+        yield Change("replace", path, old, new)
+
+
+def _render_value(key: str, value: Any, indent: str) -> List[str]:
+    rendered = json.dumps(value, indent=2, sort_keys=True, ensure_ascii=False)
+    lines = f"{json.dumps(key, ensure_ascii=False)}: {rendered}".splitlines()
+    return [indent + line for line in lines]
+
+
+def _render_root(value: Any) -> List[str]:
+    return json.dumps(value, indent=2, sort_keys=True, ensure_ascii=False).splitlines()
+
+
+def iter_unified(changes: Iterable[Change], tool_name: str) -> Iterator[str]:
+    """Yield the lines of a unified-diff style rendering of changes.
+
+    Lines are produced one change at a time, so the whole text is never held
+    in memory. Changes are grouped by parent path.
+    """
+    yield f"--- {tool_name} (current)"
+    yield f"+++ {tool_name} (new)"
+    parent: Optional[Tuple[str, ...]] = None
+
+    for change in sorted(changes, key=lambda c: c.path):
+        if not change.path:
+            yield from ("-" + line for line in _render_root(change.old))
+            yield from ("+" + line for line in _render_root(change.new))
+            continue
+        if change.path[:-1] != parent:
+            parent = change.path[:-1]
+            yield f"@@ {'.'.join(parent) or '(root)'} @@"
+
+        indent = "  " * len(change.path)
+        if change.op != "add":
+            for line in _render_value(change.path[-1], change.old, indent):
+                yield "-" + line
+        if change.op != "remove":
+            for line in _render_value(change.path[-1], change.new, indent):
+                yield "+" + line
+
+
+def render_unified(changes: Iterable[Change], tool_name: str) -> str:
+    """Render changes as unified-diff style text, grouped by parent path."""
+    return "\n".join(iter_unified(changes, tool_name))
+
+
+# Top-level keys whose entries are summarised one server at a time.
+SERVER_KEYS = ("mcpServers", "servers")
+
+
+def summarize_changes(changes: Iterable[Change]) -> Dict[str, Dict[str, str]]:
+    """Summarise changes per server.
+
+    Returns, for each top-level key, a dict from server name (or the key
+    itself outside SERVER_KEYS) to "added", "removed" or "changed".
+    """
+    summary: Dict[str, Dict[str, str]] = {}
+    for change in changes:
+        if not change.path:
+            section, name, whole = "(root)", "(root)", True
+        elif change.path[0] in SERVER_KEYS and len(change.path) > 1:
+            section, name = change.path[0], change.path[1]
+            whole = len(change.path) == 2
+        else:
+            section, name = change.path[0], change.path[0]
+            whole = len(change.path) == 1
+
+        status = change.op if whole and change.op != "replace" else "changed"
+        status = {"add": "added", "remove": "removed"}.get(status, status)
+        servers = summary.setdefault(section, {})
+        servers[name] = status if name not in servers else "changed"
+    return summary
+
+
+def iter_summary(summary: Dict[str, Dict[str, str]]) -> Iterator[str]:
+    """Yield the lines of a per-server change summary."""
+    markers = {"added": "+", "removed": "-", "changed": "~"}
+    for section, servers in sorted(summary.items()):
+        counts = {status: 0 for status in markers}
+        for status in servers.values():
+            counts[status] += 1
+        yield f"{section}: " + ", ".join(
+            f"{count} {status}" for status, count in counts.items() if count
+        )
+        for name, status in sorted(servers.items()):
+            if name != section:
+                yield f"  {markers[status]} {name}"
 
 
 def generate_config_diff(
     current_config: dict[str, Any], new_config: dict[str, Any], tool_name: str
 ) -> Optional[str]:
     """Generate a readable diff between current and new configurations."""
-    current_json = json.dumps(current_config, indent=2, sort_keys=True)
-    new_json = json.dumps(new_config, indent=2, sort_keys=True)
-
-    if current_json == new_json:
+    changes = list(diff_trees(current_config, new_config))
+    if not changes:
         return None
+    return render_unified(changes, tool_name)
+
+
+def has_changes(
+    current_config: dict[str, Any],
+    new_config: dict[str, Any],
+    fingerprinter: Optional[Fingerprinter] = None,
+) -> bool:
+    """Check if there are any changes between configurations.
+
+    Compares canonical digests; pass a fingerprinter to reuse its memoised
+    digests in a later diff_trees call.
+    """
+    fingerprinter = fingerprinter or Fingerprinter()
+    return fingerprinter.digest(current_config) != fingerprinter.digest(new_config)
+
+
+def _escape_pointer_token(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def to_pointer(path: Tuple[str, ...]) -> str:
+    """Convert a key path to an RFC 6901 JSON Pointer."""
+    return "".join("/" + _escape_pointer_token(str(k)) for k in path)
+
+
+def from_pointer(pointer: str) -> List[str]:
+    """Convert an RFC 6901 JSON Pointer to a key path."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON Pointer: {pointer!r}")
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")
+    ]
+
+
+def make_patch(
+    old: Any, new: Any, fingerprinter: Optional[Fingerprinter] = None
+) -> List[dict[str, Any]]:
+    """Build an RFC 6902 JSON Patch turning old into new."""
+    return changes_to_patch(diff_trees(old, new, fingerprinter=fingerprinter))
+
+
+def changes_to_patch(changes: Iterable[Change]) -> List[dict[str, Any]]:
+    """Convert structural changes to RFC 6902 JSON Patch operations."""
+    patch: List[dict[str, Any]] = []
+    for change in changes:
+        operation: dict[str, Any] = {"op": change.op, "path": to_pointer(change.path)}
+        if change.op != "remove":
+            operation["value"] = change.new
+        patch.append(operation)
+    return patch
+
+
+def _resolve_parent(document: Any, tokens: List[str], pointer: str) -> Any:
+    current = document
+    for token in tokens[:-1]:
+        if isinstance(current, dict) and token in current:
+            current = current[token]
+        elif (
+            isinstance(current, list) and token.isdigit() and int(token) < len(current)
+        ):
+            current = current[int(token)]
+        else:
+            raise ValueError(f"Path not found: {pointer}")
+    return current
+
+
+def _list_index(container: list, token: str, pointer: str, insert: bool) -> int:
+    if insert and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise ValueError(f"Invalid array index in {pointer}")
+    index = int(token)
+    if index > len(container) or (not insert and index == len(container)):
+        raise ValueError(f"Array index out of range in {pointer}")
+    return index
+
+
+def _get(document: Any, pointer: str) -> Any:
+    tokens = from_pointer(pointer)
+    if not tokens:
+        return document
+    parent = _resolve_parent(document, tokens, pointer)
+    if isinstance(parent, dict) and tokens[-1] in parent:
+        return parent[tokens[-1]]
+    if isinstance(parent, list):
+        return parent[_list_index(parent, tokens[-1], pointer, insert=False)]
+    raise ValueError(f"Path not found: {pointer}")
+
+
+def _add(document: Any, pointer: str, value: Any) -> Any:
+    tokens = from_pointer(pointer)
+    if not tokens:
+        return value
+    parent = _resolve_parent(document, tokens, pointer)
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, tokens[-1], pointer, insert=True), value)
+    else:
+        raise ValueError(f"Path not found: {pointer}")
+    return document
+
+
+def _remove(document: Any, pointer: str) -> Any:
+    tokens = from_pointer(pointer)
+    if not tokens:
+        raise ValueError("Cannot remove the document root")
+    parent = _resolve_parent(document, tokens, pointer)
+    if isinstance(parent, dict) and tokens[-1] in parent:
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_list_index(parent, tokens[-1], pointer, insert=False))
+    raise ValueError(f"Path not found: {pointer}")
+
+
+def apply_patch(document: Any, patch: List[dict[str, Any]]) -> Any:
+    """Apply an RFC 6902 JSON Patch to document in place.
+
+    Returns the patched document, which is a new object only if the patch
+    replaces the root. Raises ValueError if an operation does not apply.
+    """
+    for operation in patch:
+        op = operation.get("op")
+        pointer = operation.get("path")
+        if not isinstance(pointer, str):
+            raise ValueError(f"Patch operation without a path: {operation}")
+
+        if op == "add":
+            document = _add(document, pointer, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, pointer)
+        elif op == "replace":
+            _get(document, pointer)
+            if from_pointer(pointer):
+                _remove(document, pointer)
+            document = _add(document, pointer, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            if pointer.startswith(operation["from"] + "/"):
+                raise ValueError(f"Cannot move {operation['from']} into itself")
+            value = _remove(document, operation["from"])
+            document = _add(document, pointer, value)
+        elif op == "copy":
+            value = copy.deepcopy(_get(document, operation["from"]))
+            document = _add(document, pointer, value)
+        elif op == "test":
+            if has_changes(_get(document, pointer), operation["value"]):
+                raise ValueError(f"Test failed at {pointer}")
+        else:
+            raise ValueError(f"Invalid patch operation: {op}")
+    return document
+
 
-    current_lines = current_json.splitlines(keepends=True)
-    new_lines = new_json.splitlines(keepends=True)
+def three_way_merge(
+    base: dict[str, Any], hub: dict[str, Any], tool: dict[str, Any]
+) -> Tuple[dict[str, Any], List[str]]:
+    """Merge the entries of two dicts that diverged from a common base.
 
-    diff = difflib.unified_diff(
-        current_lines,
-        new_lines,
-        fromfile=f"{tool_name} (current)",
-        tofile=f"{tool_name} (new)",
-        lineterm="",
-    )
+    An entry changed (or added, or removed) on one side only takes that
+    side's version. Returns the merged dict without the conflicting entries,
+    and the sorted keys of entries both sides changed differently.
+    """
+    fingerprinter = Fingerprinter()
 
-    return "".join(diff)
+    def digest(value: Any) -> Optional[str]:
+        return None if value is MISSING else fingerprinter.digest(value)
 
+    merged: dict[str, Any] = {}
+    conflicts: List[str] = []
+    for key in {**base, **hub, **tool}:
+        base_value = base.get(key, MISSING)
+        hub_value = hub.get(key, MISSING)
+        tool_value = tool.get(key, MISSING)
 
-def has_changes(current_config: dict[str, Any], new_config: dict[str, Any]) -> bool:
-    """Check if there are any changes between configurations."""
-    current_json = json.dumps(current_config, indent=2, sort_keys=True)
-    new_json = json.dumps(new_config, indent=2, sort_keys=True)
-    return current_json != new_json
+        if digest(hub_value) == digest(tool_value):
+            value = hub_value
+        elif digest(hub_value) == digest(base_value):
+            value = tool_value
+        elif digest(tool_value) == digest(base_value):
+            value = hub_value
+        else:
+            conflicts.append(key)
+            continue
+        if value is not MISSING:
+            merged[key] = value
+    return merged, sorted(conflicts)
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import stat
+import tempfile
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# Files are hashed and compared in chunks of this size, never read whole.
+CHUNK_SIZE = 1 << 16
+
+
+class WriteResult(NamedTuple):
+    """The outcome of writing or removing a file.
+
+    size is the number of bytes written (0 for removals); written is False
+    if the file already had the content, or did not exist to be removed.
+    """
+
+    path: Path
+    size: int
+    written: bool
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """Get the SHA-256 of a file, read in chunks; None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _same_content(path: Path, data: bytes) -> bool:
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        view = memoryview(data)
+        with open(path, "rb") as f:
+            for offset in range(0, len(data), CHUNK_SIZE):
+                if f.read(CHUNK_SIZE) != view[offset : offset + CHUNK_SIZE]:
+                    return False
+        return True
+    except OSError:
+        return False
+
+
+def file_mode(path: Path) -> int:
+    """Get the permissions a file replacing path should have.
+
+    This is the mode of the existing file, or the default mode of a new
+    file under the current umask. Temp files are created 0600, so this is
+    applied before they are renamed into place.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Persist a rename in directory; not supported on every platform."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_text(path: Path, text: str, fsync: bool = False) -> WriteResult:
+    """Replace a text file atomically, unless it already has this content.
+
+    The content goes to a temp file in the same directory that is renamed
+    over path, so readers never see a partly written file, and a file with
+    identical bytes is left untouched (its mtime included). If path is a
+    symlink, its target is replaced and the link is kept. With fsync, the
+    data and the rename are flushed to disk before returning.
+    """
+    data = text.encode("utf-8")
+    if _same_content(path, data):
+        return WriteResult(path, 0, False)
+
+    # Replace the target of a symlink rather than the link itself.
+    target = path.resolve()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    mode = file_mode(target)
+    fd, temp_name = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.name}.", suffix=".tmp"
+    )
+    temp_path = Path(temp_name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(temp_path, mode)
+        temp_path.replace(target)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    if fsync:
+        _fsync_dir(target.parent)
+    return WriteResult(path, len(data), True)
+
+
+def remove_file(path: Path) -> WriteResult:
+    """Remove a file if it exists."""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return WriteResult(path, 0, False)
+    return WriteResult(path, 0, True)
@@ -0,0 +1,76 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class Fingerprinter:
+    """Computes canonical content digests of config trees.
+
+    A dict or list digest is a hash of its children's digests, so equal
+    content always gives the same digest regardless of key order. Digests of
+    containers are memoised per object, which makes repeated comparisons of
+    the same (unmodified) trees cheap; do not mutate a tree while its
+    Fingerprinter is in use.
+    """
+
+    def __init__(self):
+        # id -> (object, digest); holding the object keeps its id from being reused.
+        self._memo: Dict[int, Tuple[Any, str]] = {}
+
+    def digest(self, value: Any) -> str:
+        """Get the hex digest of a JSON value."""
+        if not isinstance(value, (dict, list)):
+            return self._hash(
+                b"s" + json.dumps(value, ensure_ascii=False).encode("utf-8")
+            )
+
+        entry = self._memo.get(id(value))
+        if entry is not None and entry[0] is value:
+            return entry[1]
+
+        if isinstance(value, dict):
+            parts = [b"d"]
+            for key in sorted(value):
+                encoded = key.encode("utf-8")
+                parts.append(len(encoded).to_bytes(4, "big") + encoded)
+                parts.append(self.digest(value[key]).encode("ascii"))
+        else:
+            parts = [b"l"] + [self.digest(item).encode("ascii") for item in value]
+
+        digest = self._hash(b"".join(parts))
+        self._memo[id(value)] = (value, digest)
+        return digest
+
+    def fingerprints(self, value: Any, depth: int = 1) -> Dict[str, str]:
+        """Get the digests of value and of its dict subtrees down to depth.
+
+        Keys are dot notation paths, with "" for value itself. The result can
+        be stored and later compared against a new tree with changed_paths.
+        """
+        result = {"": self.digest(value)}
+        if depth > 0 and isinstance(value, dict):
+            for key, child in value.items():
+                for path, digest in self.fingerprints(child, depth - 1).items():
+                    result[f"{key}.{path}" if path else key] = digest
+        return result
+
+    def _hash(self, data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint(value: Any) -> str:
+    """Get the canonical digest of a JSON value."""
+    return Fingerprinter().digest(value)
+
+
+def changed_paths(old: Dict[str, str], new: Dict[str, str]) -> List[str]:
+    """Compare two results of Fingerprinter.fingerprints.
+
+    Returns the paths added, removed or changed between them, shallowest
+    first. A path whose digest is unchanged hides nothing below it.
+    """
+    paths = set(old) | set(new)
+    return sorted(
+        (path for path in paths if old.get(path) != new.get(path)),
+        key=lambda path: (path.count(".") if path else -1, path),
+    )
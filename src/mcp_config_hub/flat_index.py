@@ -0,0 +1,130 @@
+from bisect import bisect_left, insort
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .tree_utils import MISSING, Operation, deep_merge, split_key
+
+Path = Tuple[str, ...]
+
+_WILDCARD_CHARS = set("*?[")
+
+
+def _flatten(value: Any, prefix: Path, leaves: Dict[Path, Any]) -> None:
+    """Collect the leaves of value; empty dicts are leaves too."""
+    if isinstance(value, dict) and value:
+        for k, v in value.items():
+            _flatten(v, prefix + (k,), leaves)
+    else:
+        leaves[prefix] = value
+
+
+class FlatIndex:
+    """Flattened index of a config tree, mapping path tuples to leaf values.
+
+    Paths are kept sorted, so every node's subtree is a contiguous range that
+    is found by bisection. Exact leaf lookups are a single dict access.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.leaves: Dict[Path, Any] = {}
+        self.paths: List[Path] = []
+        self._add((), config)
+
+    def _range(self, prefix: Path) -> Iterator[Path]:
+        """Iterate the sorted leaf paths at and below prefix."""
+        n = len(prefix)
+        for i in range(bisect_left(self.paths, prefix), len(self.paths)):
+            path = self.paths[i]
+            if path[:n] != prefix:
+                break
+            yield path
+
+    def scan(self, prefix: Path = ()) -> Iterator[Tuple[Path, Any]]:
+        """Iterate (path, leaf) pairs at and below prefix in path order."""
+        for path in self._range(prefix):
+            yield path, self.leaves[path]
+
+    def get(self, path: Path) -> Any:
+        """Get the value at path, rebuilding the subtree if it is a node."""
+        if path in self.leaves:
+            return self.leaves[path]
+
+        tree: Dict[str, Any] = {}
+        n = len(path)
+        for leaf_path, value in self.scan(path):
+            current = tree
+            for k in leaf_path[n:-1]:
+                current = current.setdefault(k, {})
+            current[leaf_path[-1]] = value
+        return tree if tree or not path else MISSING
+
+    def query(self, pattern: str) -> Dict[str, Any]:
+        """Get all values matching a dot notation pattern.
+
+        Components may use shell-style wildcards, e.g. "mcpServers.*.command".
+        Returns a dict from the dot notation key of each match to its value.
+        """
+        keys = split_key(pattern)
+        literal = 0
+        while literal < len(keys) and not _WILDCARD_CHARS & set(keys[literal]):
+            literal += 1
+        prefix = tuple(keys[:literal])
+        if literal == len(keys):
+            value = self.get(prefix)
+            return {} if value is MISSING else {pattern: value}
+
+        matches: Dict[Path, None] = {}
+        for path in self._range(prefix):
+            if len(path) >= len(keys) and all(
+                fnmatchcase(path[i], keys[i]) for i in range(literal, len(keys))
+            ):
+                matches[path[: len(keys)]] = None
+        return {".".join(path): self.get(path) for path in matches}
+
+    def _remove(self, path: Path) -> None:
+        """Remove the node at path and its subtree."""
+        start = bisect_left(self.paths, path)
+        end = start
+        n = len(path)
+        while end < len(self.paths) and self.paths[end][:n] == path:
+            del self.leaves[self.paths[end]]
+            end += 1
+        del self.paths[start:end]
+
+    def _add(self, path: Path, value: Any) -> None:
+        """Add value at path, replacing any leaf ancestor with a node."""
+        for i in range(1, len(path)):
+            if path[:i] in self.leaves:
+                self._remove(path[:i])
+        self._remove(path)
+        leaves: Dict[Path, Any] = {}
+        _flatten(value, path, leaves)
+        # An empty root is not a leaf; the index is simply empty.
+        leaves.pop((), None)
+        self.leaves.update(leaves)
+        if len(leaves) == 1:
+            insort(self.paths, next(iter(leaves)))
+        else:
+            self.paths.extend(leaves)
+            self.paths.sort()
+
+    def apply(self, operation: Operation) -> None:
+        """Keep the index in step with an operation applied to its config."""
+        op, key, value = operation
+        path = tuple(split_key(key))
+        if op == "set":
+            self._add(path, value)
+        elif op == "delete":
+            if not path or self.get(path) is MISSING:
+                return
+            self._remove(path)
+            if len(path) > 1 and not any(True for _ in self._range(path[:-1])):
+                # Keep the now empty parent object, as the tree would.
+                self._add(path[:-1], {})
+        elif op == "merge":
+            current = self.get(path)
+            merged = current if isinstance(current, dict) else {}
+            deep_merge(merged, value)
+            self._add(path, merged)
+        else:
+            raise ValueError(f"Invalid operation: {op}")
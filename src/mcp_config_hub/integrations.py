@@ -1,44 +1,163 @@
+import copy
 import json
 import os
 import platform
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 import click
 
-from .diff_utils import generate_config_diff, has_changes
+from .diff_utils import (
+    Change,
+    apply_patch,
+    changes_to_patch,
+    diff_trees,
+    has_changes,
+    iter_summary,
+    iter_unified,
+    make_patch,
+    summarize_changes,
+)
+from .file_utils import WriteResult, remove_file, write_text
+from .fingerprints import Fingerprinter
+from .jsonc import JSONCDocument, load_text
+from .prompt_files import DigestCache, plan_prompt_artifacts
+from .server_selection import ROUTING_KEY
+
+
+def _read_json(path: Path) -> Any:
+    """Read a JSON or JSONC file; None if it is missing or invalid."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return load_text(f.read())
+    except IOError:
+        return None
 
 
 class BaseIntegration:
     """Base class for tool integrations."""
 
+    # Top-level hub keys a sync to this tool depends on.
+    hub_keys: Tuple[str, ...] = ("mcpServers", "default_prompt", ROUTING_KEY)
+    # The tool's default prompt file, relative to the project directory.
+    prompt_file: Optional[str] = None
+    # Whether the prompt file is removed when the hub has no default prompt.
+    remove_prompt_when_unset = False
+
+    def __init__(self, project_root: Optional[Path] = None):
+        self.system = platform.system()
+        # The project whose files are synced; the working directory if None.
+        self.project_root = project_root
+
+    def get_project_root(self) -> Path:
+        """Get the directory project-level tool files are resolved in."""
+        return self.project_root or Path.cwd()
+
     def get_config_path(self) -> Path:
         """Get the configuration file path for this tool."""
         raise NotImplementedError
 
+    def get_write_path(self) -> Path:
+        """Get the file write_config writes to."""
+        return self.get_config_path()
+
+    def get_prompt_path(self) -> Optional[Path]:
+        """Get the file holding the tool's default prompt, if it has one."""
+        if self.prompt_file is None:
+            return None
+        return self.get_project_root() / self.prompt_file
+
+    def read_prompt(self) -> Optional[str]:
+        """Read the tool's default prompt file; None if there is none."""
+        prompt_path = self.get_prompt_path()
+        if prompt_path is None:
+            return None
+        try:
+            with open(prompt_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except IOError:
+            return None
+
+    def get_sync_paths(self) -> List[Path]:
+        """Get every file a sync with this tool reads or writes."""
+        paths = [self.get_config_path(), self.get_write_path(), self.get_prompt_path()]
+        return [*dict.fromkeys(path for path in paths if path is not None)]
+
     def read_config(self) -> dict[str, Any]:
-        """Read configuration from the tool's config file."""
-        config_path = self.get_config_path()
-        if not config_path.exists():
-            return {}
+        """Read configuration from the tool's config file.
 
-        try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {}
+        Comments and trailing commas (JSONC) are accepted.
+        """
+        config = _read_json(self.get_config_path())
+        return config if isinstance(config, dict) else {}
+
+    def render_config(self, config: dict[str, Any]) -> str:
+        """Serialise configuration the way write_config stores it."""
+        return json.dumps(config, indent=2, ensure_ascii=False)
+
+    def render_patch(self, patch: List[Dict[str, Any]]) -> str:
+        """Get the content write_patch stores for a JSON Patch."""
+        return self.render_config(apply_patch(self.read_config(), patch))
 
-    def write_config(self, config: dict[str, Any]) -> None:
-        """Write configuration to the tool's config file."""
-        config_path = self.get_config_path()
-        config_path.parent.mkdir(parents=True, exist_ok=True)
+    def write_config(self, config: dict[str, Any]) -> WriteResult:
+        """Write configuration to the tool's config file.
 
-        with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        The file is replaced atomically, and left untouched if unchanged.
+        """
+        return write_text(self.get_write_path(), self.render_config(config))
+
+    def write_patch(self, patch: List[Dict[str, Any]]) -> Optional[WriteResult]:
+        """Apply a JSON Patch to the tool's current config and write it back.
+
+        The patch is applied to the config as it is on disk now, so edits the
+        tool made elsewhere in the file since it was read are kept. Nothing is
+        written for an empty patch.
+        """
+        if not patch:
+            return None
+        return write_text(self.get_write_path(), self.render_patch(patch))
+
+    def changes_from_hub(self, hub_config: dict[str, Any]) -> List[Change]:
+        """Get the changes a sync from MCP Config Hub would make to the tool config."""
+        current_config = self.read_config()
+        new_config = copy.deepcopy(current_config)
+        self._apply_hub_servers(new_config, hub_config)
+        return list(diff_trees(current_config, new_config))
+
+    def plan_from_hub(self, hub_config: dict[str, Any]) -> List[Dict[str, Any]]:
+        """Get the JSON Patch a sync from MCP Config Hub would apply."""
+        return changes_to_patch(self.changes_from_hub(hub_config))
+
+    def plan_prompt_files(
+        self, hub_config: dict[str, Any], digests: Optional[DigestCache] = None
+    ) -> Dict[Path, Optional[str]]:
+        """Get the prompt files a sync would change.
+
+        Maps each file that differs from the hub's default prompt to its new
+        content, or to None if it is to be removed. Files are compared by
+        size and then by digest, reusing the digests cached in digests.
+        """
+        prompt_path = self.get_prompt_path()
+        if prompt_path is None:
+            return {}
+        return plan_prompt_artifacts(
+            [(prompt_path, self.remove_prompt_when_unset)],
+            hub_config.get("default_prompt"),
+            digests,
+        )
+
+    def _write_prompt_files(
+        self, files: Dict[Path, Optional[str]]
+    ) -> List[WriteResult]:
+        return [
+            remove_file(path) if content is None else write_text(path, content)
+            for path, content in files.items()
+        ]
 
     def sync_from_hub(self, hub_config: dict[str, Any]) -> None:
         """Sync configuration from MCP Config Hub to this tool."""
-        raise NotImplementedError
+        self.write_patch(self.plan_from_hub(hub_config))
+        self._write_prompt_files(self.plan_prompt_files(hub_config))
 
     def sync_from_hub_with_confirmation(
         self, hub_config: dict[str, Any], tool_name: str
@@ -46,105 +165,64 @@ class BaseIntegration:
         """Sync configuration with diff display and user confirmation."""
         current_config = self.read_config()
 
-        new_config = current_config.copy()
-        self._apply_hub_config(new_config, hub_config)
-
-        if not has_changes(current_config, new_config):
-            # Check for prompt file changes if applicable
-            if tool_name == "VSCode" and "default_prompt" in hub_config:
-                copilot_instructions_path = (
-                    Path.cwd() / ".github" / "copilot-instructions.md"
-                )
-                if copilot_instructions_path.exists():
-                    with open(copilot_instructions_path, "r", encoding="utf-8") as f:
-                        if f.read() == hub_config["default_prompt"]:
-                            click.echo(
-                                f"No changes needed for {tool_name} configuration."
-                            )
-                            return True
-                else:
-                    click.echo(
-                        f"Changes needed for {tool_name} configuration (prompt file)."
-                    )
-                    return False
-            elif tool_name == "Cursor" and "default_prompt" in hub_config:
-                cursor_rules_path = (
-                    Path.cwd() / ".cursor" / "rules" / "default_prompt.txt"
-                )
-                if cursor_rules_path.exists():
-                    with open(cursor_rules_path, "r", encoding="utf-8") as f:
-                        if f.read() == hub_config["default_prompt"]:
-                            click.echo(
-                                f"No changes needed for {tool_name} configuration."
-                            )
-                            return True
-                else:
-                    click.echo(
-                        f"Changes needed for {tool_name} configuration (prompt file)."
-                    )
-                    return False
-            elif tool_name == "Windsurf" and "default_prompt" in hub_config:
-                windsurf_rules_path = Path.cwd() / ".windsurfrules"
-                if windsurf_rules_path.exists():
-                    with open(windsurf_rules_path, "r", encoding="utf-8") as f:
-                        if f.read() == hub_config["default_prompt"]:
-                            click.echo(
-                                f"No changes needed for {tool_name} configuration."
-                            )
-                            return True
-                else:
-                    click.echo(
-                        f"Changes needed for {tool_name} configuration (prompt file)."
-                    )
-                    return False
-            elif tool_name == "Gemini CLI" and "default_prompt" in hub_config:
-                gemini_md_path = Path.cwd() / "GEMINI.md"
-                if gemini_md_path.exists():
-                    with open(gemini_md_path, "r", encoding="utf-8") as f:
-                        if f.read() == hub_config["default_prompt"]:
-                            click.echo(
-                                f"No changes needed for {tool_name} configuration."
-                            )
-                            return True
-                else:
-                    click.echo(
-                        f"Changes needed for {tool_name} configuration (prompt file)."
-                    )
-                    return False
-            elif tool_name == "Claude Code" and "default_prompt" in hub_config:
-                claude_md_path = Path.cwd() / "CLAUDE.md"
-                if claude_md_path.exists():
-                    with open(claude_md_path, "r", encoding="utf-8") as f:
-                        if f.read() == hub_config["default_prompt"]:
-                            click.echo(
-                                f"No changes needed for {tool_name} configuration."
-                            )
-                            return True
-                else:
-                    click.echo(
-                        f"Changes needed for {tool_name} configuration (prompt file)."
-                    )
-                    return False
-            else:
+        new_config = copy.deepcopy(current_config)
+        self._apply_hub_servers(new_config, hub_config)
+        prompt_files = self.plan_prompt_files(hub_config)
+
+        fingerprinter = Fingerprinter()
+        if not has_changes(current_config, new_config, fingerprinter):
+            if not prompt_files:
                 click.echo(f"No changes needed for {tool_name} configuration.")
                 return True
+            changes: List[Change] = []
+        else:
+            changes = list(
+                diff_trees(current_config, new_config, fingerprinter=fingerprinter)
+            )
 
-        diff = generate_config_diff(current_config, new_config, tool_name)
-        if diff:
-            click.echo(f"\nProposed changes to {tool_name} configuration:")
-            click.echo(diff)
+        click.echo(f"\nProposed changes to {tool_name} configuration:")
+        for line in iter_summary(summarize_changes(changes)):
+            click.echo(line)
+        for path, content in prompt_files.items():
+            click.echo(f"{'remove' if content is None else 'write'} {path}")
 
-        if click.confirm(f"\nApply these changes to {tool_name}?"):
-            self.write_config(new_config)
-            if "default_prompt" in hub_config:
-                self._apply_prompt_config(hub_config["default_prompt"])
+        if self._confirm_changes(changes, tool_name):
+            self.write_patch(
+                make_patch(current_config, new_config, fingerprinter=fingerprinter)
+            )
+            self._write_prompt_files(prompt_files)
             return True
         else:
             click.echo("Changes cancelled.")
             return False
 
+    def _confirm_changes(self, changes: List[Change], tool_name: str) -> bool:
+        """Ask whether to apply changes, showing the full diff on request.
+
+        The diff is rendered lazily and streamed through a pager.
+        """
+        while True:
+            answer = click.prompt(
+                f"\nApply these changes to {tool_name}? [y]es, [n]o, [d]iff",
+                type=click.Choice(["y", "n", "d"]),
+                default="n",
+                show_choices=False,
+            )
+            if answer != "d":
+                return answer == "y"
+            click.echo_via_pager(
+                line + "\n" for line in iter_unified(changes, tool_name)
+            )
+
     def _apply_hub_config(
         self, config: Dict[str, Any], hub_config: Dict[str, Any]
+    ) -> None:
+        """Apply hub configuration to the target config and sync the prompt file."""
+        self._apply_hub_servers(config, hub_config)
+        self._write_prompt_files(self.plan_prompt_files(hub_config))
+
+    def _apply_hub_servers(
+        self, config: Dict[str, Any], hub_config: Dict[str, Any]
     ) -> None:
         """Apply hub configuration to the target config. Override in subclasses."""
         raise NotImplementedError
@@ -161,8 +239,7 @@ class BaseIntegration:
 class VSCodeIntegration(BaseIntegration):
     """Integration with VSCode MCP server settings."""
 
-    def __init__(self):
-        self.system = platform.system()
+    prompt_file = ".github/copilot-instructions.md"
 
     def get_config_path(self) -> Path:
         if self.system == "Darwin":
@@ -179,28 +256,34 @@ class VSCodeIntegration(BaseIntegration):
         return base / "settings.json"
 
     def get_workspace_config_path(self) -> Path:
-        return Path.cwd() / ".vscode" / "mcp.json"
+        return self.get_project_root() / ".vscode" / "mcp.json"
 
     def read_config(self) -> Dict[str, Any]:
-        workspace_config_path = self.get_workspace_config_path()
-        if workspace_config_path.exists():
-            try:
-                with open(workspace_config_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
+        workspace_config = _read_json(self.get_workspace_config_path())
+        if isinstance(workspace_config, dict):
+            return workspace_config
 
         user_config = super().read_config()
         return user_config.get("mcp", {})
 
-    def write_config(self, config: Dict[str, Any]) -> None:
-        workspace_config_path = self.get_workspace_config_path()
-        workspace_config_path.parent.mkdir(parents=True, exist_ok=True)
+    def render_patch(self, patch: List[Dict[str, Any]]) -> str:
+        """Splice the patch into .vscode/mcp.json, keeping comments and layout.
 
-        with open(workspace_config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        The patch must have been planned against the workspace file; when
+        that file does not exist yet, a new one is rendered.
+        """
+        try:
+            with open(self.get_workspace_config_path(), "r", encoding="utf-8") as f:
+                document = JSONCDocument(f.read())
+        except (ValueError, IOError):
+            return super().render_patch(patch)
+        document.apply_patch(patch)
+        return document.text
 
-    def _apply_hub_config(
+    def get_write_path(self) -> Path:
+        return self.get_workspace_config_path()
+
+    def _apply_hub_servers(
         self, config: Dict[str, Any], hub_config: Dict[str, Any]
     ) -> None:
         if "mcpServers" in hub_config:
@@ -211,11 +294,9 @@ class VSCodeIntegration(BaseIntegration):
             config["prompts"]["default_prompt"] = hub_config["default_prompt"]
 
     def _apply_prompt_config(self, prompt_content: str) -> None:
-        copilot_dir = Path.cwd() / ".github"
-        copilot_dir.mkdir(parents=True, exist_ok=True)
-        copilot_instructions_path = copilot_dir / "copilot-instructions.md"
-        with open(copilot_instructions_path, "w", encoding="utf-8") as f:
-            f.write(prompt_content)
+        prompt_path = self.get_prompt_path()
+        if prompt_path is not None:
+            self._write_prompt_files({prompt_path: prompt_content})
 
     def sync_to_hub(self) -> Dict[str, Any]:
         vscode_config = self.read_config()
@@ -224,13 +305,9 @@ class VSCodeIntegration(BaseIntegration):
         if "servers" in vscode_config:
             hub_config["mcpServers"] = vscode_config["servers"]
 
-        copilot_instructions_path = Path.cwd() / ".github" / "copilot-instructions.md"
-        if copilot_instructions_path.exists():
-            try:
-                with open(copilot_instructions_path, "r", encoding="utf-8") as f:
-                    hub_config["default_prompt"] = f.read()
-            except IOError:
-                pass
+        prompt = self.read_prompt()
+        if prompt is not None:
+            hub_config["default_prompt"] = prompt
 
         return hub_config
 
@@ -238,8 +315,7 @@ class VSCodeIntegration(BaseIntegration):
 class ClaudeDesktopIntegration(BaseIntegration):
     """Integration with Claude Desktop configuration."""
 
-    def __init__(self):
-        self.system = platform.system()
+    hub_keys = ("mcpServers", ROUTING_KEY)
 
     def get_config_path(self) -> Path:
         if self.system == "Darwin":
@@ -254,7 +330,7 @@ class ClaudeDesktopIntegration(BaseIntegration):
 
         return base / "claude_desktop_config.json"
 
-    def _apply_hub_config(
+    def _apply_hub_servers(
         self, config: Dict[str, Any], hub_config: Dict[str, Any]
     ) -> None:
         if "mcpServers" in hub_config:
@@ -272,15 +348,15 @@ class ClaudeDesktopIntegration(BaseIntegration):
 class CursorIntegration(BaseIntegration):
     """Integration with Cursor MCP server settings."""
 
-    def __init__(self):
-        self.system = platform.system()
+    prompt_file = ".cursor/rules/default_prompt.txt"
+    remove_prompt_when_unset = True
 
     def get_config_path(self) -> Path:
         if self.system == "Windows":
             base = Path(os.environ.get("USERPROFILE", Path.home())) / ".cursor"
         else:
             base = Path.home() / ".cursor"
-        project_config = Path.cwd() / ".cursor" / "mcp.json"
+        project_config = self.get_project_root() / ".cursor" / "mcp.json"
         if project_config.exists():
             return project_config
         return base / "mcp.json"
@@ -289,30 +365,11 @@ class CursorIntegration(BaseIntegration):
         config = super().read_config()
         return config
 
-    def write_config(self, config: Dict[str, Any]) -> None:
-        config_path = self.get_config_path()
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-
-    def _apply_hub_config(
+    def _apply_hub_servers(
         self, config: Dict[str, Any], hub_config: Dict[str, Any]
     ) -> None:
         if "mcpServers" in hub_config:
             config["mcpServers"] = hub_config["mcpServers"]
-        if "default_prompt" in hub_config:
-            self._write_cursor_rules(hub_config["default_prompt"])
-        else:
-            cursor_rules_path = Path.cwd() / ".cursor" / "rules" / "default_prompt.txt"
-            if cursor_rules_path.exists():
-                cursor_rules_path.unlink()
-
-    def _write_cursor_rules(self, prompt_content: str) -> None:
-        cursor_rules_dir = Path.cwd() / ".cursor" / "rules"
-        cursor_rules_dir.mkdir(parents=True, exist_ok=True)
-        cursor_rules_path = cursor_rules_dir / "default_prompt.txt"
-        with open(cursor_rules_path, "w", encoding="utf-8") as f:
-            f.write(prompt_content)
 
     def sync_to_hub(self) -> Dict[str, Any]:
         config = self.read_config()
@@ -320,21 +377,17 @@ class CursorIntegration(BaseIntegration):
         if "mcpServers" in config:
             hub_config["mcpServers"] = config["mcpServers"]
 
-        cursor_rules_path = Path.cwd() / ".cursor" / "rules" / "default_prompt.txt"
-        if cursor_rules_path.exists():
-            try:
-                with open(cursor_rules_path, "r", encoding="utf-8") as f:
-                    hub_config["default_prompt"] = f.read()
-            except IOError:
-                pass
+        prompt = self.read_prompt()
+        if prompt is not None:
+            hub_config["default_prompt"] = prompt
         return hub_config
 
 
 class WindsurfIntegration(BaseIntegration):
     """Integration with Windsurf MCP server settings."""
 
-    def __init__(self):
-        self.system = platform.system()
+    prompt_file = ".windsurfrules"
+    remove_prompt_when_unset = True
 
     def get_config_path(self) -> Path:
         if self.system == "Windows":
@@ -351,28 +404,11 @@ class WindsurfIntegration(BaseIntegration):
         config = super().read_config()
         return config
 
-    def write_config(self, config: Dict[str, Any]) -> None:
-        config_path = self.get_config_path()
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-
-    def _apply_hub_config(
+    def _apply_hub_servers(
         self, config: Dict[str, Any], hub_config: Dict[str, Any]
     ) -> None:
         if "mcpServers" in hub_config:
             config["mcpServers"] = hub_config["mcpServers"]
-        if "default_prompt" in hub_config:
-            self._write_windsurf_rules(hub_config["default_prompt"])
-        else:
-            windsurf_rules_path = Path.cwd() / ".windsurfrules"
-            if windsurf_rules_path.exists():
-                windsurf_rules_path.unlink()
-
-    def _write_windsurf_rules(self, prompt_content: str) -> None:
-        windsurf_rules_path = Path.cwd() / ".windsurfrules"
-        with open(windsurf_rules_path, "w", encoding="utf-8") as f:
-            f.write(prompt_content)
 
     def sync_to_hub(self) -> Dict[str, Any]:
         config = self.read_config()
@@ -380,24 +416,20 @@ class WindsurfIntegration(BaseIntegration):
         if "mcpServers" in config:
             hub_config["mcpServers"] = config["mcpServers"]
 
-        windsurf_rules_path = Path.cwd() / ".windsurfrules"
-        if windsurf_rules_path.exists():
-            try:
-                with open(windsurf_rules_path, "r", encoding="utf-8") as f:
-                    hub_config["default_prompt"] = f.read()
-            except IOError:
-                pass
+        prompt = self.read_prompt()
+        if prompt is not None:
+            hub_config["default_prompt"] = prompt
         return hub_config
 
 
 class GeminiIntegration(BaseIntegration):
     """Integration with Gemini CLI MCP server settings."""
 
-    def __init__(self):
-        self.system = platform.system()
+    prompt_file = "GEMINI.md"
+    remove_prompt_when_unset = True
 
     def get_config_path(self) -> Path:
-        project_config = Path.cwd() / ".gemini" / "settings.json"
+        project_config = self.get_project_root() / ".gemini" / "settings.json"
         if project_config.exists():
             return project_config
         if self.system == "Windows":
@@ -410,28 +442,11 @@ class GeminiIntegration(BaseIntegration):
         config = super().read_config()
         return config
 
-    def write_config(self, config: Dict[str, Any]) -> None:
-        config_path = self.get_config_path()
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-
-    def _apply_hub_config(
+    def _apply_hub_servers(
         self, config: Dict[str, Any], hub_config: Dict[str, Any]
     ) -> None:
         if "mcpServers" in hub_config:
             config["mcpServers"] = hub_config["mcpServers"]
-        if "default_prompt" in hub_config:
-            self._write_gemini_md(hub_config["default_prompt"])
-        else:
-            gemini_md_path = Path.cwd() / "GEMINI.md"
-            if gemini_md_path.exists():
-                gemini_md_path.unlink()
-
-    def _write_gemini_md(self, prompt_content: str) -> None:
-        gemini_md_path = Path.cwd() / "GEMINI.md"
-        with open(gemini_md_path, "w", encoding="utf-8") as f:
-            f.write(prompt_content)
 
     def sync_to_hub(self) -> Dict[str, Any]:
         config = self.read_config()
@@ -439,25 +454,21 @@ class GeminiIntegration(BaseIntegration):
         if "mcpServers" in config:
             hub_config["mcpServers"] = config["mcpServers"]
 
-        gemini_md_path = Path.cwd() / "GEMINI.md"
-        if gemini_md_path.exists():
-            try:
-                with open(gemini_md_path, "r", encoding="utf-8") as f:
-                    hub_config["default_prompt"] = f.read()
-            except IOError:
-                pass
+        prompt = self.read_prompt()
+        if prompt is not None:
+            hub_config["default_prompt"] = prompt
         return hub_config
 
 
 class ClaudeCodeIntegration(BaseIntegration):
     """Integration with Claude Code CLI settings."""
 
-    def __init__(self):
-        self.system = platform.system()
+    prompt_file = "CLAUDE.md"
+    remove_prompt_when_unset = True
 
     def get_config_path(self) -> Path:
         # Prioritize project-specific settings.json
-        project_config_path = Path.cwd() / ".claude" / "settings.json"
+        project_config_path = self.get_project_root() / ".claude" / "settings.json"
         if project_config_path.exists():
             return project_config_path
 
@@ -475,28 +486,11 @@ class ClaudeCodeIntegration(BaseIntegration):
         config = super().read_config()
         return config
 
-    def write_config(self, config: Dict[str, Any]) -> None:
-        config_path = self.get_config_path()
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-
-    def _apply_hub_config(
+    def _apply_hub_servers(
         self, config: Dict[str, Any], hub_config: Dict[str, Any]
     ) -> None:
         if "mcpServers" in hub_config:
             config["mcpServers"] = hub_config["mcpServers"]
-        if "default_prompt" in hub_config:
-            self._write_claude_md(hub_config["default_prompt"])
-        else:
-            claude_md_path = Path.cwd() / "CLAUDE.md"
-            if claude_md_path.exists():
-                claude_md_path.unlink()
-
-    def _write_claude_md(self, prompt_content: str) -> None:
-        claude_md_path = Path.cwd() / "CLAUDE.md"
-        with open(claude_md_path, "w", encoding="utf-8") as f:
-            f.write(prompt_content)
 
     def sync_to_hub(self) -> Dict[str, Any]:
         config = self.read_config()
@@ -504,17 +498,15 @@ class ClaudeCodeIntegration(BaseIntegration):
         if "mcpServers" in config:
             hub_config["mcpServers"] = config["mcpServers"]
 
-        claude_md_path = Path.cwd() / "CLAUDE.md"
-        if claude_md_path.exists():
-            try:
-                with open(claude_md_path, "r", encoding="utf-8") as f:
-                    hub_config["default_prompt"] = f.read()
-            except IOError:
-                pass
+        prompt = self.read_prompt()
+        if prompt is not None:
+            hub_config["default_prompt"] = prompt
         return hub_config
 
 
-def get_integration(tool_name: str) -> BaseIntegration:
+def get_integration(
+    tool_name: str, project_root: Optional[Path] = None
+) -> BaseIntegration:
     """Get integration instance for the specified tool."""
     integrations = {
         "vscode": VSCodeIntegration,
@@ -528,16 +520,18 @@ def get_integration(tool_name: str) -> BaseIntegration:
     if tool_name not in integrations:
         raise ValueError(f"Unsupported tool: {tool_name}")
 
-    return integrations[tool_name]()
+    return integrations[tool_name](project_root)
 
 
-def get_all_integrations() -> Dict[str, BaseIntegration]:
+def get_all_integrations(
+    project_root: Optional[Path] = None,
+) -> Dict[str, BaseIntegration]:
     """Get all available integration instances."""
     return {
-        "vscode": VSCodeIntegration(),
-        "claude": ClaudeDesktopIntegration(),
-        "cursor": CursorIntegration(),
-        "windsurf": WindsurfIntegration(),
-        "gemini": GeminiIntegration(),
-        "claude_code": ClaudeCodeIntegration(),
+        "vscode": VSCodeIntegration(project_root),
+        "claude": ClaudeDesktopIntegration(project_root),
+        "cursor": CursorIntegration(project_root),
+        "windsurf": WindsurfIntegration(project_root),
+        "gemini": GeminiIntegration(project_root),
+        "claude_code": ClaudeCodeIntegration(project_root),
     }
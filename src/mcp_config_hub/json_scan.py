@@ -0,0 +1,90 @@
+import json
+import re
+
+# json.decoder exports the C string scanner, but typeshed does not declare it.
+from json.decoder import scanstring  # type: ignore[attr-defined]
+from pathlib import Path
+from typing import Any, List, Union
+
+from .tree_utils import BLOCKED, MISSING
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def _error(message: str, pos: int) -> json.JSONDecodeError:
+    return json.JSONDecodeError(message, "", pos)
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()  # type: ignore[union-attr]
+
+
+def _skip_value(text: str, pos: int) -> int:
+    """Return the end offset of the JSON value starting at pos.
+
+    The value is run through the C decoder and dropped, which is far
+    cheaper than walking it in Python.
+    """
+    return _DECODER.raw_decode(text, pos)[1]
+
+
+def _find_member(text: str, pos: int, key: str) -> int:
+    """Return the offset of the value of key in the object at pos, or -1.
+
+    The scan stops at the first occurrence of key. Unlike json.loads, which
+    keeps the last one, a duplicated key therefore resolves to its first
+    value.
+    """
+    pos = _skip_whitespace(text, pos + 1)
+    if text[pos : pos + 1] == "}":
+        return -1
+
+    while True:
+        if text[pos : pos + 1] != '"':
+            raise _error("Expecting property name", pos)
+        name, pos = scanstring(text, pos + 1)
+
+        pos = _skip_whitespace(text, pos)
+        if text[pos : pos + 1] != ":":
+            raise _error("Expecting ':' delimiter", pos)
+        pos = _skip_whitespace(text, pos + 1)
+        if name == key:
+            return pos
+        pos = _skip_whitespace(text, _skip_value(text, pos))
+
+        char = text[pos : pos + 1]
+        if char == "}":
+            return -1
+        if char != ",":
+            raise _error("Expecting ',' delimiter", pos)
+        pos = _skip_whitespace(text, pos + 1)
+
+
+def scan_value(text: Union[str, bytes], keys: List[str]) -> Any:
+    """Get the value at a key path of a JSON document, MISSING or BLOCKED.
+
+    Only the value at the end of the path is kept; the members before it
+    along the way are decoded and dropped one at a time, and the members
+    after it are not read at all.
+    """
+    if isinstance(text, bytes):
+        text = text.decode("utf-8")
+    pos = _skip_whitespace(text, 0)
+    for key in keys:
+        if text[pos : pos + 1] != "{":
+            return BLOCKED
+        pos = _find_member(text, pos, key)
+        if pos < 0:
+            return MISSING
+    return _DECODER.raw_decode(text, pos)[0]
+
+
+def load_value(path: Path, keys: List[str]) -> Any:
+    """Get the value at a key path of a JSON file.
+
+    Raises ValueError if the file is empty or the path runs through
+    malformed JSON, and OSError if it cannot be read.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return scan_value(f.read(), keys)
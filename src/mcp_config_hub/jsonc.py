@@ -0,0 +1,411 @@
+import json
+import re
+
+# json.decoder exports the C string scanner, but typeshed does not declare it.
+from json.decoder import scanstring  # type: ignore[attr-defined]
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .diff_utils import from_pointer
+from .tree_utils import MISSING
+
+Path = Tuple[str, ...]
+
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class Span(NamedTuple):
+    """Where a value sits in a JSONC text.
+
+    start and end delimit the value itself; member_start is where its object
+    member (the key) or list item starts, and equals start for the root.
+    """
+
+    member_start: int
+    start: int
+    end: int
+
+
+class _Parser:
+    """Recursive descent JSONC parser recording the span of every value.
+
+    Accepts // and /* */ comments and trailing commas, as VSCode does.
+    List items are recorded under their index as a string.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.spans: Dict[Path, Span] = {}
+
+    def parse(self) -> Any:
+        pos = self._skip(0)
+        value, end = self._value(pos, ())
+        self.spans[()] = Span(pos, pos, end)
+        if self._skip(end) != len(self.text):
+            raise self._error("Extra data", end)
+        return value
+
+    def _error(self, message: str, pos: int) -> ValueError:
+        line = self.text.count("\n", 0, pos) + 1
+        return ValueError(f"{message} at line {line}")
+
+    def _skip(self, pos: int) -> int:
+        """Skip whitespace and comments."""
+        text = self.text
+        while pos < len(text):
+            c = text[pos]
+            if c in " \t\r\n\ufeff":
+                pos += 1
+            elif text.startswith("//", pos):
+                newline = text.find("\n", pos)
+                pos = len(text) if newline < 0 else newline + 1
+            elif text.startswith("/*", pos):
+                close = text.find("*/", pos + 2)
+                if close < 0:
+                    raise self._error("Unterminated comment", pos)
+                pos = close + 2
+            else:
+                break
+        return pos
+
+    def _value(self, pos: int, path: Path) -> Tuple[Any, int]:
+        text = self.text
+        c = text[pos : pos + 1]
+        if c == "{":
+            return self._object(pos, path)
+        if c == "[":
+            return self._array(pos, path)
+        if c == '"':
+            return scanstring(text, pos + 1)
+        for literal, value in _LITERALS.items():
+            if text.startswith(literal, pos):
+                return value, pos + len(literal)
+        match = _NUMBER.match(text, pos)
+        if match:
+            number = match.group()
+            return (
+                float(number) if any(ch in number for ch in ".eE") else int(number)
+            ), match.end()
+        raise self._error("Expecting value", pos)
+
+    def _object(self, pos: int, path: Path) -> Tuple[Dict[str, Any], int]:
+        result: Dict[str, Any] = {}
+        pos = self._skip(pos + 1)
+        while self.text[pos : pos + 1] != "}":
+            if self.text[pos : pos + 1] != '"':
+                raise self._error("Expecting property name", pos)
+            member_start = pos
+            key, pos = scanstring(self.text, pos + 1)
+            pos = self._skip(pos)
+            if self.text[pos : pos + 1] != ":":
+                raise self._error("Expecting ':' delimiter", pos)
+            start = self._skip(pos + 1)
+            result[key], end = self._value(start, path + (key,))
+            self.spans[path + (key,)] = Span(member_start, start, end)
+            pos = self._after_item(end, "}")
+        return result, pos + 1
+
+    def _array(self, pos: int, path: Path) -> Tuple[List[Any], int]:
+        result: List[Any] = []
+        pos = self._skip(pos + 1)
+        while self.text[pos : pos + 1] != "]":
+            item_path = path + (str(len(result)),)
+            value, end = self._value(pos, item_path)
+            self.spans[item_path] = Span(pos, pos, end)
+            result.append(value)
+            pos = self._after_item(end, "]")
+        return result, pos + 1
+
+    def _after_item(self, pos: int, closing: str) -> int:
+        """Skip the separator after an item, allowing a trailing comma."""
+        pos = self._skip(pos)
+        c = self.text[pos : pos + 1]
+        if c == ",":
+            return self._skip(pos + 1)
+        if c != closing:
+            raise self._error(f"Expecting ',' or '{closing}'", pos)
+        return pos
+
+
+def loads(text: str) -> Any:
+    """Parse JSONC text (JSON with comments and trailing commas)."""
+    return _Parser(text).parse()
+
+
+class JSONCDocument:
+    """A JSONC text that can be edited without reformatting it.
+
+    Edits splice the rendering of only the changed value into the original
+    text, so comments, key order and layout elsewhere are kept. The text is
+    parsed once: each edit is logged, and a recorded span is only brought in
+    step with the edits made since it was recorded when it is next used. So
+    the cost of an edit does not grow with the size of the document.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._parse()
+
+    def _parse(self) -> None:
+        parser = _Parser(self.text)
+        self._value = parser.parse()
+        # Each span with the number of edits it is already in step with.
+        self._spans: Dict[Path, Tuple[Span, int]] = {}
+        # The keys of every object and list, in document order.
+        self._children: Dict[Path, Dict[str, None]] = {}
+        self._edits: List[Tuple[int, int, int]] = []
+        self._add_spans((), parser.spans, 0)
+
+    def _add_spans(self, path: Path, spans: Dict[Path, Span], offset: int) -> None:
+        epoch = len(self._edits)
+        for key in spans:
+            self._children.pop(path + key, None)
+        for key, span in spans.items():
+            full = path + key
+            self._spans[full] = (Span(*(offset + pos for pos in span)), epoch)
+            if full:
+                self._children.setdefault(full[:-1], {})[full[-1]] = None
+
+    @property
+    def value(self) -> Any:
+        """The parsed document, parsed again after edits."""
+        if self._value is MISSING:
+            self._value = loads(self.text)
+        return self._value
+
+    @property
+    def spans(self) -> Dict[Path, Span]:
+        """The span of every value in the current text."""
+        spans = {path: self._span(path) for path in [*self._spans]}
+        return {path: span for path, span in spans.items() if span is not None}
+
+    def _span(self, path: Path) -> Optional[Span]:
+        """Get the current span of the value at a key path, if it has one.
+
+        Spans after an edit are shifted, spans inside it dropped and spans
+        around it stretched; an edit cutting across a span, which no edit
+        should do, falls back to parsing the text again.
+        """
+        entry = self._spans.get(path)
+        if entry is None:
+            return None
+        span, epoch = entry
+        if epoch == len(self._edits):
+            return span
+        member_start, value_start, value_end = span
+        for start, end, delta in self._edits[epoch:]:
+            if value_end <= start:
+                continue
+            if member_start >= end:
+                member_start += delta
+                value_start += delta
+                value_end += delta
+            elif member_start >= start and value_end <= end:
+                del self._spans[path]
+                return None
+            elif member_start <= start and value_end >= end:
+                value_end += delta
+            else:
+                self._parse()
+                return self._span(path)
+        span = Span(member_start, value_start, value_end)
+        self._spans[path] = (span, len(self._edits))
+        return span
+
+    def _splice(self, start: int, end: int, replacement: str) -> None:
+        """Replace text[start:end], logging the edit for the recorded spans."""
+        self.text = self.text[:start] + replacement + self.text[end:]
+        self._value = MISSING
+        self._edits.append((start, end, len(replacement) - (end - start)))
+
+    def _record(self, path: Path, member_start: int, start: int, end: int) -> None:
+        """Record the spans of the value just written at text[start:end]."""
+        parser = _Parser(self.text[start:end])
+        parser.parse()
+        spans = dict(parser.spans)
+        spans[()] = Span(member_start - start, 0, end - start)
+        self._add_spans(path, spans, start)
+
+    def _line_indent(self, pos: int) -> str:
+        line_start = self.text.rfind("\n", 0, pos) + 1
+        line = self.text[line_start:pos]
+        return line[: len(line) - len(line.lstrip(" \t"))]
+
+    def _indent_unit(self) -> str:
+        match = re.search(r"\n([ \t]+)\S", self.text)
+        return match.group(1) if match else "  "
+
+    def _render(self, value: Any, indent: str) -> str:
+        rendered = json.dumps(value, indent=self._indent_unit(), ensure_ascii=False)
+        return rendered.replace("\n", "\n" + indent)
+
+    def get(self, path: Path) -> Any:
+        """Get the value at a key path, or MISSING."""
+        span = self._span(tuple(path))
+        if span is None:
+            return MISSING
+        return _Parser(self.text[span.start : span.end]).parse()
+
+    def set(self, path: Path, value: Any) -> None:
+        """Set the value at a key path, creating missing parent objects."""
+        path = tuple(path)
+        span = self._span(path)
+        if span is not None:
+            indent = self._line_indent(span.member_start)
+            rendered = self._render(value, indent)
+            self._splice(span.start, span.end, rendered)
+            self._record(
+                path, span.member_start, span.start, span.start + len(rendered)
+            )
+            return
+        parent = self._span(path[:-1])
+        if parent is None:
+            self.set(path[:-1], {path[-1]: value})
+            return
+        if self.text[parent.start] != "{":
+            raise ValueError(f"Cannot add a key to a non-object at {path[:-1]}")
+
+        last = None
+        for key in reversed(self._children.get(path[:-1], {})):
+            last = self._span(path[:-1] + (key,))
+            if last is not None:
+                break
+        name = json.dumps(path[-1], ensure_ascii=False)
+        if last is not None:
+            indent = self._line_indent(last.member_start)
+            rendered = self._render(value, indent)
+            member = f"{name}: {rendered}"
+            inserted = self._insert_after(last.end, f"\n{indent}{member}")
+        else:
+            outer = self._line_indent(parent.member_start)
+            indent = outer + self._indent_unit()
+            rendered = self._render(value, indent)
+            member = f"{name}: {rendered}"
+            inserted = close = parent.end - 1
+            self._splice(close, close, f"\n{indent}{member}\n{outer}")
+        member_start = inserted + 1 + len(indent)
+        start = member_start + len(name) + 2
+        self._record(path, member_start, start, start + len(rendered))
+
+    def _insert_after(self, end: int, member: str) -> int:
+        """Insert a member after the member value ending at end.
+
+        The value keeps its comma and any // comment on its line; a trailing
+        comma is kept as the new member's trailing comma. Returns where the
+        inserted member text starts.
+        """
+        text = self.text
+        pos = end
+        while pos < len(text) and text[pos] in " \t":
+            pos += 1
+        trailing = text[pos : pos + 1] == ","
+        if trailing:
+            pos += 1
+        line_end = text.find("\n", pos)
+        line_end = len(text) if line_end < 0 else line_end
+        if text[pos:line_end].strip().startswith("//"):
+            pos = line_end
+        if trailing:
+            self._splice(pos, pos, member + ",")
+            return pos
+        self._splice(end, pos, "," + text[end:pos] + member)
+        return pos + 1
+
+    def remove(self, path: Path) -> None:
+        """Remove the member or list item at a key path."""
+        path = tuple(path)
+        span = self._span(path)
+        if span is None or not path:
+            raise ValueError(f"Path not found: {'.'.join(path)}")
+        text = self.text
+        start, end = span.member_start, span.end
+
+        after = end
+        while after < len(text) and text[after] in " \t\r\n":
+            after += 1
+        if text[after : after + 1] == ",":
+            end = after + 1
+        else:
+            before = start - 1
+            while before >= 0 and text[before] in " \t\r\n":
+                before -= 1
+            if text[before] == ",":
+                start = before
+
+        # Drop the member's whole line when nothing else is on it.
+        line_start = text.rfind("\n", 0, start) + 1
+        if not text[line_start:start].strip():
+            line_end = text.find("\n", end)
+            if line_end >= 0 and not text[end:line_end].strip():
+                start, end = line_start, line_end + 1
+        in_list = self._is_list(path[:-1])
+        self._splice(start, end, "")
+        self._children.get(path[:-1], {}).pop(path[-1], None)
+        if in_list:
+            self._renumber(path)
+
+    def _renumber(self, removed: Path) -> None:
+        """Move the spans of the list items after a removed item down by one."""
+        parent, index = removed[:-1], int(removed[-1])
+        items = [*self._children.get(parent, {})]
+        self._children[parent] = {str(i): None for i in range(len(items))}
+        for item in items:
+            if int(item) > index:
+                self._move(parent + (item,), parent + (str(int(item) - 1),))
+
+    def _move(self, old: Path, new: Path) -> None:
+        """Move the spans under one key path to another."""
+        if old in self._spans:
+            self._spans[new] = self._spans.pop(old)
+        children = self._children.pop(old, None)
+        if children is not None:
+            self._children[new] = children
+            for key in children:
+                self._move(old + (key,), new + (key,))
+
+    def apply_patch(self, patch: List[Dict[str, Any]]) -> None:
+        """Apply an RFC 6902 JSON Patch by splicing each operation into the text.
+
+        Raises ValueError if an operation does not apply.
+        """
+        for operation in patch:
+            op = operation.get("op")
+            path = tuple(from_pointer(operation.get("path", "")))
+            if op in ("add", "replace"):
+                if self._span(path) is None:
+                    if op == "replace":
+                        raise ValueError(f"Path not found: {operation['path']}")
+                    if path and self._is_list(path[:-1]):
+                        raise ValueError(f"Cannot insert into arrays: {path}")
+                self.set(path, operation["value"])
+            elif op == "remove":
+                self.remove(path)
+            elif op in ("move", "copy"):
+                source = tuple(from_pointer(operation["from"]))
+                value = self.get(source)
+                if value is MISSING:
+                    raise ValueError(f"Path not found: {operation['from']}")
+                if op == "move":
+                    self.remove(source)
+                self.set(path, value)
+            elif op == "test":
+                if self.get(path) != operation["value"]:
+                    raise ValueError(f"Test failed at {operation['path']}")
+            else:
+                raise ValueError(f"Invalid patch operation: {op}")
+
+    def _is_list(self, path: Path) -> bool:
+        span = self._span(path)
+        return span is not None and self.text[span.start] == "["
+
+
+def load_text(text: str) -> Optional[Any]:
+    """Parse JSON, falling back to JSONC; None if it is neither."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return loads(text)
+    except ValueError:
+        return None
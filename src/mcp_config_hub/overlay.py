@@ -0,0 +1,133 @@
+import copy
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .tree_utils import BLOCKED, MISSING, deep_merge, find, split_key
+
+
+class _Layers:
+    """Config layers in precedence order, each loaded on first use."""
+
+    def __init__(self, loaders: Sequence[Callable[[], Dict[str, Any]]]):
+        self.loaders = loaders
+        self.trees: List[Optional[Dict[str, Any]]] = [None] * len(loaders)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        tree = self.trees[index]
+        if tree is None:
+            tree = self.trees[index] = self.loaders[index]()
+        return tree
+
+    def __len__(self) -> int:
+        return len(self.loaders)
+
+    def all_loaded(self) -> bool:
+        return all(tree is not None for tree in self.trees)
+
+
+class OverlayView(Mapping):
+    """Read-only merged view over config layers, highest precedence first.
+
+    Resolving a key walks the layers from the top and stops at the first one
+    that defines it as anything but a dict, so lower layers are only loaded
+    when the key is missing above or has to be merged. Nested dicts come back
+    as further views and are only merged when they are enumerated. The result
+    matches deep-merging the layers from the bottom up.
+
+    With getters, one per layer mapping a key path to its value, MISSING or
+    BLOCKED (see find), lookups read only the values they need instead of
+    loading whole layers.
+    """
+
+    def __init__(
+        self,
+        loaders: Sequence[Callable[[], Dict[str, Any]]],
+        getters: Optional[Sequence[Callable[[List[str]], Any]]] = None,
+        _layers: Optional[_Layers] = None,
+        _path: Tuple[str, ...] = (),
+    ):
+        self._layers = _layers if _layers is not None else _Layers(loaders)
+        self._getters = getters
+        self._path = _path
+
+    def _resolve(self, keys: List[str]) -> List[Any]:
+        """Get the values contributing to keys, highest precedence first."""
+        values: List[Any] = []
+        for index in range(len(self._layers)):
+            value = find(self._layers[index], keys)
+            if value is BLOCKED:
+                break
+            if value is MISSING:
+                continue
+            if not isinstance(value, dict):
+                if not values:
+                    values.append(value)
+                break
+            values.append(value)
+        return values
+
+    def _get(self, keys: List[str]) -> List[Any]:
+        """Like _resolve, but reads the values through the layer getters."""
+        assert self._getters is not None
+        values: List[Any] = []
+        for getter in self._getters:
+            value = getter(keys)
+            if value is BLOCKED:
+                break
+            if value is MISSING:
+                continue
+            if not isinstance(value, dict):
+                if not values:
+                    values.append(value)
+                break
+            values.append(value)
+        return values
+
+    def _dicts(self) -> List[Dict[str, Any]]:
+        return self._resolve(list(self._path))
+
+    def lookup(self, key: str) -> Any:
+        """Get the merged value at a dot notation key, or MISSING."""
+        keys = list(self._path) + split_key(key)
+        if self._getters is not None:
+            values = self._get(keys)
+        else:
+            values = self._resolve(keys)
+        if not values:
+            return MISSING
+        if not isinstance(values[0], dict):
+            return copy.deepcopy(values[0])
+        return _merge(values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialise the merged tree under this view."""
+        return _merge(self._dicts())
+
+    def all_loaded(self) -> bool:
+        """Check whether every layer has been loaded."""
+        return self._layers.all_loaded()
+
+    def __getitem__(self, key: str) -> Any:
+        path = self._path + (key,)
+        values = self._resolve(list(path))
+        if not values:
+            raise KeyError(key)
+        if not isinstance(values[0], dict):
+            return values[0]
+        return OverlayView(self._layers.loaders, self._getters, self._layers, path)
+
+    def __iter__(self) -> Iterator[str]:
+        seen: Dict[str, None] = {}
+        for values in reversed(self._dicts()):
+            seen.update(dict.fromkeys(values))
+        return iter(seen)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def _merge(values: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for value in reversed(values):
+        deep_merge(merged, copy.deepcopy(value))
+    return merged
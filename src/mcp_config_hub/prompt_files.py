@@ -0,0 +1,100 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from .file_utils import file_digest
+from .sync_state import file_state, read_state_file, write_state_file
+
+# Bump when the digest cache layout changes; older caches are then ignored.
+DIGEST_CACHE_VERSION = 1
+
+
+class DigestCache:
+    """Content digests of files, reused while a file's stat is unchanged.
+
+    With a state directory, the cache is loaded from and saved to
+    prompt-digests.json there, so unchanged prompt files are not read again
+    by later syncs.
+    """
+
+    def __init__(self, state_dir: Optional[Path] = None):
+        self.path = None if state_dir is None else state_dir / "prompt-digests.json"
+        data = (
+            None
+            if self.path is None
+            else read_state_file(self.path, DIGEST_CACHE_VERSION)
+        )
+        self._files: Dict[str, list] = {} if data is None else data["files"]
+        self._texts: Dict[str, str] = {}
+        self._changed = False
+
+    def file_digest(self, path: Path) -> Optional[str]:
+        """Get the digest of a file, or None if it does not exist."""
+        state = file_state(path)
+        if state is None:
+            return None
+        key = str(path.absolute())
+        cached = self._files.get(key)
+        if cached is not None and cached[:3] == state:
+            return cached[3]
+        digest = file_digest(path)
+        if digest is not None:
+            self._files[key] = state + [digest]
+            self._changed = True
+        return digest
+
+    def text_digest(self, text: str) -> str:
+        """Get the digest of text as it is written to a file."""
+        if text not in self._texts:
+            self._texts[text] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return self._texts[text]
+
+    def record(self, path: Path, text: str) -> None:
+        """Record that a file was just written with text, without reading it."""
+        state = file_state(path)
+        if state is not None:
+            self._files[str(path.absolute())] = state + [self.text_digest(text)]
+            self._changed = True
+
+    def save(self) -> None:
+        """Save the cache if it has a state directory and changed."""
+        if self.path is not None and self._changed:
+            write_state_file(
+                self.path, {"version": DIGEST_CACHE_VERSION, "files": self._files}
+            )
+            self._changed = False
+
+
+def has_content(path: Path, text: str, digests: DigestCache) -> bool:
+    """Check whether a file holds text, comparing sizes before digests."""
+    try:
+        size = os.stat(path).st_size
+    except OSError:
+        return False
+    if size != len(text.encode("utf-8")):
+        return False
+    return digests.file_digest(path) == digests.text_digest(text)
+
+
+def plan_prompt_artifacts(
+    artifacts: Iterable[Tuple[Path, bool]],
+    prompt: Optional[str],
+    digests: Optional[DigestCache] = None,
+) -> Dict[Path, Optional[str]]:
+    """Plan the prompt file changes that bring every artifact in line with prompt.
+
+    artifacts are (path, remove_when_unset) pairs; a file is removed when
+    prompt is None only if remove_when_unset. Maps each file to change to its
+    new content, or to None if it is to be removed. A file shared by several
+    artifacts is only checked once.
+    """
+    digests = digests or DigestCache()
+    changes: Dict[Path, Optional[str]] = {}
+    for path, remove_when_unset in dict(artifacts).items():
+        if prompt is not None:
+            if not has_content(path, prompt, digests):
+                changes[path] = prompt
+        elif remove_when_unset and path.exists():
+            changes[path] = None
+    return changes
@@ -0,0 +1,107 @@
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+# Hub key holding per-tool routing rules: {tool: {include, exclude, tags}}.
+ROUTING_KEY = "routing"
+# Server entry key holding the server's tags; it is never synced to tools.
+TAGS_KEY = "tags"
+
+
+class ServerSelector(NamedTuple):
+    """Chooses which hub servers are synced to a tool.
+
+    A server is selected if its name matches one of the include globs or it
+    has one of tags (any server when neither is given), and its name matches
+    none of the exclude globs.
+    """
+
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+
+    def matches(self, name: str, server: Any) -> bool:
+        if any(fnmatchcase(name, pattern) for pattern in self.exclude):
+            return False
+        if not self.include and not self.tags:
+            return True
+        if any(fnmatchcase(name, pattern) for pattern in self.include):
+            return True
+        return bool({*self.tags} & {*server_tags(server)})
+
+
+def server_tags(server: Any) -> Tuple[str, ...]:
+    """Get the tags of a hub server entry."""
+    tags = server.get(TAGS_KEY) if isinstance(server, dict) else None
+    if isinstance(tags, str):
+        return (tags,)
+    if isinstance(tags, list):
+        return tuple(str(tag) for tag in tags)
+    return ()
+
+
+def routing_selector(routing: Any, tool: str) -> ServerSelector:
+    """Get the selector of a tool from the hub's routing rules.
+
+    Raises ValueError if the tool's rule is malformed.
+    """
+    rule = routing.get(tool) if isinstance(routing, dict) else None
+    if rule is None:
+        return ServerSelector()
+    if not isinstance(rule, dict):
+        raise ValueError(f"Invalid routing rule for {tool}: expected an object")
+
+    def patterns(field: str) -> Tuple[str, ...]:
+        value = rule.get(field, [])
+        if isinstance(value, str):
+            return (value,)
+        if not isinstance(value, list):
+            raise ValueError(f"Invalid routing rule for {tool}: {field}")
+        return tuple(str(item) for item in value)
+
+    return ServerSelector(patterns("include"), patterns("exclude"), patterns("tags"))
+
+
+def strip_tags(server: Any) -> Any:
+    """Get a server entry as tools store it, without its hub tags."""
+    if isinstance(server, dict) and TAGS_KEY in server:
+        return {key: value for key, value in server.items() if key != TAGS_KEY}
+    return server
+
+
+def restore_tags(server: Any, hub_server: Optional[Any]) -> Any:
+    """Give a server imported from a tool the tags of its hub entry."""
+    tags = hub_server.get(TAGS_KEY) if isinstance(hub_server, dict) else None
+    if tags is None or not isinstance(server, dict):
+        return server
+    return {**server, TAGS_KEY: tags}
+
+
+def select_servers(
+    servers: Dict[str, Any], selectors: Iterable[ServerSelector]
+) -> Dict[str, Any]:
+    """Get the servers every selector matches, without their hub tags."""
+    selectors = [*selectors]
+    return {
+        name: strip_tags(server)
+        for name, server in servers.items()
+        if all(selector.matches(name, server) for selector in selectors)
+    }
+
+
+def select_hub_config(
+    hub_config: Dict[str, Any],
+    tool: str,
+    selector: Optional[ServerSelector] = None,
+) -> Dict[str, Any]:
+    """Get the hub configuration to sync to a tool.
+
+    Its servers are narrowed to those the tool's routing rule and selector
+    (if any) match; the configuration is returned as is if it has no servers.
+    """
+    if "mcpServers" not in hub_config:
+        return hub_config
+    selectors = [routing_selector(hub_config.get(ROUTING_KEY), tool)]
+    if selector is not None:
+        selectors.append(selector)
+    servers = select_servers(hub_config["mcpServers"], selectors)
+    return dict(hub_config, mcpServers=servers)
@@ -1,15 +1,827 @@
+import hashlib
 import json
+import marshal  # nosec B403 - only loads snapshots this module wrote itself
 import os
 import platform
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import closing, contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+
+from .file_utils import file_mode
+from .json_scan import load_value
+from .tree_utils import (
+    BLOCKED,
+    MISSING,
+    Operation,
+    apply_operation,
+    deep_merge,
+    find,
+    split_key,
+)
+
+fcntl: Any = None
+msvcrt: Any = None
+try:
+    import fcntl
+except ImportError:
+    try:
+        import msvcrt
+    except ImportError:
+        pass
+
+# (st_mtime_ns, st_size, st_ino) of a scope file at the time it was parsed.
+Fingerprint = Tuple[int, int, int]
+# Opaque version of a stored scope; it changes whenever the scope is written.
+Etag = Tuple[Any, ...]
+
+CONFIG_CACHE_SIZE = 32
+JOURNAL_COMPACT_THRESHOLD = 64 * 1024
+MANIFEST_VERSION = 1
+LAYOUTS = ("file", "sharded", "sqlite")
+
+# Bump when the on-disk merged snapshot layout changes.
+SNAPSHOT_VERSION = 1
+SCOPES = ("global", "user", "project")
+
+_config_cache: "OrderedDict[str, Tuple[Fingerprint, Any]]" = OrderedDict()
+_config_cache_lock = threading.Lock()
+
+
+def _copy_tree(value: Any) -> Any:
+    """Copy a parsed JSON tree so cached entries are never mutated by callers."""
+    if isinstance(value, dict):
+        return {k: _copy_tree(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(v) for v in value]
+    return value
+
+
+def _stat_fingerprint(path: Path) -> Optional[Fingerprint]:
+    """Return the stat fingerprint of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _cache_get(path: Path, fingerprint: Fingerprint) -> Any:
+    with _config_cache_lock:
+        entry = _config_cache.get(str(path))
+        if entry is None or entry[0] != fingerprint:
+            return None
+        _config_cache.move_to_end(str(path))
+        return _copy_tree(entry[1])
+
+
+def _cache_lookup(path: Path, fingerprint: Fingerprint, keys: List[str]) -> Any:
+    """Get a copy of one value from a cached parse, or None if not cached."""
+    with _config_cache_lock:
+        entry = _config_cache.get(str(path))
+        if entry is None or entry[0] != fingerprint:
+            return None
+        _config_cache.move_to_end(str(path))
+        return _copy_tree(find(entry[1], keys))
+
+
+def _cache_put(path: Path, fingerprint: Fingerprint, config: Any) -> None:
+    with _config_cache_lock:
+        _config_cache[str(path)] = (fingerprint, _copy_tree(config))
+        _config_cache.move_to_end(str(path))
+        while len(_config_cache) > CONFIG_CACHE_SIZE:
+            _config_cache.popitem(last=False)
+
+
+def invalidate_config_cache(path: Optional[Path] = None) -> None:
+    """Drop the cached parse of one config file, or of all files if no path given."""
+    with _config_cache_lock:
+        if path is None:
+            _config_cache.clear()
+        else:
+            _config_cache.pop(str(path), None)
+
+
+def _load_json(path: Path, default: Any) -> Any:
+    """Load a JSON file through the parsed-config cache.
+
+    Returns default when the file is missing or unreadable.
+    """
+    fingerprint = _stat_fingerprint(path)
+    if fingerprint is None:
+        return default
+
+    cached = _cache_get(path, fingerprint)
+    if cached is not None:
+        return cached
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return default
+
+    _cache_put(path, fingerprint, data)
+    return data
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Atomically replace a JSON file via a uniquely named temp file.
+
+    The file keeps its permissions, or gets the umask default if new. If
+    path is a symlink, its target is replaced and the link is kept.
+    """
+    target = path.resolve()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    mode = file_mode(target)
+
+    fd, temp_name = tempfile.mkstemp(
+        dir=target.parent, prefix=f"{target.stem}.", suffix=".tmp"
+    )
+    temp_path = Path(temp_name)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+        os.chmod(temp_path, mode)
+        temp_path.replace(target)
+    except Exception:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+    finally:
+        invalidate_config_cache(path)
+
+
+def _default_config() -> dict[str, Any]:
+    """Get default configuration structure."""
+    return {"mcpServers": {}}
+
+
+def _affected_servers(operations: List[Operation]) -> Optional[Set[str]]:
+    """Names of the mcpServers entries operations touch, or None for all."""
+    names: Set[str] = set()
+    for op, key, value in operations:
+        keys = split_key(key)
+        if not keys:
+            if "mcpServers" not in value:
+                continue
+            if op != "merge" or not isinstance(value["mcpServers"], dict):
+                return None
+            names.update(value["mcpServers"])
+        elif keys[0] == "mcpServers":
+            if len(keys) > 1:
+                names.add(keys[1])
+            elif op == "merge":
+                names.update(value)
+            else:
+                return None
+    return names
+
+
+# Sentinel for save_config calls that do not check the etag.
+_ANY_ETAG = object()
+
+
+class ConcurrentModificationError(Exception):
+    """Raised when a scope file changed between a read and a conditional write."""
+
+
+class _FileLock:
+    """Advisory inter-process lock on a sidecar file.
+
+    Re-entrant within a process: nested acquisitions from the same thread only
+    take the OS lock once, and other threads wait on an in-process mutex.
+    """
+
+    _registry: Dict[str, "_FileLock"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._mutex = threading.RLock()
+        self._depth = 0
+        self._file: Any = None
+
+    @classmethod
+    def for_path(cls, path: Path) -> "_FileLock":
+        with cls._registry_lock:
+            lock = cls._registry.get(str(path))
+            if lock is None:
+                lock = cls._registry[str(path)] = cls(path)
+            return lock
+
+    def acquire(self) -> None:
+        self._mutex.acquire()
+        if self._depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a+b")
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+                elif msvcrt is not None:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._mutex.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self._file.close()
+                self._file = None
+        self._mutex.release()
+
+
+class BaseStorageBackend:
+    """Base class for scope storage backends.
+
+    A backend stores one scope at locations derived from the scope's
+    config.json path. Locking, conflict detection and write coalescing are
+    handled by StorageManager, which calls commit, write, compact and remove
+    with the scope lock held.
+    """
+
+    name = ""
+
+    def exists(self, config_path: Path) -> bool:
+        """Check whether the scope is stored with this backend."""
+        raise NotImplementedError
+
+    def get_etag(self, config_path: Path) -> Optional[Etag]:
+        """Get the current etag of the scope, or None if it is not stored."""
+        raise NotImplementedError
+
+    def get_watch_paths(self, config_path: Path) -> List[Path]:
+        """Get the files whose changes change the scope's etag."""
+        raise NotImplementedError
+
+    def load(self, config_path: Path) -> Tuple[dict[str, Any], Optional[Etag]]:
+        """Load the whole scope together with its etag."""
+        raise NotImplementedError
+
+    def get_value(self, config_path: Path, keys: List[str]) -> Any:
+        """Get the value at a key path, MISSING or BLOCKED (see find)."""
+        return find(self.load(config_path)[0], keys)
+
+    def commit(self, config_path: Path, operations: List[Operation]) -> bool:
+        """Apply operations to the stored scope.
+
+        Returns True if the backend asks to be compacted afterwards.
+        """
+        raise NotImplementedError
+
+    def write(self, config_path: Path, config: dict[str, Any]) -> None:
+        """Replace the stored scope with config."""
+        raise NotImplementedError
+
+    def compact(self, config_path: Path) -> None:
+        """Reorganise the stored scope after many small commits."""
+        pass
+
+    def remove(self, config_path: Path) -> None:
+        """Remove the scope from this backend after migrating it elsewhere."""
+        raise NotImplementedError
+
+
+class JSONFileBackend(BaseStorageBackend):
+    """Stores a scope as a single config.json file.
+
+    In journal mode, commits append one JSON record per operation to
+    config.json.journal instead of rewriting the file, and the journal is
+    folded back into the file once it grows past journal_threshold bytes.
+    The journal is replayed on every load, whatever mode the reader uses.
+    """
+
+    name = "file"
+
+    def __init__(
+        self, journal: bool = False, journal_threshold: int = JOURNAL_COMPACT_THRESHOLD
+    ):
+        self.journal = journal
+        self.journal_threshold = journal_threshold
+
+    def _get_journal_path(self, config_path: Path) -> Path:
+        """Get the change journal kept next to a scope file."""
+        return config_path.with_name(config_path.name + ".journal")
+
+    def exists(self, config_path: Path) -> bool:
+        return self.get_etag(config_path) is not None
+
+    def get_watch_paths(self, config_path: Path) -> List[Path]:
+        return [config_path, self._get_journal_path(config_path)]
+
+    def get_etag(self, config_path: Path) -> Optional[Etag]:
+        fingerprint = _stat_fingerprint(config_path)
+        journal_fingerprint = _stat_fingerprint(self._get_journal_path(config_path))
+        if fingerprint is None and journal_fingerprint is None:
+            return None
+        return (fingerprint, journal_fingerprint)
+
+    def load(self, config_path: Path) -> Tuple[dict[str, Any], Optional[Etag]]:
+        etag = self.get_etag(config_path)
+        if etag is None:
+            return _default_config(), None
+
+        config = _load_json(config_path, _default_config())
+        if etag[1] is not None:
+            for operation in self._read_journal(config_path):
+                apply_operation(config, operation)
+        return config, etag
+
+    def get_value(self, config_path: Path, keys: List[str]) -> Any:
+        """Get the value at a key path without parsing the rest of the file.
+
+        An already cached parse is used if there is one; otherwise the file
+        is scanned up to the requested value, which is the first one if a
+        key is duplicated. Scopes with a pending journal are loaded in full.
+        """
+        etag = self.get_etag(config_path)
+        if etag is None or etag[0] is None or etag[1] is not None or not keys:
+            return super().get_value(config_path, keys)
+
+        cached = _cache_lookup(config_path, etag[0], keys)
+        if cached is not None:
+            return cached
+
+        try:
+            return load_value(config_path, keys)
+        except (ValueError, OSError):
+            return super().get_value(config_path, keys)
+
+    def _read_journal(self, config_path: Path) -> List[Operation]:
+        """Read the operations recorded in a scope's change journal.
+
+        A torn record left by an interrupted append is skipped.
+        """
+        operations: List[Operation] = []
+        try:
+            with open(self._get_journal_path(config_path), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    operations.append(
+                        (record["op"], record["path"], record.get("value"))
+                    )
+        except IOError:
+            pass
+        return operations
+
+    def commit(self, config_path: Path, operations: List[Operation]) -> bool:
+        if not self.journal:
+            config = self.load(config_path)[0]
+            for operation in operations:
+                apply_operation(config, operation)
+            self.write(config_path, config)
+            return False
+
+        config_path.parent.mkdir(parents=True, exist_ok=True)
+        records = "".join(
+            json.dumps({"op": op, "path": key, "value": value}, ensure_ascii=False)
+            + "\n"
+            for op, key, value in operations
+        )
+        with open(self._get_journal_path(config_path), "a", encoding="utf-8") as f:
+            f.write(records)
+            return f.tell() > self.journal_threshold
+
+    def write(self, config_path: Path, config: dict[str, Any]) -> None:
+        _write_json(config_path, config)
+        # The new file already contains everything the journal recorded.
+        journal_path = self._get_journal_path(config_path)
+        if journal_path.exists():
+            journal_path.unlink()
+
+    def compact(self, config_path: Path) -> None:
+        if self._get_journal_path(config_path).exists():
+            self.write(config_path, self.load(config_path)[0])
+
+    def remove(self, config_path: Path) -> None:
+        # Keep the old file around rather than deleting the user's data.
+        if config_path.exists():
+            config_path.replace(config_path.with_name(config_path.name + ".bak"))
+        journal_path = self._get_journal_path(config_path)
+        if journal_path.exists():
+            journal_path.unlink()
+
+
+class ShardedBackend(BaseStorageBackend):
+    """Stores a scope as a directory with one file per mcpServers entry.
+
+    config.d/manifest.json holds the other top-level keys and a generation
+    counter, and config.d/servers/<name>.json holds each server. Reads and
+    commits only touch the shards of the servers they name.
+    """
+
+    name = "sharded"
+
+    def _get_shard_dir(self, config_path: Path) -> Path:
+        """Get the directory holding a scope in the sharded layout."""
+        return config_path.with_name(config_path.stem + ".d")
+
+    def _get_manifest_path(self, config_path: Path) -> Path:
+        """Get the manifest of a sharded scope."""
+        return self._get_shard_dir(config_path) / "manifest.json"
+
+    def _get_shard_path(self, config_path: Path, name: str) -> Path:
+        """Get the file holding one mcpServers entry of a sharded scope."""
+        return (
+            self._get_shard_dir(config_path)
+            / "servers"
+            / f"{quote(name, safe='')}.json"
+        )
+
+    def exists(self, config_path: Path) -> bool:
+        return self._get_manifest_path(config_path).exists()
+
+    def get_watch_paths(self, config_path: Path) -> List[Path]:
+        return [self._get_manifest_path(config_path)]
+
+    def get_etag(self, config_path: Path) -> Optional[Etag]:
+        fingerprint = _stat_fingerprint(self._get_manifest_path(config_path))
+        if fingerprint is None:
+            return None
+        return (fingerprint, None)
+
+    def _load_manifest(self, config_path: Path) -> dict[str, Any]:
+        """Load the manifest of a sharded scope."""
+        return _load_json(
+            self._get_manifest_path(config_path),
+            {"version": MANIFEST_VERSION, "generation": 0, "config": {}},
+        )
+
+    def _load_shard(self, config_path: Path, name: str) -> Any:
+        """Load one server entry of a sharded scope, or MISSING."""
+        return _load_json(self._get_shard_path(config_path, name), MISSING)
+
+    def _list_shards(self, config_path: Path) -> List[str]:
+        """List the server names stored in a sharded scope."""
+        servers_dir = self._get_shard_dir(config_path) / "servers"
+        if not servers_dir.is_dir():
+            return []
+        return sorted(unquote(path.stem) for path in servers_dir.glob("*.json"))
+
+    def load(self, config_path: Path) -> Tuple[dict[str, Any], Optional[Etag]]:
+        etag = self.get_etag(config_path)
+        config = self._load_manifest(config_path)["config"]
+        config["mcpServers"] = {}
+        for name in self._list_shards(config_path):
+            shard = self._load_shard(config_path, name)
+            if shard is not MISSING:
+                config["mcpServers"][name] = shard
+        return config, etag
+
+    def get_value(self, config_path: Path, keys: List[str]) -> Any:
+        if len(keys) < 2:
+            return super().get_value(config_path, keys)
+        if keys[0] == "mcpServers":
+            shard = self._load_shard(config_path, keys[1])
+            return MISSING if shard is MISSING else find(shard, keys[2:])
+        return find(self._load_manifest(config_path)["config"], keys)
+
+    def commit(self, config_path: Path, operations: List[Operation]) -> bool:
+        manifest = self._load_manifest(config_path)
+
+        names = _affected_servers(operations)
+        if names is None:
+            names = set(self._list_shards(config_path))
+        servers = {}
+        for name in names:
+            shard = self._load_shard(config_path, name)
+            if shard is not MISSING:
+                servers[name] = shard
+
+        partial = manifest["config"]
+        partial["mcpServers"] = _copy_tree(servers)
+        for operation in operations:
+            apply_operation(partial, operation)
+        new_servers = partial.pop("mcpServers", {})
+        if not isinstance(new_servers, dict):
+            raise ValueError("mcpServers must be an object in the sharded layout")
+
+        for name in names | set(new_servers):
+            shard_path = self._get_shard_path(config_path, name)
+            if name not in new_servers:
+                if shard_path.exists():
+                    shard_path.unlink()
+            elif servers.get(name, MISSING) != new_servers[name]:
+                _write_json(shard_path, new_servers[name])
+
+        manifest["config"] = partial
+        manifest["generation"] = manifest.get("generation", 0) + 1
+        _write_json(self._get_manifest_path(config_path), manifest)
+        return False
+
+    def write(self, config_path: Path, config: dict[str, Any]) -> None:
+        manifest = self._load_manifest(config_path)
+
+        partial = dict(config)
+        servers = partial.pop("mcpServers", {})
+        if not isinstance(servers, dict):
+            raise ValueError("mcpServers must be an object in the sharded layout")
+
+        for name in self._list_shards(config_path):
+            if name not in servers:
+                self._get_shard_path(config_path, name).unlink()
+        for name, server in servers.items():
+            _write_json(self._get_shard_path(config_path, name), server)
+
+        manifest["config"] = partial
+        manifest["generation"] = manifest.get("generation", 0) + 1
+        _write_json(self._get_manifest_path(config_path), manifest)
+
+    def remove(self, config_path: Path) -> None:
+        shutil.rmtree(self._get_shard_dir(config_path))
+
+
+def _encode_path(keys: List[str]) -> str:
+    """Join key components into a dot-path, escaping dots inside keys."""
+    return ".".join(k.replace("%", "%25").replace(".", "%2E") for k in keys)
+
+
+def _decode_path(path: str) -> List[str]:
+    """Split a dot-path produced by _encode_path back into key components."""
+    return [k.replace("%2E", ".").replace("%25", "%") for k in path.split(".")]
+
+
+def _flatten(value: Any, prefix: List[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (dot-path, JSON leaf) rows for a value; empty dicts are leaves."""
+    if isinstance(value, dict) and value:
+        for k, v in value.items():
+            yield from _flatten(v, prefix + [k])
+    else:
+        yield _encode_path(prefix), json.dumps(value, ensure_ascii=False)
+
+
+def _unflatten(rows: List[Tuple[str, str]], depth: int) -> Any:
+    """Rebuild a tree from rows, dropping the first depth path components."""
+    if len(rows) == 1 and len(_decode_path(rows[0][0])) == depth:
+        return json.loads(rows[0][1])
+
+    tree: dict[str, Any] = {}
+    for path, value in rows:
+        keys = _decode_path(path)[depth:]
+        current = tree
+        for k in keys[:-1]:
+            current = current.setdefault(k, {})
+        current[keys[-1]] = json.loads(value)
+    return tree
+
+
+class SQLiteBackend(BaseStorageBackend):
+    """Stores a scope in an SQLite database of leaf nodes keyed by dot-path.
+
+    The path primary key is a B-tree index, so a key and the subtree below it
+    are found with an exact match plus a path prefix range scan. The database
+    runs in WAL mode, so readers never block the writer or each other.
+    """
+
+    name = "sqlite"
+
+    def _get_db_path(self, config_path: Path) -> Path:
+        return config_path.with_suffix(".db")
+
+    def exists(self, config_path: Path) -> bool:
+        return self._get_db_path(config_path).exists()
+
+    def _connect(self, config_path: Path) -> sqlite3.Connection:
+        db_path = self._get_db_path(config_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS nodes "
+            "(path TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta "
+            "(key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        return conn
+
+    def _etag(self, conn: sqlite3.Connection) -> Etag:
+        """Get the etag of the database: its id and write generation.
+
+        The random id tells a recreated database apart from an older one
+        whose generation counter reached the same value.
+        """
+        rows = dict(
+            conn.execute(
+                "SELECT key, value FROM meta WHERE key IN ('db_id', 'generation')"
+            ).fetchall()
+        )
+        return ("sqlite", rows.get("db_id", 0), rows.get("generation", 0))
+
+    def _subtree(self, conn: sqlite3.Connection, path: str) -> List[Tuple[str, str]]:
+        """Get the rows at path and below it, using the primary key index."""
+        if not path:
+            return conn.execute(
+                "SELECT path, value FROM nodes ORDER BY path"
+            ).fetchall()
+        return conn.execute(
+            "SELECT path, value FROM nodes WHERE path = ? "
+            "OR (path >= ? AND path < ?) ORDER BY path",
+            (path, path + ".", path + "/"),
+        ).fetchall()
+
+    def get_watch_paths(self, config_path: Path) -> List[Path]:
+        # Commits are checkpointed into the database when their connection
+        # closes; the -wal file also changes on plain reads, so it is skipped.
+        return [self._get_db_path(config_path)]
+
+    def get_etag(self, config_path: Path) -> Optional[Etag]:
+        if not self.exists(config_path):
+            return None
+        with closing(self._connect(config_path)) as conn:
+            return self._etag(conn)
+
+    def load(self, config_path: Path) -> Tuple[dict[str, Any], Optional[Etag]]:
+        if not self.exists(config_path):
+            return _default_config(), None
+        with closing(self._connect(config_path)) as conn:
+            conn.execute("BEGIN")
+            rows = self._subtree(conn, "")
+            etag = self._etag(conn)
+            conn.execute("COMMIT")
+        return (_unflatten(rows, 0) if rows else {}), etag
+
+    def get_value(self, config_path: Path, keys: List[str]) -> Any:
+        if not self.exists(config_path):
+            return find(_default_config(), keys)
+        with closing(self._connect(config_path)) as conn:
+            rows = self._subtree(conn, _encode_path(keys))
+            if not rows:
+                return self._missing(conn, keys)
+        return _unflatten(rows, len(keys))
+
+    def _missing(self, conn: sqlite3.Connection, keys: List[str]) -> Any:
+        """Tell whether a key with no rows is MISSING or BLOCKED.
+
+        Only leaves have rows, so a row at an ancestor of the key is the
+        value that blocks it, unless that leaf is an empty dict.
+        """
+        ancestors = [_encode_path(keys[:i]) for i in range(1, len(keys))]
+        if not ancestors:
+            return MISSING
+        row = conn.execute(
+            "SELECT value FROM nodes WHERE path IN "
+            f"({', '.join('?' * len(ancestors))})",
+            ancestors,
+        ).fetchone()
+        return BLOCKED if row is not None and row[0] != "{}" else MISSING
+
+    def _delete(self, conn: sqlite3.Connection, keys: List[str]) -> None:
+        """Delete the node at keys and everything below it."""
+        path = _encode_path(keys)
+        conn.execute(
+            "DELETE FROM nodes WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, path + ".", path + "/"),
+        )
+
+    def _set(self, conn: sqlite3.Connection, keys: List[str], value: Any) -> None:
+        """Replace the node at keys, turning any leaf ancestors into objects."""
+        ancestors = [_encode_path(keys[:i]) for i in range(1, len(keys))]
+        conn.executemany(
+            "DELETE FROM nodes WHERE path = ?", [(path,) for path in ancestors]
+        )
+        self._delete(conn, keys)
+        conn.executemany(
+            "INSERT INTO nodes (path, value) VALUES (?, ?)", _flatten(value, keys)
+        )
+
+    def _apply(self, conn: sqlite3.Connection, operation: Operation) -> None:
+        op, key, value = operation
+        keys = split_key(key)
+        if op == "set":
+            self._set(conn, keys, value)
+        elif op == "delete":
+            self._delete(conn, keys)
+            parent = _encode_path(keys[:-1])
+            if parent and not self._subtree(conn, parent):
+                # Keep the now empty parent object, as the JSON layout would.
+                conn.execute(
+                    "INSERT INTO nodes (path, value) VALUES (?, '{}')", (parent,)
+                )
+        elif op == "merge":
+            rows = self._subtree(conn, _encode_path(keys))
+            current = _unflatten(rows, len(keys)) if rows else {}
+            if not isinstance(current, dict):
+                current = {}
+            deep_merge(current, value)
+            if keys:
+                self._set(conn, keys, current)
+            else:
+                conn.execute("DELETE FROM nodes")
+                conn.executemany(
+                    "INSERT INTO nodes (path, value) VALUES (?, ?)",
+                    _flatten(current, []),
+                )
+        else:
+            raise ValueError(f"Invalid operation: {op}")
+
+    def _bump_generation(self, conn: sqlite3.Connection) -> None:
+        # Every write goes through here, so a new database gets its id here.
+        conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('db_id', ?)",
+            (uuid.uuid4().int >> 65,),
+        )
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('generation', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def commit(self, config_path: Path, operations: List[Operation]) -> bool:
+        with closing(self._connect(config_path)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for operation in operations:
+                    self._apply(conn, operation)
+                self._bump_generation(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return False
+
+    def write(self, config_path: Path, config: dict[str, Any]) -> None:
+        with closing(self._connect(config_path)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM nodes")
+                if config:
+                    conn.executemany(
+                        "INSERT INTO nodes (path, value) VALUES (?, ?)",
+                        _flatten(config, []),
+                    )
+                self._bump_generation(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def compact(self, config_path: Path) -> None:
+        with closing(self._connect(config_path)) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def remove(self, config_path: Path) -> None:
+        db_path = self._get_db_path(config_path)
+        for path in (db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")):
+            if path.exists():
+                path.unlink()
 
 
 class StorageManager:
     """Manages configuration file storage across different scopes and platforms."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        snapshot: bool = True,
+        coalesce_writes: bool = False,
+        journal: bool = False,
+        journal_threshold: int = JOURNAL_COMPACT_THRESHOLD,
+        background_compaction: bool = True,
+        layout: str = "file",
+        project_root: Optional[Path] = None,
+        preloaded: Optional[Dict[str, Tuple[dict[str, Any], Optional[Etag]]]] = None,
+    ):
         self.system = platform.system()
+        # The project scope's directory; the working directory if None.
+        self.project_root = project_root
+        # Scopes already loaded elsewhere (see preload_scopes), served as is.
+        self.preloaded = dict(preloaded or {})
+        self.snapshot = snapshot
+        self.coalesce_writes = coalesce_writes
+        self.background_compaction = background_compaction
+        self.backends: Dict[str, BaseStorageBackend] = {
+            "file": JSONFileBackend(journal, journal_threshold),
+            "sharded": ShardedBackend(),
+            "sqlite": SQLiteBackend(),
+        }
+        if layout not in self.backends:
+            raise ValueError(f"Invalid layout: {layout}")
+        self.layout = layout
 
     def get_config_path(self, scope: str) -> Path:
         """Get configuration file path for the given scope."""
@@ -42,40 +854,356 @@ class StorageManager:
 
         return base / "mcp-config-hub" / "config.json"
 
+    def get_project_root(self) -> Path:
+        """Get the directory of the project scope."""
+        return self.project_root or Path.cwd()
+
     def _get_project_path(self) -> Path:
         """Get project configuration path."""
-        return Path.cwd() / ".mcp-config-hub" / "config.json"
+        return self.get_project_root() / ".mcp-config-hub" / "config.json"
+
+    def get_cache_dir(self) -> Path:
+        """Get the per-user cache directory."""
+        if self.system == "Darwin":
+            base = Path.home() / "Library" / "Caches"
+        elif self.system == "Windows":
+            base = Path(
+                os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local")
+            )
+        else:
+            base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+
+        return base / "mcp-config-hub"
+
+    def get_state_dir(self) -> Path:
+        """Get the per-user directory for sync state that must survive cache wipes."""
+        if self.system == "Darwin":
+            base = Path.home() / "Library" / "Application Support" / "mcp-config-hub"
+            return base / "state"
+        elif self.system == "Windows":
+            base = Path(
+                os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local")
+            )
+            return base / "mcp-config-hub" / "state"
+        else:
+            base = Path(
+                os.environ.get("XDG_STATE_HOME", Path.home() / ".local" / "state")
+            )
+            return base / "mcp-config-hub"
+
+    def get_layout(self, scope: str) -> str:
+        """Get the layout a scope is stored in ("file" if it does not exist)."""
+        return self._get_backend(self.get_config_path(scope)).name
+
+    def _get_backend(self, config_path: Path) -> BaseStorageBackend:
+        """Detect the backend a scope is stored with."""
+        for name in ("sqlite", "sharded"):
+            if self.backends[name].exists(config_path):
+                return self.backends[name]
+        return self.backends["file"]
+
+    def _get_write_backend(self, config_path: Path) -> BaseStorageBackend:
+        """Get the backend to write a scope with, migrating single-file scopes.
+
+        Caller must hold the lock.
+        """
+        backend = self._get_backend(config_path)
+        if backend.name != "file" or self.layout == "file":
+            return backend
+
+        target = self.backends[self.layout]
+        if backend.exists(config_path):
+            target.write(config_path, backend.load(config_path)[0])
+            backend.remove(config_path)
+        return target
+
+    def get_watch_paths(self) -> List[Path]:
+        """Get the files whose changes can change the etag of any scope.
+
+        Every layout's files are included, so scopes migrated while being
+        watched are still covered.
+        """
+        paths: List[Path] = []
+        for scope in SCOPES:
+            config_path = self.get_config_path(scope)
+            for backend in self.backends.values():
+                paths.extend(backend.get_watch_paths(config_path))
+        return paths
+
+    def scope_fingerprints(self) -> Tuple[Optional[Etag], ...]:
+        """Get the etags of the global, user and project scopes."""
+        return tuple(self.get_etag(scope) for scope in SCOPES)
+
+    def _get_snapshot_path(self) -> Path:
+        """Get the merged snapshot path for the current set of scope files."""
+        paths = "\0".join(str(self.get_config_path(scope)) for scope in SCOPES)
+        digest = hashlib.sha256(paths.encode("utf-8")).hexdigest()[:16]
+        return self.get_cache_dir() / "snapshots" / f"merged-{digest}.marshal"
+
+    def load_merged_snapshot(
+        self, fingerprints: Tuple[Optional[Etag], ...]
+    ) -> Optional[dict[str, Any]]:
+        """Load the merged config snapshot if it matches the given fingerprints."""
+        if not self.snapshot:
+            return None
+
+        try:
+            with open(self._get_snapshot_path(), "rb") as f:
+                version, stored, merged = marshal.load(f)  # nosec B302
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if version != SNAPSHOT_VERSION or stored != fingerprints:
+            return None
+        return merged
+
+    def save_merged_snapshot(
+        self,
+        merged: dict[str, Any],
+        fingerprints: Tuple[Optional[Etag], ...],
+    ) -> None:
+        """Persist the merged config, keyed on the scope fingerprints it came from.
+
+        The snapshot is only an accelerator, so failures are ignored.
+        """
+        if not self.snapshot:
+            return
+
+        snapshot_path = self._get_snapshot_path()
+        temp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+        try:
+            snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                marshal.dump((SNAPSHOT_VERSION, fingerprints, merged), f)
+            temp_path.replace(snapshot_path)
+        except (OSError, ValueError):
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
 
     def load_config(self, scope: str) -> dict[str, Any]:
-        """Load configuration from the specified scope."""
+        """Load configuration from the specified scope.
+
+        Parsed files are kept in a process-wide LRU cache keyed on the file
+        path and its stat fingerprint, so an unchanged file is parsed once.
+        """
+        return self.load_config_with_etag(scope)[0]
+
+    def load_config_with_etag(
+        self, scope: str
+    ) -> Tuple[dict[str, Any], Optional[Etag]]:
+        """Load configuration together with the etag of the scope.
+
+        The etag is None if the scope is not stored yet, and can be passed
+        back to save_config as expected_etag.
+        """
+        if scope in self.preloaded:
+            config, etag = self.preloaded[scope]
+            return _copy_tree(config), etag
         config_path = self.get_config_path(scope)
+        return self._get_backend(config_path).load(config_path)
 
-        if not config_path.exists():
-            return self._get_default_config()
+    def preload_scopes(
+        self, scopes: List[str]
+    ) -> Dict[str, Tuple[dict[str, Any], Optional[Etag]]]:
+        """Load scopes once to share them with other storage managers.
 
-        try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return self._get_default_config()
+        The result can be passed as preloaded to StorageManagers of other
+        projects or processes, which then read those scopes from memory.
+        """
+        return {scope: self.load_config_with_etag(scope) for scope in scopes}
+
+    def get_value(self, scope: str, key: str, default: Any = None) -> Any:
+        """Get a value by dot notation key, reading as little of the scope as possible.
+
+        The sharded layout only reads the shard of the server the key names,
+        and SQLite only queries the rows under the key.
+        """
+        value = self.find_value(scope, key)
+        return default if value is MISSING or value is BLOCKED else value
 
-    def save_config(self, config: dict[str, Any], scope: str) -> None:
-        """Save configuration to the specified scope."""
+    def find_value(self, scope: str, key: str) -> Any:
+        """Like get_value, but return MISSING or BLOCKED (see find) if not found."""
+        if scope in self.preloaded:
+            return _copy_tree(find(self.preloaded[scope][0], split_key(key)))
         config_path = self.get_config_path(scope)
+        return self._get_backend(config_path).get_value(config_path, split_key(key))
 
-        config_path.parent.mkdir(parents=True, exist_ok=True)
+    def get_etag(self, scope: str) -> Optional[Etag]:
+        """Get the current etag of a scope."""
+        if scope in self.preloaded:
+            return self.preloaded[scope][1]
+        config_path = self.get_config_path(scope)
+        return self._get_backend(config_path).get_etag(config_path)
 
-        temp_path = config_path.with_suffix(".tmp")
+    @contextmanager
+    def lock(self, scope: str) -> Iterator[None]:
+        """Hold the advisory write lock of a scope file.
+
+        The scope is written under the lock, so its preloaded copy is dropped.
+        """
+        self.preloaded.pop(scope, None)
+        config_path = self.get_config_path(scope)
+        file_lock = _FileLock.for_path(
+            config_path.with_name(config_path.name + ".lock")
+        )
+        file_lock.acquire()
         try:
-            with open(temp_path, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            yield
+        finally:
+            file_lock.release()
 
-            temp_path.replace(config_path)
-        except Exception:
-            if temp_path.exists():
-                temp_path.unlink()
-            raise
+    def save_config(
+        self,
+        config: dict[str, Any],
+        scope: str,
+        expected_etag: Any = _ANY_ETAG,
+    ) -> None:
+        """Save configuration to the specified scope.
+
+        If expected_etag is given, the write only happens when the scope still
+        has that etag; otherwise ConcurrentModificationError is raised.
+        """
+        with self.lock(scope):
+            if expected_etag is not _ANY_ETAG and self.get_etag(scope) != expected_etag:
+                raise ConcurrentModificationError(
+                    f"{scope} configuration changed since it was read"
+                )
+            config_path = self.get_config_path(scope)
+            self._get_write_backend(config_path).write(config_path, config)
+
+    def commit_operations(
+        self,
+        scope: str,
+        operations: List[Operation],
+        expected_etag: Optional[Etag],
+        on_conflict: str = "retry",
+    ) -> bool:
+        """Commit the operations of a read-modify-write on a scope.
+
+        The operations are applied to the current contents of the scope. If
+        the scope no longer has expected_etag and on_conflict is "fail",
+        ConcurrentModificationError is raised instead. Returns True if the
+        scope was still at expected_etag and no other writer's operations
+        were committed along with these.
+
+        With coalesce_writes enabled, the operations are first queued next to
+        the scope file. Whichever writer holds the lock applies every queued
+        batch in a single write, so a waiting writer usually finds its batch
+        already committed when it gets the lock. Commits with on_conflict
+        "fail" are never queued, as their etag must be checked before their
+        operations can be applied.
+
+        How the operations are written is up to the scope's backend: the
+        single-file layout rewrites or journals the file, the sharded layout
+        rewrites the affected shards and SQLite updates the affected rows. A
+        single-file scope is migrated to this manager's layout on its first
+        write.
+        """
+        if on_conflict not in ("retry", "fail"):
+            raise ValueError(f"Invalid conflict policy: {on_conflict}")
+
+        ticket = (
+            self._enqueue_operations(scope, operations)
+            if self.coalesce_writes and on_conflict == "retry"
+            else None
+        )
+
+        with self.lock(scope):
+            if (
+                ticket is not None
+                and not ticket.exists()
+                and not ticket.with_suffix(".bad").exists()
+            ):
+                return False
+
+            conflict = self.get_etag(scope) != expected_etag
+            if conflict and on_conflict == "fail":
+                raise ConcurrentModificationError(
+                    f"{scope} configuration changed since it was read"
+                )
+
+            drained, queued = self._drain_operations(scope)
+            if ticket is not None and ticket not in drained:
+                # Our own batch could not be read back, so commit it from memory.
+                ticket.with_suffix(".bad").unlink()
+                ticket = None
+            # With a ticket, our own batch is among the queued ones.
+            pending = queued if ticket is not None else operations + queued
+
+            config_path = self.get_config_path(scope)
+            backend = self._get_write_backend(config_path)
+            needs_compaction = backend.commit(config_path, pending)
+
+            for path in drained:
+                path.unlink()
+
+        if needs_compaction:
+            if self.background_compaction:
+                threading.Thread(target=self.compact, args=(scope,)).start()
+            else:
+                self.compact(scope)
+        return not conflict and len(pending) == len(operations)
+
+    def compact(self, scope: str) -> None:
+        """Compact a scope, e.g. fold its change journal into the scope file."""
+        with self.lock(scope):
+            config_path = self.get_config_path(scope)
+            self._get_backend(config_path).compact(config_path)
+
+    def migrate(self, scope: str) -> None:
+        """Convert a scope to this manager's layout."""
+        with self.lock(scope):
+            config_path = self.get_config_path(scope)
+            backend = self._get_backend(config_path)
+            if backend.name == self.layout:
+                return
+            config = backend.load(config_path)[0]
+            self.backends[self.layout].write(config_path, config)
+            if backend.exists(config_path):
+                backend.remove(config_path)
+
+    def _get_queue_dir(self, scope: str) -> Path:
+        """Get the directory holding operation batches waiting for the lock."""
+        config_path = self.get_config_path(scope)
+        return config_path.with_name(config_path.name + ".pending")
+
+    def _enqueue_operations(self, scope: str, operations: List[Operation]) -> Path:
+        """Queue a batch of operations for the current lock holder to commit."""
+        queue_dir = self._get_queue_dir(scope)
+        queue_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        temp_path = queue_dir / f"{name}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump([list(operation) for operation in operations], f)
+        ticket = queue_dir / f"{name}.json"
+        temp_path.replace(ticket)
+        return ticket
+
+    def _drain_operations(self, scope: str) -> Tuple[List[Path], List[Operation]]:
+        """Collect every queued batch. Caller must hold the lock.
+
+        A batch that cannot be read is renamed to .bad and left out, so its
+        file is kept rather than deleted along with the drained ones.
+        """
+        queue_dir = self._get_queue_dir(scope)
+        if not queue_dir.is_dir():
+            return [], []
+
+        drained: List[Path] = []
+        operations: List[Operation] = []
+        for path in sorted(queue_dir.glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    batch = [(op, key, value) for op, key, value in json.load(f)]
+            except (ValueError, TypeError, IOError):
+                path.replace(path.with_suffix(".bad"))
+                continue
+            drained.append(path)
+            operations.extend(batch)
+        return drained, operations
 
     def _get_default_config(self) -> dict[str, Any]:
         """Get default configuration structure."""
-        return {"mcpServers": {}}
+        return _default_config()
@@ -0,0 +1,221 @@
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .diff_utils import changes_to_patch, iter_summary, summarize_changes
+from .file_utils import WriteResult, remove_file, write_text
+from .integrations import get_integration
+from .prompt_files import DigestCache
+
+# Bump when the saved plan layout changes; older plans are then rejected.
+PLAN_VERSION = 1
+
+
+class FileChange(NamedTuple):
+    """A single file write planned for a tool.
+
+    op is "patch" (value is a JSON Patch for the tool's config), "write"
+    (value is the new file content) or "remove". path is portable, see
+    to_portable_path.
+    """
+
+    tool: str
+    path: str
+    op: str
+    value: Any = None
+
+
+class ToolPlan(NamedTuple):
+    """What a plan does for one tool.
+
+    servers are recorded as the tool's sync base once the plan is applied
+    (None if the tool was already in sync); changes counts the config and
+    prompt file changes, and summary holds the lines shown before applying.
+    """
+
+    servers: Optional[Dict[str, Any]]
+    changes: int
+    summary: List[str]
+
+
+def to_portable_path(path: Path, project_root: Optional[Path] = None) -> str:
+    """Store path relative to the project or home when under them.
+
+    The project defaults to the working directory. Plans can then be
+    applied from another checkout or by another user.
+    """
+    path = path.absolute()
+    for base, prefix in ((project_root or Path.cwd(), ""), (Path.home(), "~/")):
+        try:
+            return prefix + path.relative_to(base).as_posix()
+        except ValueError:
+            continue
+    return str(path)
+
+
+def from_portable_path(path: str, project_root: Optional[Path] = None) -> Path:
+    """Resolve a path stored by to_portable_path."""
+    if path.startswith("~/"):
+        return Path.home() / path[2:]
+    return (project_root or Path.cwd()) / path
+
+
+def is_project_path(path: str) -> bool:
+    """Check whether a path stored by to_portable_path is inside the project."""
+    return not path.startswith("~/") and not Path(path).is_absolute()
+
+
+def plan_tool(
+    tool: str,
+    integration: Any,
+    hub_config: Dict[str, Any],
+    servers: Dict[str, Any],
+    digests: Optional[DigestCache] = None,
+) -> Tuple[List[FileChange], ToolPlan]:
+    """Plan the sync of hub_config to one integration, without writing.
+
+    servers are the hub servers to record as the tool's sync base; digests
+    is shared by the tools of a plan so the hub prompt is hashed once.
+    """
+    root = integration.project_root
+    config_changes = integration.changes_from_hub(hub_config)
+    summary = [*iter_summary(summarize_changes(config_changes))]
+    changes = []
+    if config_changes:
+        path = to_portable_path(integration.get_write_path(), root)
+        patch = changes_to_patch(config_changes)
+        changes.append(FileChange(tool, path, "patch", patch))
+    for path, content in integration.plan_prompt_files(hub_config, digests).items():
+        op = "remove" if content is None else "write"
+        changes.append(FileChange(tool, to_portable_path(path, root), op, content))
+        summary.append(f"{op} {path}")
+    count = len(config_changes) + len(changes) - bool(config_changes)
+    return changes, ToolPlan(servers, count, summary)
+
+
+class SyncPlan:
+    """Every file change a sync from MCP Config Hub makes, across tools.
+
+    A plan is computed without writing anything, can be saved and loaded as
+    JSON, and is applied as a whole: originals are backed up first and
+    restored if any write fails. Relative paths are resolved against
+    project_root, or the working directory if None; it is not saved.
+    """
+
+    def __init__(
+        self,
+        changes: Optional[List[FileChange]] = None,
+        tools: Optional[Dict[str, ToolPlan]] = None,
+        project_root: Optional[Path] = None,
+    ):
+        self.changes = changes or []
+        self.tools = tools or {}
+        self.project_root = project_root
+
+    def add(self, tool: str, changes: List[FileChange], tool_plan: ToolPlan) -> None:
+        """Add the planned changes of one tool."""
+        self.changes.extend(changes)
+        self.tools[tool] = tool_plan
+
+    def project_only(self) -> "SyncPlan":
+        """Get the plan without its changes to files outside the project.
+
+        Tools that lose changes are not recorded as synced when the plan is
+        applied, so they are planned again by the next sync.
+        """
+        plan = SyncPlan(project_root=self.project_root)
+        for tool, tool_plan in self.tools.items():
+            changes = [change for change in self.changes if change.tool == tool]
+            kept = [change for change in changes if is_project_path(change.path)]
+            if len(kept) < len(changes):
+                summary = [f"{change.op} {change.path}" for change in kept]
+                tool_plan = ToolPlan(None, len(kept), summary)
+            plan.add(tool, kept, tool_plan)
+        return plan
+
+    def is_empty(self) -> bool:
+        """Check whether applying the plan writes nothing."""
+        return not self.changes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": PLAN_VERSION,
+            "tools": {tool: plan._asdict() for tool, plan in self.tools.items()},
+            "changes": [change._asdict() for change in self.changes],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SyncPlan":
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported sync plan version: {data.get('version')}")
+        return cls(
+            [FileChange(**change) for change in data["changes"]],
+            {tool: ToolPlan(**plan) for tool, plan in data["tools"].items()},
+        )
+
+    def save(self, path: Path) -> None:
+        """Save the plan as JSON."""
+        write_text(path, json.dumps(self.to_dict(), indent=2, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path: Path) -> "SyncPlan":
+        """Load a plan saved with save."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def _resolve(self) -> List[Tuple[Path, Optional[str]]]:
+        """Get each target file and its new content, None to remove it."""
+        resolved: List[Tuple[Path, Optional[str]]] = []
+        for change in self.changes:
+            if change.op == "patch":
+                integration = get_integration(change.tool, self.project_root)
+                content = integration.render_patch(change.value)
+                resolved.append((integration.get_write_path(), content))
+            elif change.op == "write":
+                path = from_portable_path(change.path, self.project_root)
+                resolved.append((path, change.value))
+            elif change.op == "remove":
+                path = from_portable_path(change.path, self.project_root)
+                resolved.append((path, None))
+            else:
+                raise ValueError(f"Invalid plan operation: {change.op}")
+        return resolved
+
+    def apply(self, backup_dir: Path) -> List[WriteResult]:
+        """Apply every change of the plan, all or nothing.
+
+        The files about to change are copied to backup_dir before anything
+        is written. Each write is atomic and flushed to disk; if one fails,
+        the files already written are restored from the backups and the error
+        is re-raised, keeping backup_dir. On success backup_dir is removed.
+        Returns the result of each write.
+        """
+        resolved = self._resolve()
+
+        backups: List[Tuple[Path, Optional[Path]]] = []
+        for i, (path, _) in enumerate(resolved):
+            backup = None
+            if path.exists():
+                backup_dir.mkdir(parents=True, exist_ok=True)
+                backup = backup_dir / f"{i}-{path.name}"
+                shutil.copy2(path, backup)
+            backups.append((path, backup))
+
+        results: List[WriteResult] = []
+        try:
+            for path, content in resolved:
+                if content is None:
+                    results.append(remove_file(path))
+                else:
+                    results.append(write_text(path, content, fsync=True))
+        except Exception:
+            # Writes are atomic, so the failed file itself is untouched.
+            for path, backup in reversed(backups[: len(results)]):
+                if backup is None:
+                    remove_file(path)
+                else:
+                    write_text(path, backup.read_text(encoding="utf-8"))
+            raise
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        return results
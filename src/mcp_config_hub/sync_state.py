@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .file_utils import file_digest, write_text
+from .tree_utils import MISSING
+
+# Bump when the stored base layout changes; older bases are then ignored.
+SYNC_BASE_VERSION = 1
+# Bump when the ledger entry layout changes; older entries are then ignored.
+LEDGER_VERSION = 1
+
+
+def _state_file_name(
+    tool: str, config_path: Path, project_root: Optional[Path] = None
+) -> str:
+    # Project-level tool configs depend on the project directory too.
+    key = "\0".join((tool, str(config_path), str(project_root or Path.cwd())))
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return f"{tool}-{digest}.json"
+
+
+def write_state_file(path: Path, data: Dict[str, Any]) -> None:
+    """Write a JSON state file atomically."""
+    write_text(path, json.dumps(data, indent=2, ensure_ascii=False))
+
+
+def read_state_file(path: Path, version: int) -> Optional[Dict[str, Any]]:
+    """Read a JSON state file, or None if it is unreadable or of another version."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != version:
+        return None
+    return data
+
+
+class SyncBaseStore:
+    """Stores, per tool config file, the servers both sides agreed on at the last sync.
+
+    The stored servers are the common ancestor for three-way merges between
+    the hub and the tool.
+    """
+
+    def __init__(self, state_dir: Path, project_root: Optional[Path] = None):
+        self.state_dir = state_dir
+        self.project_root = project_root
+
+    def _get_base_path(self, tool: str, config_path: Path) -> Path:
+        name = _state_file_name(tool, config_path, self.project_root)
+        return self.state_dir / "sync-base" / name
+
+    def load(self, tool: str, config_path: Path) -> Optional[Dict[str, Any]]:
+        """Load the base servers of a tool, or None if it was never synced."""
+        data = read_state_file(
+            self._get_base_path(tool, config_path), SYNC_BASE_VERSION
+        )
+        return None if data is None else data["servers"]
+
+    def save(self, tool: str, config_path: Path, servers: Dict[str, Any]) -> None:
+        """Record the servers a sync of a tool ended with."""
+        write_state_file(
+            self._get_base_path(tool, config_path),
+            {"version": SYNC_BASE_VERSION, "tool": tool, "servers": servers},
+        )
+
+
+def file_state(path: Path) -> Optional[List[Any]]:
+    """Get [mtime_ns, size, inode] of a file, or None if it does not exist.
+
+    This changes whenever the file is written or replaced.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+class SyncLedger:
+    """Records, per tool and sync direction, the state the last sync left behind.
+
+    An entry holds the stat and content hash of every file of the tool and,
+    for syncs from the hub, the hub scope versions the sync was computed
+    from. A sync with nothing to do is then detected with a few stat calls,
+    before any parsing.
+    """
+
+    def __init__(self, state_dir: Path, project_root: Optional[Path] = None):
+        self.state_dir = state_dir
+        self.project_root = project_root
+
+    def _get_entry_path(self, tool: str, direction: str, config_path: Path) -> Path:
+        name = _state_file_name(tool, config_path, self.project_root)
+        return self.state_dir / "ledger" / direction / name
+
+    def record(
+        self,
+        tool: str,
+        direction: str,
+        config_path: Path,
+        paths: List[Path],
+        hub_version: Any = None,
+    ) -> None:
+        """Record the state of the tool's files after a sync in direction."""
+        files = {}
+        for path in paths:
+            state = file_state(path)
+            files[str(path)] = state and state + [file_digest(path)]
+        write_state_file(
+            self._get_entry_path(tool, direction, config_path),
+            {
+                "version": LEDGER_VERSION,
+                "hub": _normalize(hub_version),
+                "files": files,
+            },
+        )
+
+    def is_current(
+        self,
+        tool: str,
+        direction: str,
+        config_path: Path,
+        paths: List[Path],
+        hub_version: Any = None,
+    ) -> bool:
+        """Check whether nothing changed since the last recorded sync in direction."""
+        return self._check(tool, direction, config_path, paths, _normalize(hub_version))
+
+    def files_unchanged(
+        self, tool: str, direction: str, config_path: Path, paths: List[Path]
+    ) -> bool:
+        """Check whether the tool's files are as the last sync in direction left them.
+
+        Unlike is_current, changes to the hub are not considered.
+        """
+        return self._check(tool, direction, config_path, paths, MISSING)
+
+    def _check(
+        self,
+        tool: str,
+        direction: str,
+        config_path: Path,
+        paths: List[Path],
+        hub_version: Any,
+    ) -> bool:
+        entry_path = self._get_entry_path(tool, direction, config_path)
+        entry = read_state_file(entry_path, LEDGER_VERSION)
+        if entry is None or entry["files"].keys() != {str(p) for p in paths}:
+            return False
+        if hub_version is not MISSING and entry["hub"] != hub_version:
+            return False
+
+        refreshed = False
+        for path in paths:
+            recorded = entry["files"][str(path)]
+            state = file_state(path)
+            if state is None or recorded is None:
+                if state != recorded:
+                    return False
+            elif state != recorded[:3]:
+                # Touched but maybe not modified (e.g. by a checkout).
+                if file_digest(path) != recorded[3]:
+                    return False
+                entry["files"][str(path)] = state + [recorded[3]]
+                refreshed = True
+
+        if refreshed:
+            write_state_file(entry_path, entry)
+        return True
+
+
+def _normalize(hub_version: Any) -> Any:
+    """Convert a hub version to its JSON form, so stored versions compare equal."""
+    return json.loads(json.dumps(hub_version, default=str))
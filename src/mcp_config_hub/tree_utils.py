@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, Tuple
+
+# A recorded mutation: ("set", key, value), ("delete", key, None) or
+# ("merge", key, value), with keys in dot notation.
+Operation = Tuple[str, str, Any]
+
+# Returned by lookup() when a key is not present.
+MISSING: Any = object()
+
+# Returned by find() when a key path runs through a value that is not a dict.
+BLOCKED: Any = object()
+
+
+def split_key(key: str) -> List[str]:
+    """Split a dot notation key into its path components."""
+    return key.split(".") if key else []
+
+
+def lookup(config: Any, keys: List[str]) -> Any:
+    """Get the value at a key path, or MISSING if it is not present."""
+    current = config
+
+    for k in keys:
+        if not isinstance(current, dict) or k not in current:
+            return MISSING
+        current = current[k]
+
+    return current
+
+
+def find(config: Any, keys: List[str]) -> Any:
+    """Like lookup(), but tell a key blocked by a non-dict value apart.
+
+    Returns BLOCKED if the path runs through a value that is not a dict, and
+    MISSING if the key is absent from a dict on the path.
+    """
+    current = config
+
+    for k in keys:
+        if not isinstance(current, dict):
+            return BLOCKED
+        if k not in current:
+            return MISSING
+        current = current[k]
+
+    return current
+
+
+def get_nested(config: Dict[str, Any], key: str) -> Any:
+    """Get nested value using dot notation. Returns None if not found."""
+    value = lookup(config, split_key(key))
+    return None if value is MISSING else value
+
+
+def _ensure_dict(config: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
+    """Walk keys, replacing missing or non-dict nodes with empty dicts."""
+    current = config
+
+    for k in keys:
+        if k not in current or not isinstance(current[k], dict):
+            current[k] = {}
+        current = current[k]
+
+    return current
+
+
+def set_nested(config: Dict[str, Any], key: str, value: Any) -> None:
+    """Set nested value using dot notation, creating parents as needed."""
+    keys = split_key(key)
+    _ensure_dict(config, keys[:-1])[keys[-1]] = value
+
+
+def delete_nested(config: Dict[str, Any], key: str) -> bool:
+    """Delete nested value using dot notation. Returns True if deleted."""
+    keys = split_key(key)
+    current = config
+
+    for k in keys[:-1]:
+        if k not in current or not isinstance(current[k], dict):
+            return False
+        current = current[k]
+
+    if keys and keys[-1] in current:
+        del current[keys[-1]]
+        return True
+    return False
+
+
+def deep_merge(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+    """Deep merge source into target dictionary."""
+    for key, value in source.items():
+        if key in target and isinstance(target[key], dict) and isinstance(value, dict):
+            deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+
+def merge_nested(config: Dict[str, Any], key: str, value: Dict[str, Any]) -> None:
+    """Deep merge value into the dict at key (the root when key is empty)."""
+    deep_merge(_ensure_dict(config, split_key(key)), value)
+
+
+def apply_operation(config: Dict[str, Any], operation: Operation) -> bool:
+    """Apply a recorded operation to config. Returns False if it was a no-op."""
+    op, key, value = operation
+    if op == "set":
+        set_nested(config, key, value)
+    elif op == "delete":
+        return delete_nested(config, key)
+    elif op == "merge":
+        merge_nested(config, key, value)
+    else:
+        raise ValueError(f"Invalid operation: {op}")
+    return True
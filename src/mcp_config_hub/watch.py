@@ -0,0 +1,185 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set
+
+# inotify(7) event masks.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+
+
+class ChangeWatcher:
+    """Base class for waiting on changes to a set of files.
+
+    Watchers only signal that something may have changed; callers confirm
+    changes by comparing versions (e.g. storage etags).
+    """
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds; return True if something may have changed."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the watcher's resources."""
+        pass
+
+
+class PollingWatcher(ChangeWatcher):
+    """Watcher that wakes up every interval seconds."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(max(0.0, min(self.interval, timeout)))
+        return True
+
+
+def _watch_target(path: Path) -> Optional[Path]:
+    """Get the directory to watch for changes to path.
+
+    This is the file's directory, or its nearest existing ancestor so that
+    the directory being created is noticed.
+    """
+    for directory in path.parents:
+        if directory.is_dir():
+            return directory
+    return None
+
+
+# struct inotify_event without its variable-length name.
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher(ChangeWatcher):
+    """Watcher using Linux inotify on the directories of the watched files.
+
+    Directories are watched rather than files, so atomic replaces and files
+    that do not exist yet are noticed too. Events on other files in those
+    directories (locks, temporary files) are ignored.
+    """
+
+    def __init__(self, paths: Iterable[Path]):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = [*paths]
+        # The watched files and their ancestors, whose creation matters too.
+        self._relevant: Set[Path] = set()
+        for path in self.paths:
+            self._relevant.add(path)
+            self._relevant.update(path.parents)
+        self._dirs: Dict[int, Path] = {}
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Watch the current target directory of every path.
+
+        Adding a watch that already exists is a no-op, so this is called
+        after every event to pick up newly created directories.
+        """
+        for path in self.paths:
+            target = _watch_target(path)
+            if target is not None:
+                wd = self._libc.inotify_add_watch(
+                    self._fd, os.fsencode(target), WATCH_MASK
+                )
+                if wd >= 0:
+                    self._dirs[wd] = target
+
+    def _read_events(self) -> bool:
+        """Drain pending events; return True if any concerns a watched path."""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    relevant = True
+                elif wd in self._dirs:
+                    path = self._dirs[wd] / os.fsdecode(name)
+                    relevant = relevant or path in self._relevant
+
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not readable:
+            return False
+        relevant = self._read_events()
+        self._refresh()
+        return relevant
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(
+    paths: Iterable[Path], poll_interval: float = 1.0, poll: bool = False
+) -> ChangeWatcher:
+    """Get an inotify watcher for paths, or a polling one where unavailable."""
+    if not poll:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(poll_interval)
+
+
+def watch_changes(
+    watcher: ChangeWatcher,
+    get_version: Callable[[], Any],
+    debounce: float = 0.5,
+    timeout: float = 1.0,
+    stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Any]:
+    """Yield the new version each time get_version changes.
+
+    A burst of changes is coalesced: a version is only yielded once it has
+    been stable for debounce seconds. Runs until stop returns True.
+    """
+    last = get_version()
+    while stop is None or not stop():
+        if not watcher.wait(timeout):
+            continue
+        current = get_version()
+        if current == last:
+            continue
+
+        deadline = time.monotonic() + debounce
+        while (remaining := deadline - time.monotonic()) > 0:
+            if watcher.wait(remaining):
+                version = get_version()
+                if version != current:
+                    current = version
+                    deadline = time.monotonic() + debounce
+        last = current
+        yield current
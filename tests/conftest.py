@@ -5,5 +5,8 @@ import pytest
 def patch_home_and_cwd(tmp_path, monkeypatch):
     # Patch HOME and CWD to tmp_path for isolation
     monkeypatch.setenv("HOME", str(tmp_path))
+    # Keep the cache and state directories under HOME as well
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    monkeypatch.delenv("XDG_STATE_HOME", raising=False)
     monkeypatch.chdir(tmp_path)
     yield
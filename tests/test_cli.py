@@ -0,0 +1,290 @@
+import json
+import platform
+
+from click.testing import CliRunner
+
+from mcp_config_hub.cli import cli
+from mcp_config_hub.integrations import ClaudeDesktopIntegration, CursorIntegration
+from mcp_config_hub.storage import StorageManager
+
+
+def _write_tool_servers(servers):
+    ClaudeDesktopIntegration().write_config({"mcpServers": servers})
+
+
+def _read_tool_servers():
+    with open(ClaudeDesktopIntegration().get_config_path(), encoding="utf-8") as f:
+        return json.load(f)["mcpServers"]
+
+
+def test_sync_three_way_merge_keeps_both_sides(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    runner.invoke(cli, ["set", "mcpServers.b", '{"command": "b"}'])
+    assert runner.invoke(cli, ["sync", "claude", "--force"]).exit_code == 0
+
+    _write_tool_servers({"a": {"command": "a-tool"}, "b": {"command": "b"}})
+    runner.invoke(cli, ["set", "mcpServers.b.command", "b-hub"])
+    result = runner.invoke(cli, ["sync", "claude", "--force"])
+    assert result.exit_code == 0, result.output
+    assert _read_tool_servers() == {
+        "a": {"command": "a-tool"},
+        "b": {"command": "b-hub"},
+    }
+
+    result = runner.invoke(cli, ["sync", "claude", "--direction", "to-hub"])
+    assert result.exit_code == 0, result.output
+    assert runner.invoke(cli, ["get", "mcpServers.a.command"]).output == '"a-tool"\n'
+
+
+def test_sync_reports_conflicts(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    assert runner.invoke(cli, ["sync", "claude", "--force"]).exit_code == 0
+
+    _write_tool_servers({"a": {"command": "a-tool"}})
+    runner.invoke(cli, ["set", "mcpServers.a.command", "a-hub"])
+    result = runner.invoke(cli, ["sync", "claude", "--force"])
+    assert result.exit_code == 1
+    assert "a (use --on-conflict" in result.output
+    assert _read_tool_servers() == {"a": {"command": "a-tool"}}
+
+    result = runner.invoke(cli, ["sync", "claude", "--force", "--on-conflict", "hub"])
+    assert result.exit_code == 0, result.output
+    assert _read_tool_servers() == {"a": {"command": "a-hub"}}
+
+
+def test_sync_confirmation_shows_summary_then_diff(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    _write_tool_servers({"b": {"command": "b"}})
+
+    result = runner.invoke(cli, ["sync", "claude"], input="d\ny\n")
+    assert result.exit_code == 0, result.output
+    summary, _, detail = result.output.partition("[d]iff")
+    assert "mcpServers: 1 added, 1 removed" in summary
+    assert '"command"' not in summary
+    assert '+    "a": {' in detail
+    assert _read_tool_servers() == {"a": {"command": "a"}}
+
+
+def test_sync_all_reports_per_tool_results(monkeypatch):
+    from mcp_config_hub.integrations import CursorIntegration
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    result = runner.invoke(cli, ["sync", "all", "--tools", "claude,cursor", "--force"])
+    assert result.exit_code == 0, result.output
+    assert "Claude Desktop   synced (1 changes)" in result.output
+    assert CursorIntegration().read_config() == {"mcpServers": {"a": {"command": "a"}}}
+
+    # A conflict in one tool fails that tool only.
+    _write_tool_servers({"a": {"command": "a-tool"}})
+    runner.invoke(cli, ["set", "mcpServers.a.command", "a-hub"])
+    result = runner.invoke(cli, ["sync", "all", "--tools", "claude,cursor", "--force"])
+    assert result.exit_code == 1
+    assert "Claude Desktop   failed: Servers changed" in result.output
+    assert "Cursor           synced (1 changes)" in result.output
+    assert _read_tool_servers() == {"a": {"command": "a-tool"}}
+
+
+def test_sync_all_rejects_unknown_tools():
+    result = CliRunner().invoke(cli, ["sync", "all", "--tools", "claude,emacs"])
+    assert result.exit_code == 1
+    assert "Unsupported tool: emacs" in result.output
+
+
+def test_sync_plan_saved_and_applied_without_recomputation(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+
+    result = runner.invoke(cli, ["sync", "plan", "--tools", "claude", "-o", "p.json"])
+    assert result.exit_code == 0, result.output
+    assert "mcpServers: 1 added" in result.output
+    assert not ClaudeDesktopIntegration().get_config_path().exists()
+
+    # Hub changes after planning are not picked up by the saved plan.
+    runner.invoke(cli, ["set", "mcpServers.b", '{"command": "b"}'])
+    result = runner.invoke(cli, ["sync", "apply", "p.json", "--force"])
+    assert result.exit_code == 0, result.output
+    assert "Claude Desktop   synced (1 changes)" in result.output
+    assert _read_tool_servers() == {"a": {"command": "a"}}
+    state_dir = StorageManager().get_state_dir()
+    assert not [*state_dir.glob("backups/*")]
+
+
+def test_noop_sync_skips_reading_tool_config(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    assert runner.invoke(cli, ["sync", "claude", "--force"]).exit_code == 0
+
+    def fail(self):
+        raise AssertionError("tool config read")
+
+    with monkeypatch.context() as m:
+        m.setattr(ClaudeDesktopIntegration, "read_config", fail)
+        result = runner.invoke(cli, ["sync", "claude"])
+        assert result.exit_code == 0, result.output
+        assert "No changes needed" in result.output
+
+    runner.invoke(cli, ["set", "mcpServers.a.command", "b"])
+    assert runner.invoke(cli, ["sync", "claude", "--force"]).exit_code == 0
+    assert _read_tool_servers() == {"a": {"command": "b"}}
+
+
+def test_watch_syncs_only_affected_tools(monkeypatch, capsys):
+    from mcp_config_hub.cli import _watch
+    from mcp_config_hub.storage import StorageManager
+    from mcp_config_hub.watch import ChangeWatcher
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    runner.invoke(cli, ["sync", "all", "--tools", "claude,cursor", "--force"])
+
+    class EditingWatcher(ChangeWatcher):
+        calls = 0
+
+        def wait(self, timeout):
+            self.calls += 1
+            if self.calls == 1:
+                runner.invoke(cli, ["set-prompt", "Be brief.", "--scope", "user"])
+            return True
+
+    watcher = EditingWatcher()
+    _watch(
+        StorageManager(),
+        ["claude", "cursor"],
+        "from-hub",
+        "fail",
+        watcher,
+        debounce=0.01,
+        stop=lambda: watcher.calls > 3,
+    )
+    output = capsys.readouterr().out
+    assert "Cursor           synced (1 changes)" in output
+    assert "Claude Desktop" not in output
+
+
+def test_watch_imports_tool_edits_without_echo(monkeypatch, capsys):
+    from mcp_config_hub.cli import _watch
+    from mcp_config_hub.integrations import CursorIntegration
+    from mcp_config_hub.storage import StorageManager
+    from mcp_config_hub.watch import ChangeWatcher
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    runner.invoke(cli, ["sync", "all", "--tools", "claude,cursor", "--force"])
+
+    class EditingWatcher(ChangeWatcher):
+        calls = 0
+
+        def wait(self, timeout):
+            self.calls += 1
+            if self.calls == 1:
+                cursor = CursorIntegration()
+                config = cursor.read_config()
+                config["mcpServers"]["b"] = {"command": "b"}
+                cursor.write_config(config)
+            return True
+
+    watcher = EditingWatcher()
+    _watch(
+        StorageManager(),
+        ["claude", "cursor"],
+        "both",
+        "fail",
+        watcher,
+        debounce=0.01,
+        stop=lambda: watcher.calls > 6,
+    )
+    output = capsys.readouterr().out
+    assert output.count("imported") == 1
+    assert "Cursor           imported (1 changes)" in output
+    assert "Claude Desktop   synced (1 changes)" in output
+    assert _read_tool_servers() == {"a": {"command": "a"}, "b": {"command": "b"}}
+
+
+def test_sync_routes_selected_servers_only(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a", "tags": ["web"]}'])
+    runner.invoke(cli, ["set", "mcpServers.heavy", '{"command": "h"}'])
+    runner.invoke(cli, ["set", "routing.claude.exclude", '["heavy"]'])
+    result = runner.invoke(cli, ["sync", "all", "--tools", "claude", "--force"])
+    assert result.exit_code == 0, result.output
+    assert _read_tool_servers() == {"a": {"command": "a"}}
+
+    # Servers not routed to the tool are not deleted by an import, and the
+    # hub keeps the tags of servers edited in the tool.
+    _write_tool_servers({"a": {"command": "a-tool"}})
+    result = runner.invoke(cli, ["sync", "claude", "--direction", "to-hub"])
+    assert result.exit_code == 0, result.output
+    servers = json.loads(runner.invoke(cli, ["get", "mcpServers"]).output)
+    assert servers == {
+        "a": {"command": "a-tool", "tags": ["web"]},
+        "heavy": {"command": "h"},
+    }
+
+    result = runner.invoke(cli, ["sync", "claude", "--force", "--tag", "none"])
+    assert result.exit_code == 0, result.output
+    assert _read_tool_servers() == {}
+
+
+def test_sync_all_fans_out_to_projects(tmp_path, monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    for name in ("p1", "p2"):
+        project = tmp_path / "projects" / name
+        (project / ".claude").mkdir(parents=True)
+        (project / ".claude" / "settings.json").write_text("{}")
+        monkeypatch.chdir(project)
+        runner.invoke(cli, ["set", "default_prompt", name, "--scope", "project"])
+    monkeypatch.chdir(tmp_path)
+
+    args = ["sync", "all", "--tools", "claude_code,claude", "--jobs", "2"]
+    result = runner.invoke(cli, args + ["--projects", "projects/*", "--force"])
+    assert result.exit_code == 0, result.output
+    assert "Synced 2 projects: 2 changed, 0 up to date, 0 failed" in result.output
+    assert "Claude Desktop   skipped" in result.output
+    assert "Skipped Claude Desktop files outside the projects" in result.output
+    for name in ("p1", "p2"):
+        project = tmp_path / "projects" / name
+        assert (project / "CLAUDE.md").read_text() == name
+        settings = json.loads((project / ".claude" / "settings.json").read_text())
+        assert settings == {"mcpServers": {"a": {"command": "a"}}}
+    # Tool files outside the projects are left alone.
+    assert not ClaudeDesktopIntegration().get_config_path().exists()
+
+    (tmp_path / "projects.txt").write_text("# monorepo\nprojects/p1\n")
+    result = runner.invoke(cli, args + ["--projects", "projects.txt"])
+    assert result.exit_code == 0, result.output
+    assert "Synced 1 projects: 0 changed, 1 up to date, 0 failed" in result.output
+
+
+def test_sync_all_projects_reports_partially_synced_tools(tmp_path, monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    runner = CliRunner()
+    runner.invoke(cli, ["set", "mcpServers.a", '{"command": "a"}'])
+    project = tmp_path / "projects" / "p1"
+    project.mkdir(parents=True)
+    monkeypatch.chdir(project)
+    runner.invoke(cli, ["set", "default_prompt", "p1", "--scope", "project"])
+    monkeypatch.chdir(tmp_path)
+
+    # Cursor keeps its prompt in the project but its servers in ~/.cursor.
+    args = ["sync", "all", "--tools", "cursor", "--projects", "projects/*"]
+    result = runner.invoke(cli, args + ["--force"])
+    assert result.exit_code == 0, result.output
+    assert "Cursor           partial (1 changes)" in result.output
+    assert "Skipped Cursor files outside the projects" in result.output
+    assert (project / CursorIntegration.prompt_file).read_text() == "p1"
+    assert not (tmp_path / ".cursor").exists()
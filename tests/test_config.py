@@ -32,6 +32,27 @@ def test_get_nested():
     assert cm.get("a.b.c") == 1
 
 
+def test_empty_key_is_rejected(monkeypatch):
+    import platform
+
+    import pytest
+
+    from mcp_config_hub.storage import StorageManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    for storage in (DummyStorage(), StorageManager(layout="sqlite")):
+        cm = ConfigManager(storage)
+        for call in (
+            lambda: cm.set("", 5),
+            lambda: cm.delete(""),
+            lambda: cm.get(""),
+            lambda: cm.get("", scope="user"),
+        ):
+            with pytest.raises(ValueError, match="must not be empty"):
+                call()
+    assert StorageManager().load_config("user") == {"mcpServers": {}}
+
+
 def test_set_nested():
     cm = ConfigManager(DummyStorage())
     cm.set("a.b.c", 42)
@@ -43,3 +64,194 @@ def test_set_and_get_default_prompt():
     prompt_content = "This is a test prompt."
     cm.set("default_prompt", prompt_content, scope="user")
     assert cm.get("default_prompt", scope="user") == prompt_content
+
+
+def test_merged_get_served_from_snapshot(monkeypatch, tmp_path):
+    import platform
+
+    from mcp_config_hub.storage import StorageManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    storage = StorageManager()
+    storage.save_config({"mcpServers": {"a": {"command": "x"}}}, "user")
+    storage.save_config({"mcpServers": {"a": {"args": ["y"]}}}, "project")
+
+    cm = ConfigManager(storage)
+    # Listing the merged scope saves the snapshot.
+    assert cm.list_all("merged")["mcpServers"]["a"] == {"command": "x", "args": ["y"]}
+
+    def fail(*args):
+        raise AssertionError("scope file read despite a valid snapshot")
+
+    monkeypatch.setattr(storage, "load_config", fail)
+    monkeypatch.setattr(storage, "get_value", fail)
+    assert cm.get("mcpServers.a.command") == "x"
+
+
+def test_merged_snapshot_invalidated_by_scope_change(monkeypatch, tmp_path):
+    import platform
+
+    from mcp_config_hub.storage import StorageManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    storage = StorageManager()
+    cm = ConfigManager(storage)
+    cm.set("mcpServers.a.command", "x", "user")
+    assert cm.get("mcpServers.a.command") == "x"
+    cm.set("mcpServers.a.command", "z", "project")
+    assert cm.get("mcpServers.a.command") == "z"
+
+
+def test_transaction_saves_once():
+    storage = DummyStorage()
+    saves = []
+    real_save = storage.save_config
+    storage.save_config = lambda config, scope: saves.append(scope) or real_save(
+        config, scope
+    )
+    cm = ConfigManager(storage)
+    with cm.transaction("user") as tx:
+        for i in range(300):
+            tx.set(f"mcpServers.s{i}", {"command": "x"})
+        assert tx.delete("mcpServers.s0")
+        assert not tx.delete("mcpServers.missing")
+    assert saves == ["user"]
+    assert len(cm.get("mcpServers", scope="user")) == 299
+
+
+def test_transaction_discarded_on_error(monkeypatch):
+    import platform
+
+    import pytest
+
+    from mcp_config_hub.storage import StorageManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    cm = ConfigManager(StorageManager())
+    cm.set("a", 1)
+    with pytest.raises(RuntimeError):
+        with cm.transaction("user") as tx:
+            tx.set("a", 2)
+            raise RuntimeError("boom")
+    assert cm.get("a", scope="user") == 1
+
+
+def test_transaction_merge():
+    cm = ConfigManager(DummyStorage())
+    cm.set("mcpServers.a", '{"command": "x", "args": ["1"]}')
+    with cm.transaction("user") as tx:
+        tx.merge("mcpServers.a", {"args": ["2"], "env": {"K": "V"}})
+    assert cm.get("mcpServers.a", scope="user") == {
+        "command": "x",
+        "args": ["2"],
+        "env": {"K": "V"},
+    }
+
+
+def test_merged_get_saves_snapshot_only_after_loading_every_scope():
+    class SnapshotStorage(DummyStorage):
+        snapshot = True
+
+        def __init__(self):
+            super().__init__()
+            self.saved = []
+
+        def scope_fingerprints(self):
+            return ()
+
+        def load_merged_snapshot(self, fingerprints):
+            return None
+
+        def save_merged_snapshot(self, merged, fingerprints):
+            self.saved.append(merged)
+
+    storage = SnapshotStorage()
+    storage.data["project"] = {"x": 1}
+    storage.data["global"] = {"y": 2}
+    cm = ConfigManager(storage)
+
+    assert cm.get("x") == 1
+    assert storage.saved == []
+    assert cm.get("y") == 2
+    assert storage.saved == [{"x": 1, "y": 2}]
+
+
+def test_merged_get_stops_at_first_defining_scope():
+    storage = DummyStorage()
+    storage.data["project"] = {"mcpServers": {"a": {"command": "p"}}}
+    storage.data["global"] = {"mcpServers": {"a": {"args": ["g"]}}, "x": 1}
+    loaded = []
+    real_load = storage.load_config
+    storage.load_config = lambda scope: loaded.append(scope) or real_load(scope)
+
+    cm = ConfigManager(storage)
+    assert cm.get("mcpServers.a.command") == "p"
+    assert loaded == ["project"]
+    assert cm.get("mcpServers.a") == {"args": ["g"], "command": "p"}
+    assert cm.get("x") == 1
+
+
+def test_merged_get_reads_values_through_get_value(monkeypatch):
+    import platform
+
+    from mcp_config_hub.storage import StorageManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    storage = StorageManager()
+    storage.save_config({"mcpServers": {"a": {"command": "p"}}, "x": 1}, "project")
+    storage.save_config({"mcpServers": {"a": {"args": ["u"]}}, "y": 2}, "user")
+
+    def fail(scope):
+        raise AssertionError("whole scope loaded for a single value")
+
+    monkeypatch.setattr(storage, "load_config", fail)
+    cm = ConfigManager(storage)
+    assert cm.get("mcpServers.a.command") == "p"
+    assert cm.get("mcpServers.a") == {"args": ["u"], "command": "p"}
+    assert cm.get("x") == 1
+    assert cm.get("y") == 2
+    assert cm.get("x.z") is None
+    assert cm.get("missing") is None
+
+
+def test_merged_view_matches_deep_merge():
+    import copy
+
+    from mcp_config_hub.tree_utils import deep_merge
+
+    storage = DummyStorage()
+    storage.data["global"] = {"a": {"b": 1, "c": {"d": 2}}, "e": 3}
+    storage.data["user"] = {"a": {"c": "scalar"}, "f": [1]}
+    storage.data["project"] = {"a": {"c": {"g": 4}}, "e": {"h": 5}}
+
+    expected: dict = {}
+    for scope in ("global", "user", "project"):
+        deep_merge(expected, copy.deepcopy(storage.load_config(scope)))
+
+    view = ConfigManager(storage).merged_view()
+    assert view.to_dict() == expected
+    assert dict(view["a"]["c"]) == {"g": 4}
+    assert list(view) == ["a", "e", "f"]
+    assert ConfigManager(storage).list_all("merged") == expected
+
+
+def test_query_index_follows_transactions(monkeypatch):
+    import platform
+
+    from mcp_config_hub.storage import StorageManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    cm = ConfigManager(StorageManager())
+    cm.set("mcpServers.a.command", "x")
+    cm.set("mcpServers.b.command", "y")
+    index = cm.index("user")
+    assert cm.query("mcpServers.*.command", "user") == {
+        "mcpServers.a.command": "x",
+        "mcpServers.b.command": "y",
+    }
+
+    cm.delete("mcpServers.a")
+    assert cm.index("user") is index
+    assert cm.query("mcpServers.*.command", "merged") == {"mcpServers.b.command": "y"}
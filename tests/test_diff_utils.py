@@ -27,3 +27,99 @@ def test_has_changes_false():
     a = {"x": 1}
     b = {"x": 1}
     assert not diff_utils.has_changes(a, b)
+
+
+def test_diff_trees_yields_typed_changes():
+    a = {"mcpServers": {"a": {"command": "x"}, "b": {"command": "y"}}, "k": [1]}
+    b = {"mcpServers": {"a": {"command": "z"}, "c": {"command": "w"}}, "k": [1]}
+    changes = list(diff_utils.diff_trees(a, b))
+    assert changes == [
+        diff_utils.Change("replace", ("mcpServers", "a", "command"), "x", "z"),
+        diff_utils.Change("remove", ("mcpServers", "b"), {"command": "y"}, None),
+        diff_utils.Change("add", ("mcpServers", "c"), None, {"command": "w"}),
+    ]
+    assert list(diff_utils.diff_trees({"x": 1}, {"x": True})) != []
+
+
+def test_render_unified_groups_by_parent():
+    a = {"mcpServers": {"a": {"command": "x"}}}
+    b = {"mcpServers": {"a": {"command": "z", "args": ["1"]}}}
+    diff = diff_utils.generate_config_diff(a, b, "tool")
+    assert diff.splitlines() == [
+        "--- tool (current)",
+        "+++ tool (new)",
+        "@@ mcpServers.a @@",
+        '+      "args": [',
+        '+        "1"',
+        "+      ]",
+        '-      "command": "x"',
+        '+      "command": "z"',
+    ]
+
+
+def test_make_patch_round_trip():
+    a = {"mcpServers": {"a/b": {"command": "x"}, "c~": {}}, "k": [1, 2]}
+    b = {"mcpServers": {"a/b": {"command": "y"}, "d": {}}, "k": [1, 2]}
+    patch = diff_utils.make_patch(a, b)
+    assert patch == [
+        {"op": "replace", "path": "/mcpServers/a~1b/command", "value": "y"},
+        {"op": "remove", "path": "/mcpServers/c~0"},
+        {"op": "add", "path": "/mcpServers/d", "value": {}},
+    ]
+    assert diff_utils.apply_patch(a, patch) == b
+
+
+def test_apply_patch_rfc6902_operations():
+    import pytest
+
+    doc = {"a": [1, 2], "b": {"c": 1}}
+    patch = [
+        {"op": "add", "path": "/a/-", "value": 3},
+        {"op": "add", "path": "/a/0", "value": 0},
+        {"op": "move", "from": "/b/c", "path": "/d"},
+        {"op": "copy", "from": "/a", "path": "/e"},
+        {"op": "test", "path": "/d", "value": 1},
+    ]
+    assert diff_utils.apply_patch(doc, patch) == {
+        "a": [0, 1, 2, 3],
+        "b": {},
+        "d": 1,
+        "e": [0, 1, 2, 3],
+    }
+    with pytest.raises(ValueError):
+        diff_utils.apply_patch(doc, [{"op": "test", "path": "/d", "value": 2}])
+    with pytest.raises(ValueError):
+        diff_utils.apply_patch(doc, [{"op": "remove", "path": "/missing"}])
+
+
+def test_three_way_merge():
+    base = {"a": {"command": "x"}, "b": {"command": "y"}, "c": {"command": "z"}}
+    hub = {"a": {"command": "x2"}, "b": {"command": "y"}, "d": {"command": "w"}}
+    tool = {"a": {"command": "x"}, "b": {"command": "y2"}, "c": {"command": "z2"}}
+    merged, conflicts = diff_utils.three_way_merge(base, hub, tool)
+    assert merged == {
+        "a": {"command": "x2"},
+        "b": {"command": "y2"},
+        "d": {"command": "w"},
+    }
+    assert conflicts == ["c"]
+
+
+def test_summarize_changes_per_server():
+    a = {"mcpServers": {"a": {"command": "x"}, "b": {}}, "default_prompt": "p"}
+    b = {
+        "mcpServers": {"a": {"command": "y", "args": []}, "c": {}},
+        "default_prompt": "q",
+    }
+    summary = diff_utils.summarize_changes(diff_utils.diff_trees(a, b))
+    assert summary == {
+        "mcpServers": {"a": "changed", "b": "removed", "c": "added"},
+        "default_prompt": {"default_prompt": "changed"},
+    }
+    assert list(diff_utils.iter_summary(summary)) == [
+        "default_prompt: 1 changed",
+        "mcpServers: 1 added, 1 removed, 1 changed",
+        "  ~ a",
+        "  - b",
+        "  + c",
+    ]
@@ -0,0 +1,74 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+
+from mcp_config_hub.file_utils import (
+    CHUNK_SIZE,
+    WriteResult,
+    file_digest,
+    remove_file,
+    write_text,
+)
+
+
+def test_write_text_skips_identical_content(tmp_path):
+    path = tmp_path / "dir" / "config.json"
+    assert write_text(path, "{}") == WriteResult(path, 2, True)
+    mtime = path.stat().st_mtime_ns
+
+    assert write_text(path, "{}") == WriteResult(path, 0, False)
+    assert path.stat().st_mtime_ns == mtime
+    assert write_text(path, "{ }", fsync=True) == WriteResult(path, 3, True)
+    assert path.read_text() == "{ }"
+
+
+def test_write_text_is_atomic_and_keeps_permissions(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    path.write_text("old")
+    os.chmod(path, 0o600)
+
+    def fail(self, target):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "replace", fail)
+        with pytest.raises(OSError):
+            write_text(path, "new")
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
+
+    write_text(path, "new")
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_remove_file_reports_whether_it_existed(tmp_path):
+    path = tmp_path / "CLAUDE.md"
+    path.write_text("prompt")
+    assert remove_file(path).written
+    assert not remove_file(path).written
+
+
+def test_write_text_compares_large_files_in_chunks(tmp_path):
+    path = tmp_path / "CLAUDE.md"
+    text = "x" * (CHUNK_SIZE * 3 + 5)
+    write_text(path, text)
+
+    assert not write_text(path, text).written
+    assert write_text(path, text[:-1] + "y").written
+    assert file_digest(path) == hashlib.sha256(path.read_bytes()).hexdigest()
+    assert file_digest(tmp_path / "missing") is None
+
+
+def test_write_text_replaces_symlink_target(tmp_path):
+    target = tmp_path / "dotfiles" / "claude_desktop_config.json"
+    target.parent.mkdir()
+    target.write_text("{}")
+    link = tmp_path / "config.json"
+    link.symlink_to(target)
+
+    assert write_text(link, '{"a": 1}').written
+    assert link.is_symlink()
+    assert target.read_text() == '{"a": 1}'
+    assert sorted(p.name for p in target.parent.iterdir()) == [target.name]
@@ -0,0 +1,40 @@
+from mcp_config_hub.fingerprints import Fingerprinter, changed_paths, fingerprint
+
+
+def test_fingerprint_is_canonical():
+    assert fingerprint({"a": 1, "b": [1, {"c": None}]}) == fingerprint(
+        {"b": [1, {"c": None}], "a": 1}
+    )
+    assert fingerprint({"a": 1}) != fingerprint({"a": True})
+    assert fingerprint({"a": "1"}) != fingerprint({"a": 1})
+    assert fingerprint([1, 2]) != fingerprint([2, 1])
+    assert fingerprint({"ab": {}}) != fingerprint({"a": {"b": {}}})
+
+
+def test_stored_fingerprints_find_changed_servers():
+    fingerprinter = Fingerprinter()
+    old = {"mcpServers": {"a": {"command": "x"}, "b": {"command": "y"}}}
+    stored = fingerprinter.fingerprints(old, depth=2)
+
+    new = {"mcpServers": {"a": {"command": "x"}, "c": {"command": "z"}}}
+    assert changed_paths(stored, Fingerprinter().fingerprints(new, depth=2)) == [
+        "",
+        "mcpServers",
+        "mcpServers.b",
+        "mcpServers.c",
+    ]
+
+
+def test_digests_are_memoised_per_subtree(monkeypatch):
+    fingerprinter = Fingerprinter()
+    tree = {"mcpServers": {"a": {"args": list(range(100))}}}
+    fingerprinter.digest(tree)
+
+    calls = []
+    real_hash = fingerprinter._hash
+    monkeypatch.setattr(
+        fingerprinter, "_hash", lambda data: calls.append(data) or real_hash(data)
+    )
+    fingerprinter.digest(tree)
+    fingerprinter.digest(tree["mcpServers"]["a"])
+    assert calls == []
@@ -0,0 +1,56 @@
+from mcp_config_hub.flat_index import FlatIndex
+from mcp_config_hub.tree_utils import MISSING, apply_operation
+
+CONFIG = {
+    "mcpServers": {
+        "a": {"command": "x", "args": ["1"]},
+        "b": {"command": "y", "env": {}},
+        "c": {"url": "http://c"},
+    },
+    "default_prompt": "hi",
+}
+
+
+def test_lookup_and_prefix_scan():
+    index = FlatIndex(CONFIG)
+    assert index.get(("mcpServers", "a", "command")) == "x"
+    assert index.get(("mcpServers", "b")) == {"command": "y", "env": {}}
+    assert index.get(("mcpServers", "z")) is MISSING
+    assert index.get(()) == CONFIG
+    assert [path for path, _ in index.scan(("mcpServers", "a"))] == [
+        ("mcpServers", "a", "args"),
+        ("mcpServers", "a", "command"),
+    ]
+
+
+def test_wildcard_query():
+    index = FlatIndex(CONFIG)
+    assert index.query("mcpServers.*.command") == {
+        "mcpServers.a.command": "x",
+        "mcpServers.b.command": "y",
+    }
+    assert index.query("mcpServers.[ab]") == {
+        "mcpServers.a": CONFIG["mcpServers"]["a"],
+        "mcpServers.b": CONFIG["mcpServers"]["b"],
+    }
+    assert index.query("default_prompt") == {"default_prompt": "hi"}
+    assert index.query("missing.*") == {}
+
+
+def test_apply_keeps_index_in_step():
+    import copy
+
+    config = copy.deepcopy(CONFIG)
+    index = FlatIndex(config)
+    operations = [
+        ("set", "mcpServers.a.command.deeper", 1),
+        ("delete", "mcpServers.c.url", None),
+        ("merge", "mcpServers.b", {"env": {"K": "v"}}),
+        ("set", "default_prompt", {}),
+        ("delete", "missing.key", None),
+    ]
+    for operation in operations:
+        apply_operation(config, operation)
+        index.apply(operation)
+        assert index.get(()) == config
+        assert index.paths == sorted(index.leaves)
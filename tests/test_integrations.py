@@ -253,3 +253,64 @@ def test_get_all_integrations():
     assert isinstance(integrations["gemini"], GeminiIntegration)
     assert isinstance(integrations["claude_code"], ClaudeCodeIntegration)
     assert len(integrations) == 6
+
+
+def test_sync_from_hub_applies_patch_to_current_file(monkeypatch):
+    import json
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    integration = ClaudeDesktopIntegration()
+    integration.write_config({"mcpServers": {"old": {}}, "theme": "dark"})
+    hub_config = {"mcpServers": {"new": {"command": "x"}}}
+
+    assert integration.plan_from_hub(hub_config) == [
+        {"op": "remove", "path": "/mcpServers/old"},
+        {"op": "add", "path": "/mcpServers/new", "value": {"command": "x"}},
+    ]
+    integration.sync_from_hub(hub_config)
+    with open(integration.get_config_path(), encoding="utf-8") as f:
+        assert json.load(f) == {
+            "mcpServers": {"new": {"command": "x"}},
+            "theme": "dark",
+        }
+
+    mtime = integration.get_config_path().stat().st_mtime_ns
+    integration.sync_from_hub(hub_config)
+    assert integration.get_config_path().stat().st_mtime_ns == mtime
+
+
+def test_vscode_reads_jsonc_and_keeps_comments(tmp_path, monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    integration = VSCodeIntegration()
+    settings_path = integration.get_config_path()
+    settings_path.parent.mkdir(parents=True)
+    settings_path.write_text(
+        '{\n  // comment\n  "mcp": {"servers": {"a": {"command": "a"}},},\n}\n'
+    )
+    assert integration.read_config() == {"servers": {"a": {"command": "a"}}}
+
+    workspace_path = integration.get_workspace_config_path()
+    workspace_path.parent.mkdir()
+    workspace_path.write_text(
+        '{\n  // Team servers\n  "servers": {\n    "a": {"command": "a"}\n  }\n}\n'
+    )
+    integration.sync_from_hub(
+        {"mcpServers": {"a": {"command": "a"}, "b": {"command": "b"}}}
+    )
+    text = workspace_path.read_text()
+    assert "// Team servers" in text
+    assert integration.read_config()["servers"]["b"] == {"command": "b"}
+
+
+def test_unset_prompt_removes_only_managed_prompt_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    instructions = tmp_path / ".github" / "copilot-instructions.md"
+    instructions.parent.mkdir()
+    instructions.write_text("Hand-written")
+    (tmp_path / "CLAUDE.md").write_text("Old prompt")
+
+    VSCodeIntegration().sync_from_hub({"mcpServers": {}})
+    ClaudeCodeIntegration().sync_from_hub({"mcpServers": {}})
+
+    assert instructions.read_text() == "Hand-written"
+    assert not (tmp_path / "CLAUDE.md").exists()
@@ -0,0 +1,37 @@
+import json
+
+from mcp_config_hub.json_scan import load_value, scan_value
+from mcp_config_hub.tree_utils import BLOCKED, MISSING
+
+DOCUMENT = json.dumps(
+    {
+        "other": {"text": 'braces } ] { and "quotes" \\ inside', "list": [1, [2]]},
+        "mcpServers": {"a": {"command": "x", "args": ["--flag"]}, "b.c": None},
+        "count": 3,
+    },
+    indent=2,
+).encode("utf-8")
+
+
+def test_scan_value_finds_nested_values():
+    assert scan_value(DOCUMENT, ["mcpServers", "a"]) == {
+        "command": "x",
+        "args": ["--flag"],
+    }
+    assert scan_value(DOCUMENT, ["mcpServers", "b.c"]) is None
+    assert scan_value(DOCUMENT, ["count"]) == 3
+    assert scan_value(DOCUMENT, []) == json.loads(DOCUMENT)
+
+
+def test_scan_value_missing_keys():
+    assert scan_value(DOCUMENT, ["mcpServers", "z"]) is MISSING
+    assert scan_value(DOCUMENT, ["count", "x"]) is BLOCKED
+    assert scan_value(b"{}", ["a"]) is MISSING
+
+
+def test_load_value_decodes_escapes_and_stops_at_first_duplicate(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text('{"\\u006b": {"v": [true, "\\""]}, "k": 1, "x": }')
+    assert load_value(path, ["k", "v"]) == [True, '"']
+    # The malformed member after the key is never read.
+    assert load_value(path, ["k"]) == {"v": [True, '"']}
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from mcp_config_hub.jsonc import JSONCDocument, loads
+
+TEXT = """{
+  // Editor settings
+  "editor.fontSize": 14,
+  /* MCP servers */
+  "servers": {
+    "a": {"command": "a"}, // keep me
+    "b": {
+      "command": "b",
+    },
+  },
+}
+"""
+
+
+def test_loads_accepts_comments_and_trailing_commas():
+    assert loads(TEXT) == {
+        "editor.fontSize": 14,
+        "servers": {"a": {"command": "a"}, "b": {"command": "b"}},
+    }
+    with pytest.raises(ValueError):
+        loads('{"a": 1 "b": 2}')
+
+
+def test_document_edits_only_touch_the_changed_members():
+    document = JSONCDocument(TEXT)
+    document.apply_patch(
+        [
+            {"op": "replace", "path": "/servers/a/command", "value": "a2"},
+            {"op": "remove", "path": "/servers/b"},
+            {"op": "add", "path": "/servers/c", "value": {"command": "c"}},
+        ]
+    )
+
+    assert loads(document.text) == {
+        "editor.fontSize": 14,
+        "servers": {"a": {"command": "a2"}, "c": {"command": "c"}},
+    }
+    assert document.text.startswith('{\n  // Editor settings\n  "editor.fontSize"')
+    assert '"a": {"command": "a2"}, // keep me' in document.text
+    assert '\n    "c": {\n      "command": "c"\n    }' in document.text
+
+
+def test_document_adds_to_empty_and_missing_objects():
+    document = JSONCDocument('{\n  "theme": "dark"\n}\n')
+    document.set(("mcp", "servers", "a"), {"command": "a"})
+    assert loads(document.text) == {
+        "theme": "dark",
+        "mcp": {"servers": {"a": {"command": "a"}}},
+    }
+
+    document = JSONCDocument("{}")
+    document.set(("servers",), {})
+    document.set(("servers", "a"), 1)
+    assert document.text == '{\n  "servers": {\n    "a": 1\n  }\n}'
+
+
+def test_document_applies_many_operations_without_parsing_again(monkeypatch):
+    servers = {f"s{i}": {"command": f"c{i}", "args": ["a", "b"]} for i in range(1000)}
+    document = JSONCDocument(
+        "{\n  // servers\n  " + json.dumps({"servers": servers}, indent=2)[1:]
+    )
+    patch = []
+    for i in range(0, 1000, 10):
+        patch.append({"op": "replace", "path": f"/servers/s{i}/command", "value": "x"})
+        patch.append({"op": "remove", "path": f"/servers/s{i + 1}/args/0"})
+        patch.append({"op": "remove", "path": f"/servers/s{i + 2}"})
+        patch.append({"op": "add", "path": f"/servers/n{i}", "value": {"args": []}})
+        servers[f"s{i}"]["command"] = "x"
+        del servers[f"s{i + 1}"]["args"][0]
+        del servers[f"s{i + 2}"]
+        servers[f"n{i}"] = {"args": []}
+
+    def parse():
+        raise AssertionError("document parsed again")
+
+    monkeypatch.setattr(document, "_parse", parse)
+    document.apply_patch(patch)
+
+    assert loads(document.text) == {"servers": servers}
+    assert document.spans == JSONCDocument(document.text).spans
+    assert document.text.startswith("{\n  // servers\n")
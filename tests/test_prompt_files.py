@@ -0,0 +1,45 @@
+import hashlib
+
+from mcp_config_hub import prompt_files
+from mcp_config_hub.prompt_files import DigestCache, plan_prompt_artifacts
+
+
+def test_plan_prompt_artifacts(tmp_path):
+    same = tmp_path / "CLAUDE.md"
+    same.write_text("Hi")
+    resized = tmp_path / "GEMINI.md"
+    resized.write_text("Hello")
+    artifacts = [(same, True), (resized, True), (tmp_path / ".windsurfrules", True)]
+
+    assert plan_prompt_artifacts(artifacts, "Hi") == {
+        resized: "Hi",
+        tmp_path / ".windsurfrules": "Hi",
+    }
+    # Without a hub prompt, only existing files that may be removed are.
+    assert plan_prompt_artifacts([(same, True), (resized, False)], None) == {same: None}
+
+
+def test_digest_cache_reuses_digests_of_unchanged_files(tmp_path, monkeypatch):
+    path = tmp_path / "CLAUDE.md"
+    path.write_text("a" * 100_000)
+    reads = []
+    digest = prompt_files.file_digest
+    monkeypatch.setattr(
+        prompt_files, "file_digest", lambda p: reads.append(p) or digest(p)
+    )
+
+    digests = DigestCache(tmp_path / "state")
+    assert digests.file_digest(path) == hashlib.sha256(b"a" * 100_000).hexdigest()
+    digests.save()
+    # A later sync compares a same-sized prompt with the saved digest,
+    # without reading the file again.
+    assert plan_prompt_artifacts(
+        [(path, True)], "b" * 100_000, DigestCache(tmp_path / "state")
+    ) == {path: "b" * 100_000}
+    assert reads == [path]
+
+    # Files just written are recorded without being read back.
+    path.write_text("c")
+    digests.record(path, "c")
+    assert not plan_prompt_artifacts([(path, True)], "c", digests)
+    assert reads == [path]
@@ -0,0 +1,39 @@
+import pytest
+
+from mcp_config_hub.server_selection import (
+    ServerSelector,
+    restore_tags,
+    routing_selector,
+    select_hub_config,
+)
+
+SERVERS = {
+    "github": {"command": "gh", "tags": ["web"]},
+    "browser-heavy": {"command": "chrome", "tags": ["web", "heavy"]},
+    "sqlite": {"command": "sqlite"},
+}
+
+
+def test_selector_matches_globs_and_tags():
+    assert ServerSelector().matches("sqlite", SERVERS["sqlite"])
+    assert ServerSelector(include=("sql*",)).matches("sqlite", SERVERS["sqlite"])
+    web = ServerSelector(tags=("web",), exclude=("*-heavy",))
+    assert [name for name, s in SERVERS.items() if web.matches(name, s)] == ["github"]
+
+
+def test_select_hub_config_applies_routing_and_strips_tags():
+    hub_config = {
+        "mcpServers": SERVERS,
+        "routing": {"cursor": {"exclude": "*-heavy"}},
+        "default_prompt": "Hi",
+    }
+    selected = select_hub_config(hub_config, "cursor", ServerSelector(tags=("web",)))
+    assert selected == dict(hub_config, mcpServers={"github": {"command": "gh"}})
+    assert select_hub_config(hub_config, "claude")["mcpServers"].keys() == {*SERVERS}
+
+    assert restore_tags({"command": "gh2"}, SERVERS["github"]) == {
+        "command": "gh2",
+        "tags": ["web"],
+    }
+    with pytest.raises(ValueError):
+        routing_selector({"cursor": {"include": 1}}, "cursor")
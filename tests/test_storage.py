@@ -1,5 +1,8 @@
+import os
 import platform
+import sqlite3
 
+from mcp_config_hub.config import ConfigManager
 from mcp_config_hub.storage import StorageManager
 
 
@@ -32,3 +35,413 @@ def test_invalid_scope():
         assert "Invalid scope" in str(e)
     else:
         assert False, "ValueError not raised"
+
+
+def test_load_config_parses_unchanged_file_once(monkeypatch):
+    import json
+
+    from mcp_config_hub import storage
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager()
+    sm.save_config({"mcpServers": {"a": {"command": "x"}}}, "user")
+
+    calls = []
+    real_load = json.load
+    monkeypatch.setattr(storage.json, "load", lambda f: calls.append(1) or real_load(f))
+    first = sm.load_config("user")
+    first["mcpServers"]["a"]["command"] = "mutated"
+    second = StorageManager().load_config("user")
+    assert second["mcpServers"]["a"]["command"] == "x"
+    assert len(calls) == 1
+
+
+def test_save_config_invalidates_cache(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager()
+    sm.save_config({"mcpServers": {}, "x": 1}, "user")
+    assert sm.load_config("user")["x"] == 1
+    sm.save_config({"mcpServers": {}, "x": 2}, "user")
+    assert sm.load_config("user")["x"] == 2
+
+
+def test_config_cache_evicts_least_recently_used(monkeypatch, tmp_path):
+    from mcp_config_hub import storage
+
+    monkeypatch.setattr(storage, "CONFIG_CACHE_SIZE", 2)
+    storage.invalidate_config_cache()
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / name / "config.json"
+        path.parent.mkdir()
+        path.write_text("{}", encoding="utf-8")
+        paths.append(path)
+        monkeypatch.setattr(StorageManager, "_get_project_path", lambda self, p=path: p)
+        StorageManager().load_config("project")
+    assert list(storage._config_cache) == [str(paths[1]), str(paths[2])]
+
+
+def test_save_config_rejects_stale_etag(monkeypatch):
+    import pytest
+
+    from mcp_config_hub.storage import ConcurrentModificationError
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager()
+    sm.save_config({"mcpServers": {}, "x": 1}, "user")
+    config, etag = sm.load_config_with_etag("user")
+    StorageManager().save_config({"mcpServers": {}, "x": 2}, "user")
+    with pytest.raises(ConcurrentModificationError):
+        sm.save_config(config, "user", expected_etag=etag)
+    assert sm.load_config("user")["x"] == 2
+
+
+def test_transaction_replays_operations_on_conflict(monkeypatch):
+    import pytest
+
+    from mcp_config_hub.config import ConfigManager
+    from mcp_config_hub.storage import ConcurrentModificationError
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    cm = ConfigManager(StorageManager())
+    with cm.transaction("user") as tx:
+        tx.set("mcpServers.a", {"command": "a"})
+        ConfigManager(StorageManager()).set("mcpServers.b", {"command": "b"})
+    assert set(cm.get("mcpServers", "user")) == {"a", "b"}
+
+    with pytest.raises(ConcurrentModificationError):
+        with cm.transaction("user", on_conflict="fail") as tx:
+            tx.set("mcpServers.c", {"command": "c"})
+            ConfigManager(StorageManager()).set("mcpServers.d", {"command": "d"})
+    assert set(cm.get("mcpServers", "user")) == {"a", "b", "d"}
+
+
+def test_coalesced_commit_applies_queued_batches(monkeypatch):
+    from mcp_config_hub.config import ConfigManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager(coalesce_writes=True)
+    ticket = sm._enqueue_operations("user", [("set", "mcpServers.queued", 1)])
+    ConfigManager(sm).set("mcpServers.own", 2)
+    assert not ticket.exists()
+    assert sm.load_config("user")["mcpServers"] == {"queued": 1, "own": 2}
+
+
+def test_coalesced_commit_keeps_unreadable_batches(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager(coalesce_writes=True)
+    other = sm._enqueue_operations("user", [])
+    other.write_text("{")
+    ConfigManager(sm).set("mcpServers.own", 1)
+    assert not other.exists()
+    assert other.with_suffix(".bad").read_text() == "{"
+
+    # A writer whose own batch cannot be read back commits it from memory.
+    enqueue = sm._enqueue_operations
+
+    def enqueue_garbled(scope, operations):
+        ticket = enqueue(scope, operations)
+        ticket.write_text("[[")
+        return ticket
+
+    monkeypatch.setattr(sm, "_enqueue_operations", enqueue_garbled)
+    ConfigManager(sm).set("mcpServers.next", 2)
+    assert sm.load_config("user")["mcpServers"] == {"own": 1, "next": 2}
+    assert [path.name for path in sm._get_queue_dir("user").iterdir()] == [
+        other.with_suffix(".bad").name
+    ]
+
+
+def test_coalesced_commit_honours_fail_on_conflict(monkeypatch):
+    import pytest
+
+    from mcp_config_hub.storage import ConcurrentModificationError
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    cm = ConfigManager(StorageManager(coalesce_writes=True))
+    cm.set("mcpServers.a", {"command": "a"})
+
+    with pytest.raises(ConcurrentModificationError):
+        with cm.transaction("user", on_conflict="fail") as tx:
+            tx.set("mcpServers.c", {"command": "c"})
+            ConfigManager(StorageManager()).set("mcpServers.d", {"command": "d"})
+    assert set(cm.get("mcpServers", "user")) == {"a", "d"}
+
+
+def _parallel_writer(worker, coalesce):
+    from mcp_config_hub.config import ConfigManager
+
+    cm = ConfigManager(StorageManager(coalesce_writes=coalesce))
+    for i in range(10):
+        cm.set(f"mcpServers.w{worker}-{i}", {"command": "x"})
+
+
+def test_parallel_writers_do_not_lose_updates(monkeypatch):
+    import multiprocessing
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    ctx = multiprocessing.get_context("fork")
+    for coalesce in (False, True):
+        StorageManager().save_config({"mcpServers": {}}, "user")
+        workers = [
+            ctx.Process(target=_parallel_writer, args=(n, coalesce)) for n in range(6)
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        assert len(StorageManager().load_config("user")["mcpServers"]) == 60
+
+
+def test_journal_mode_appends_instead_of_rewriting(monkeypatch):
+    from mcp_config_hub.config import ConfigManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager(journal=True, background_compaction=False)
+    sm.save_config({"mcpServers": {"a": {"command": "x"}}}, "user")
+    config_path = sm.get_config_path("user")
+    base = config_path.read_text(encoding="utf-8")
+
+    cm = ConfigManager(sm)
+    cm.set("mcpServers.b", {"command": "y"})
+    assert cm.delete("mcpServers.a")
+
+    assert config_path.read_text(encoding="utf-8") == base
+    assert len(sm.backends["file"]._read_journal(config_path)) == 2
+    assert StorageManager().load_config("user") == {
+        "mcpServers": {"b": {"command": "y"}}
+    }
+
+
+def test_journal_compacted_past_threshold(monkeypatch):
+    from mcp_config_hub.config import ConfigManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager(
+        journal=True, journal_threshold=200, background_compaction=False
+    )
+    cm = ConfigManager(sm)
+    for i in range(10):
+        cm.set(f"mcpServers.s{i}", {"command": "x" * 20})
+
+    journal_path = sm.backends["file"]._get_journal_path(sm.get_config_path("user"))
+    assert not journal_path.exists() or journal_path.stat().st_size <= 200
+    assert len(sm.load_config("user")["mcpServers"]) == 10
+    sm.compact("user")
+    assert not journal_path.exists()
+    assert len(StorageManager().load_config("user")["mcpServers"]) == 10
+
+
+def test_sharded_layout_migrates_and_writes_single_shard(monkeypatch):
+    from mcp_config_hub.config import ConfigManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    StorageManager().save_config(
+        {"mcpServers": {"a": {"command": "x"}, "b": {"command": "y"}}, "k": 1},
+        "user",
+    )
+    sm = StorageManager(layout="sharded")
+    cm = ConfigManager(sm)
+    cm.set("mcpServers.a.command", "z")
+
+    config_path = sm.get_config_path("user")
+    assert not config_path.exists()
+    shard_b = sm.backends["sharded"]._get_shard_path(config_path, "b")
+    mtime_b = shard_b.stat().st_mtime_ns
+    cm.set("mcpServers.a.args", '["1"]')
+    assert shard_b.stat().st_mtime_ns == mtime_b
+
+    # Readers using the default layout detect the sharded scope.
+    assert StorageManager().load_config("user") == {
+        "k": 1,
+        "mcpServers": {"a": {"command": "z", "args": ["1"]}, "b": {"command": "y"}},
+    }
+    assert cm.delete("mcpServers.b")
+    assert not shard_b.exists()
+
+
+def test_sharded_get_reads_only_requested_shard(monkeypatch):
+    from mcp_config_hub.config import ConfigManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager(layout="sharded")
+    sm.save_config({"mcpServers": {"a": {"command": "x"}, "b": {}}}, "user")
+    sm.backends["sharded"]._get_shard_path(sm.get_config_path("user"), "b").write_text(
+        "garbage"
+    )
+
+    def fail(scope):
+        raise AssertionError("whole scope loaded")
+
+    monkeypatch.setattr(sm, "load_config", fail)
+    assert ConfigManager(sm).get("mcpServers.a.command", "user") == "x"
+
+
+def test_migrate_back_to_file_layout(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    config = {"mcpServers": {"a/b": {"command": "x"}}}
+    StorageManager(layout="sharded").save_config(config, "user")
+    sm = StorageManager()
+    sm.migrate("user")
+    assert sm.get_layout("user") == "file"
+    assert sm.load_config("user") == config
+
+
+def test_sqlite_layout_round_trip(monkeypatch):
+    from mcp_config_hub.config import ConfigManager
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager(layout="sqlite")
+    cm = ConfigManager(sm)
+    cm.set("mcpServers.a.command", "x")
+    cm.set("mcpServers.a.env", '{"K": "v"}')
+    cm.set("k", "[1, 2]")
+
+    assert sm.get_layout("user") == "sqlite"
+    assert cm.get("mcpServers.a", "user") == {"command": "x", "env": {"K": "v"}}
+    assert cm.delete("mcpServers.a")
+    assert StorageManager().load_config("user") == {"mcpServers": {}, "k": [1, 2]}
+
+    with sqlite3.connect(str(sm.get_config_path("user").with_suffix(".db"))) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_get_value_reads_only_subtree(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager(layout="sqlite")
+    sm.save_config(
+        {"mcpServers": {"a": {"command": "x"}, "b": {"command": "y"}}}, "user"
+    )
+
+    def fail(config_path):
+        raise AssertionError("whole scope loaded")
+
+    monkeypatch.setattr(sm.backends["sqlite"], "load", fail)
+    assert sm.get_value("user", "mcpServers.b") == {"command": "y"}
+    assert sm.get_value("user", "mcpServers.c", "missing") == "missing"
+
+
+def test_migrate_file_to_sqlite_and_back(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    config = {"mcpServers": {"a.b": {"command": "x", "args": []}}, "empty": {}}
+    StorageManager().save_config(config, "user")
+
+    StorageManager(layout="sqlite").migrate("user")
+    assert StorageManager().get_layout("user") == "sqlite"
+    assert StorageManager().load_config("user") == config
+
+    StorageManager().migrate("user")
+    assert StorageManager().get_layout("user") == "file"
+    assert StorageManager().load_config("user") == config
+
+
+def test_file_get_value_scans_without_full_parse(monkeypatch):
+    from mcp_config_hub import storage
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager()
+    sm.save_config({"mcpServers": {"a": {"command": "x"}}, "big": ["y"] * 1000}, "user")
+    storage.invalidate_config_cache()
+
+    def fail(path, default):
+        raise AssertionError("whole file parsed")
+
+    monkeypatch.setattr(storage, "_load_json", fail)
+    assert sm.get_value("user", "mcpServers.a.command") == "x"
+    assert sm.get_value("user", "mcpServers.b", "missing") == "missing"
+
+
+def test_project_root_and_preloaded_scopes(tmp_path, monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    StorageManager().save_config({"mcpServers": {"a": {}}}, "user")
+    preloaded = StorageManager().preload_scopes(["user"])
+
+    sm = StorageManager(project_root=tmp_path / "p1", preloaded=preloaded)
+    assert sm.get_config_path("project") == (
+        tmp_path / "p1" / ".mcp-config-hub" / "config.json"
+    )
+    # The preloaded scope is served from memory, even if the file changes.
+    StorageManager().save_config({}, "user")
+    assert sm.load_config("user") == {"mcpServers": {"a": {}}}
+    assert sm.get_value("user", "mcpServers.a") == {}
+    assert sm.get_etag("user") == preloaded["user"][1]
+
+    # Writing the scope drops the preloaded copy.
+    sm.save_config({"mcpServers": {}}, "user")
+    assert sm.load_config("user") == {"mcpServers": {}}
+
+
+def test_save_config_keeps_file_permissions(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    monkeypatch.setattr(os, "umask", lambda mask: 0o022)
+    sm = StorageManager()
+    sm.save_config({"mcpServers": {}}, "user")
+    path = sm.get_config_path("user")
+    assert path.stat().st_mode & 0o777 == 0o644
+
+    os.chmod(path, 0o640)
+    sm.save_config({"mcpServers": {"a": {}}}, "user")
+    assert path.stat().st_mode & 0o777 == 0o640
+
+
+def test_save_config_keeps_symlinked_scope_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    sm = StorageManager()
+    target = tmp_path / "dotfiles" / "config.json"
+    target.parent.mkdir()
+    target.write_text("{}")
+    path = sm.get_config_path("user")
+    path.parent.mkdir(parents=True)
+    path.symlink_to(target)
+
+    sm.save_config({"mcpServers": {"a": {}}}, "user")
+    assert path.is_symlink()
+    assert sm.load_config("user") == {"mcpServers": {"a": {}}}
+    assert "a" in target.read_text()
+
+
+def test_recreated_sqlite_scope_gets_new_etag(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    config_manager = ConfigManager(StorageManager())
+    config_manager.set("key", "v1")
+    StorageManager(layout="sqlite").migrate("user")
+    assert config_manager.get("key") == "v1"
+    etag = StorageManager().get_etag("user")
+
+    StorageManager().migrate("user")
+    config_manager.set("key", "v2")
+    StorageManager(layout="sqlite").migrate("user")
+    assert StorageManager().get_etag("user") != etag
+    assert config_manager.get("key") == "v2"
+
+
+def test_find_value_tells_blocked_keys_apart(monkeypatch, tmp_path):
+    from mcp_config_hub.config import ConfigManager
+    from mcp_config_hub.tree_utils import BLOCKED, MISSING
+
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    config = {"mcpServers": {"a": {"command": "x", "env": {}}}, "k": 1}
+    for layout in ("file", "sharded", "sqlite"):
+        (tmp_path / layout).mkdir()
+        monkeypatch.chdir(tmp_path / layout)
+        sm = StorageManager(layout=layout, snapshot=False)
+        sm.save_config(config, "project")
+        sm.save_config({"mcpServers": {"a": {"command": {"y": 2}}}}, "user")
+        assert sm.get_layout("project") == layout
+        assert sm.find_value("project", "k.x") is BLOCKED
+        assert sm.find_value("project", "mcpServers.a.command.y") is BLOCKED
+        assert sm.find_value("project", "mcpServers.a.env.K") is MISSING
+        assert sm.find_value("project", "mcpServers.b.command") is MISSING
+        assert sm.get_value("project", "k.x", "default") == "default"
+
+        calls = []
+
+        class CountingStorage(StorageManager):
+            def find_value(self, scope, key):
+                calls.append(scope)
+                return super().find_value(scope, key)
+
+        # The project's command blocks the user's, so no other scope is read.
+        cm = ConfigManager(CountingStorage(snapshot=False))
+        assert cm.get("mcpServers.a.command.y") is None
+        assert calls == ["project"]
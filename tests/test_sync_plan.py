@@ -0,0 +1,57 @@
+import json
+import platform
+
+import pytest
+
+from mcp_config_hub.integrations import CursorIntegration
+from mcp_config_hub.sync_plan import FileChange, SyncPlan, plan_tool
+
+
+def test_plan_round_trips_and_applies_later(tmp_path, monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    integration = CursorIntegration()
+    integration.write_config({"mcpServers": {"old": {}}, "theme": "dark"})
+    hub_config = {"mcpServers": {"new": {"command": "x"}}, "default_prompt": "Hi"}
+
+    plan = SyncPlan()
+    plan.add("cursor", *plan_tool("cursor", integration, hub_config, {"new": {}}))
+    assert [change.op for change in plan.changes] == ["patch", "write"]
+    # Paths under the working directory (here also home) are stored relative.
+    assert plan.changes[0].path == ".cursor/mcp.json"
+    assert plan.tools["cursor"].changes == 3
+    plan.save(tmp_path / "plan.json")
+
+    # Nothing is written until the saved plan is applied.
+    assert "old" in integration.read_config()["mcpServers"]
+    SyncPlan.load(tmp_path / "plan.json").apply(tmp_path / "backups")
+
+    assert integration.read_config() == {
+        "mcpServers": {"new": {"command": "x"}},
+        "theme": "dark",
+    }
+    assert (tmp_path / ".cursor" / "rules" / "default_prompt.txt").read_text() == "Hi"
+    # Backups are only kept until the plan is applied.
+    assert not (tmp_path / "backups").exists()
+
+
+def test_apply_rolls_back_on_failure(tmp_path):
+    (tmp_path / "a.txt").write_text("old")
+    (tmp_path / "blocker").write_text("not a directory")
+    plan = SyncPlan(
+        [
+            FileChange("cursor", "a.txt", "write", "new"),
+            FileChange("cursor", "b.txt", "write", "created"),
+            FileChange("cursor", "blocker/c.txt", "write", "fails"),
+        ]
+    )
+
+    with pytest.raises(OSError):
+        plan.apply(tmp_path / "backups")
+    assert (tmp_path / "a.txt").read_text() == "old"
+    assert not (tmp_path / "b.txt").exists()
+
+
+def test_load_rejects_unknown_plan_version(tmp_path):
+    (tmp_path / "plan.json").write_text(json.dumps({"version": 99}))
+    with pytest.raises(ValueError):
+        SyncPlan.load(tmp_path / "plan.json")
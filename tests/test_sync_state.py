@@ -0,0 +1,34 @@
+import os
+
+from mcp_config_hub.sync_state import SyncLedger
+
+
+def test_ledger_detects_hub_and_file_changes(tmp_path):
+    ledger = SyncLedger(tmp_path / "state")
+    config_path = tmp_path / "mcp.json"
+    prompt_path = tmp_path / "CLAUDE.md"
+    config_path.write_text("{}")
+    paths = [config_path, prompt_path]
+
+    assert not ledger.is_current("cursor", "from-hub", config_path, paths, (1,))
+    ledger.record("cursor", "from-hub", config_path, paths, (1,))
+    assert ledger.is_current("cursor", "from-hub", config_path, paths, (1,))
+    assert not ledger.is_current("cursor", "from-hub", config_path, paths, (2,))
+    assert not ledger.is_current("cursor", "to-hub", config_path, paths)
+
+    prompt_path.write_text("new prompt")
+    assert not ledger.is_current("cursor", "from-hub", config_path, paths, (1,))
+
+
+def test_ledger_ignores_touched_but_unmodified_files(tmp_path):
+    ledger = SyncLedger(tmp_path / "state")
+    config_path = tmp_path / "mcp.json"
+    config_path.write_text('{"mcpServers": {}}')
+    ledger.record("cursor", "to-hub", config_path, [config_path])
+
+    st = config_path.stat()
+    os.utime(config_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert ledger.is_current("cursor", "to-hub", config_path, [config_path])
+
+    config_path.write_text('{"mcpServers": {"a": {}}}')
+    assert not ledger.is_current("cursor", "to-hub", config_path, [config_path])
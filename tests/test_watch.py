@@ -0,0 +1,44 @@
+import platform
+import time
+
+import pytest
+
+from mcp_config_hub.watch import ChangeWatcher, InotifyWatcher, watch_changes
+
+
+class FakeWatcher(ChangeWatcher):
+    def wait(self, timeout):
+        return True
+
+
+def test_watch_changes_coalesces_bursts():
+    # The version changes every call during the first 0.1s, then settles.
+    start = time.monotonic()
+    calls = []
+
+    def get_version():
+        calls.append(None)
+        return len(calls) if time.monotonic() - start < 0.1 else "settled"
+
+    seen = []
+    for version in watch_changes(
+        FakeWatcher(), get_version, debounce=0.05, stop=lambda: len(seen) > 0
+    ):
+        seen.append(version)
+        assert time.monotonic() - start >= 0.15
+    assert seen == ["settled"]
+
+
+@pytest.mark.skipif(platform.system() != "Linux", reason="inotify is Linux only")
+def test_inotify_watcher_ignores_unrelated_files(tmp_path):
+    config_path = tmp_path / "hub" / "config.json"
+    watcher = InotifyWatcher([config_path])
+    try:
+        (tmp_path / "hub").mkdir()
+        assert watcher.wait(1.0)
+        (tmp_path / "hub" / "config.json.lock").write_text("")
+        assert not watcher.wait(0.05)
+        config_path.write_text("{}")
+        assert watcher.wait(1.0)
+    finally:
+        watcher.close()